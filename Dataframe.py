@@ -1,416 +1,68 @@
-import pandas as pd
-import re
 from pathlib import Path
-from datetime import datetime, timedelta
+
+from oeevolution.fleet import build_fleet_store, export_fleet_tables
+from oeevolution.log_store import iter_log_store
+from oeevolution.pipeline import build_store, export_tables
+from oeevolution.report_writer import write_report
 
 # ========== CONFIG ==========
 # folder_path = Path("/Users/sabaiyi/Desktop/SUTD/term4/DBA/project/2024 Logs/PcbVision/PCB/Log/test")
 folder_path = Path(r"C:\Users\Jerald\Documents\Uni Docs\Term 4\Data Business and Analytics\Project\Datasets\2024 Logs\PcbVision\PCB\Log\Machine")
-
-# ========== DataFrame Lists ==========
-timestamps = []
-log_messages = []
-statuses = []        # Use this list for status labels
-products = []
-product_ids = []
-time_diffs = []
-dates = []
-
-# ========== Global Variables ==========
-last_product = ""
-last_product_id = "99999999"
-# We'll carry the last status from file to file; default is "Idle"
-global_base_status = "Standby"
-FALLBACK_STATUS = "Standby"  # fallback if a status ends and no new trigger appears
-
-# ========== Utility Functions ==========
-def base_status_of(label: str) -> str:
-    """
-    Convert "Start X" -> "X", "End X" -> "X".
-    "Downtime", "Standby", "Off" remain as is.
-    """
-    if label.startswith("Start "):
-        return label.replace("Start ", "")
-    if label.startswith("End "):
-        return label.replace("End ", "")
-    return label
-
-def end_previous_status(entries, including_downtime=False):
-    """
-    Retroactively mark the last appended line as "End X" if the old base was X
-    in [Productive, Idle, Standby, Off]. 
-    If including_downtime is True, also end Downtime.
-    (This function is used only when starting a new multi-line status.)
-    """
-    if entries:
-        last_label = entries[-1]["Status"]
-        last_base = base_status_of(last_label)
-        valid_statuses = ["Productive", "Idle", "Standby", "Off"] if including_downtime else ["Productive", "Idle", "Standby"]
-        if last_base in valid_statuses:
-            entries[-1]["Status"] = f"End {last_base}"
-
-# ========== Process Each File in Sorted Order ==========
-# We'll collect log entries as a list of dictionaries.
-log_entries = []
-
-for log_file in sorted(folder_path.glob("*.log")):
-    file_name = log_file.stem
-
-    with open(log_file, "r", encoding="latin-1", errors="ignore") as f:
-        lines = f.readlines()
-    if not lines:
-        continue
-
-    # Start this file with the global base status from previous file.
-    current_base_status = global_base_status
-    previous_timestamp = None
-    previous_label = current_base_status
-
-    # Retain product info from previous files.
-    current_product = last_product
-    current_product_id = last_product_id
-
-    for raw_line in lines:
-        line = raw_line.strip()
-        if not line:
-            continue
-
-        match = re.match(r"(\d{2}:\d{2}:\d{2}):(.*)", line)
-        if not match:
-            continue
-
-        timestamp_str, message = match.groups()
-        current_dt = datetime.strptime(timestamp_str, "%H:%M:%S")
-
-        # Update product info if present.
-        if "SetFileName File:" in message:
-            current_product = message.split("SetFileName File:")[-1].strip()
-            last_product = current_product
-            pid_match = re.search(r"[/\\](\d{8})[_-]", current_product)
-            if pid_match:
-                current_product_id = pid_match.group(1)
-                last_product_id = current_product_id
-            else:
-                current_product_id = "99999999"
-
-        line_lower = message.lower()
-        backup_status = current_base_status  # store the current status before applying any trigger
-        new_label = backup_status  # default is to remain in the current status
-
-        # ===== TRIGGERS =====
-
-        # (A) "****************Close Software***************"
-        if "****************close software***************" in line_lower:
-            # For a one-line Off status, we do not call end_previous_status()
-            new_label = "Off"
-            current_base_status = "Off"
-
-        # (B) "|*************Start PCB*************|"
-        elif "|*************start pcb*************|" in line_lower:
-            # Only update to Standby if the previous line's base status is Off.
-            if log_entries and base_status_of(log_entries[-1]["Status"]) == "Off":
-                new_label = "Standby"
-                current_base_status = "Standby"
-            else:
-                new_label = backup_status
-
-        # (C) (0)--start mark!-- => end previous status then start Productive
-        elif "(0)--start mark!--" in line_lower:
-            if backup_status != "Downtime":
-                end_previous_status(log_entries)
-            new_label = "Start Productive"
-            current_base_status = "Productive"
-
-        # (D) "successfully cutting" => current line is "End Productive"
-        elif "successfully cutting" in line_lower and backup_status == "Productive":
-            new_label = "End Productive"
-            current_base_status = FALLBACK_STATUS
-
-        # (E) (0)stop plc! or "The Software Stop Button is Pressed" => end previous status then start Idle
-        elif "(0)stop plc!" in line_lower or "the software stop button is pressed" in line_lower:
-            if backup_status != "Downtime":
-                end_previous_status(log_entries)
-            new_label = "Start Idle"
-            current_base_status = "Idle"
-
-        # (F) "alarm reset" => current line is "End Idle"
-        elif "alarm" in line_lower and "reset" in line_lower and backup_status == "Idle":
-            new_label = "End Idle"
-            current_base_status = FALLBACK_STATUS
-
-        # (G) "----start procession: manufacture----" => end previous status then start Standby
-        elif "start procession" in line_lower and "manufacture" in line_lower:
-            if backup_status != "Downtime":
-                end_previous_status(log_entries)
-            new_label = "Start Standby"
-            current_base_status = "Standby"
-
-        # (H) "err:" => single-line downtime; do not end previous status
-        elif "err:" in line_lower:
-            new_label = "Downtime"
-            current_base_status = backup_status
-        else:
-            new_label = backup_status
-
-        # Append the log entry along with parsed timestamp for forward time diff calculation.
-        log_entries.append({
-            "Date": file_name,
-            "Timestamp": timestamp_str,
-            "Log Message": message.strip(),
-            "Product": current_product,
-            "Product_ID": current_product_id,
-            "Status": new_label,
-            # "Parsed_TS": current_dt
-        })
-
-        previous_timestamp = current_dt
-        previous_label = new_label
-
-    # Update global_base_status to carry over the status to the next file.
-    global_base_status = current_base_status
-
-# ========== Build DataFrame ==========
-df = pd.DataFrame(log_entries)
-
-# ✅ Convert 'Date' from string to datetime format for proper chronological sorting
-df["Date"] = pd.to_datetime(df["Date"], format="%Y.%m.%d", errors="coerce")
-
-# ✅ Convert 'Timestamp' from string to datetime.time object
-df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%H:%M:%S", errors="coerce").dt.time
-
-# ✅ Drop rows where conversion failed (if any)
-df = df.dropna(subset=["Date", "Timestamp"])
-
-# ✅ Sort DataFrame chronologically by both Date and Timestamp
-df = df.sort_values(by=["Date", "Timestamp"]).reset_index(drop=True)
-
-df["Date"] = df["Date"].dt.date
-
-
-# ========== Changes number of rows Pandas shows ==========
-pd.set_option('display.max_rows', None)
-pd.set_option('display.max_columns', None)
-pd.set_option('display.expand_frame_repr', False)
-
-# ✅ View output
-print(df.head(2000))
-
-
-# ========== Compute Forward Time Differences ==========
-# df["Next_TS"] = df["Parsed_TS"].shift(-1)
-# df["Time Difference (Seconds)"] = (df["Next_TS"] - df["Parsed_TS"]).dt.total_seconds().clip(lower=0).fillna(0)
-# df.drop(columns=["Parsed_TS", "Next_TS"], inplace=True)
-
-
-
-
-# ========== Function to Produce Product_ID_Name Table ==========
-def extract_unique_products_from_df(df):
-    """
-    Extracts unique product entries from 'Log Message' column.
-    A Product ID is defined as any continuous 8-digit number within a line containing 'SetFileName'.
-    Returns a DataFrame with 'Original Line', 'Product Name', and 'Product_ID'.
-    """
-    product_names = []
-    product_ids = []
-    original_lines = []
-    seen_products = set()
-
-    for line in df["Log Message"]:
-        line = line.strip()
-        if not line or "SetFileName" not in line:
-            continue
-
-        current_product = line.split("SetFileName File:")[-1].strip()
-        current_product_name = current_product.split("\\")[-1]
-
-        # ✅ Match any sequence of 8 digits anywhere in the line
-        product_id_match = re.search(r"\d{8}", line)
-        if product_id_match:
-            current_product_id = product_id_match.group(0)
-        else:
-            current_product_id = "99999999"
-
-        product_key = (current_product_name, current_product_id)
-        if product_key in seen_products:
-            continue
-        seen_products.add(product_key)
-
-        product_names.append(current_product_name)
-        product_ids.append(current_product_id)
-        original_lines.append(line)
-
-    result_df = pd.DataFrame({
-        "Original Line": original_lines,
-        "Product Name": product_names,
-        "Product_ID": product_ids
-    }).drop_duplicates().sort_values(by="Product_ID").reset_index(drop=True)
-
-    return result_df
-
-
-
-# ========== Function to Produce Product_Output Table ==========
-def extract_number_of_products_table(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Extracts a table that summarizes product marking cycles from a detailed log DataFrame.
-    This includes timing information for each 'Start Mark!' cycle, number of units, and ideal cycle times.
-    """
-    # Convert Timestamp to datetime format (if not already)
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%H:%M:%S")
-
-    # Initialize list for storing extracted cycle data
-    cycles = []
-
-    # Iterate through the dataframe to extract cycles
-    i = 0
-    while i < len(df):
-        # Find the "Start Mark!" log to begin a cycle
-        if "Start Mark!" in df.iloc[i]["Log Message"]:
-            start_time = df.iloc[i]["Timestamp"]
-            date = df.iloc[i]["Date"]
-            product_id = df.iloc[i]["Product_ID"]
-            i += 1
-            marking_count = 0
-            end_time = None
-
-            # Look for the corresponding "Successfully Cutting" or "Stop PLC!" log
-            while i < len(df):
-                log_message = df.iloc[i]["Log Message"]
-
-                if "Successfully Cutting" in log_message:
-                    end_time = df.iloc[i]["Timestamp"]
-                    break
-
-                if re.search(r"\(0\)Marking Completed\(\d+ms\)", log_message):
-                    marking_count += 1
-
-                if "Stop PLC!" in log_message and end_time is None:
-                    if marking_count > 0:
-                        end_time = df.iloc[i]["Timestamp"]
-                    break
-
-                i += 1
-
-            if end_time and end_time > start_time:
-                cycle_duration = (end_time - start_time).total_seconds()
-                unit_duration = cycle_duration / marking_count if marking_count > 0 else None
-
-                cycles.append([
-                    date,
-                    product_id,
-                    start_time.time(),
-                    end_time.time(),
-                    cycle_duration,
-                    marking_count,
-                    unit_duration
-                ])
-
-        i += 1
-
-    result_df = pd.DataFrame(
-        cycles,
-        columns=[
-            "Date", "Product_ID", "Cycle_Start_Time", "Cycle_End_Time",
-            "Cycle_Duration", "Number_of_Units", "Unit_Duration"
-        ]
-    )
-
-    # ---- Add Ideal Unit Time and Ideal Cycle Time ----
-    ideal_unit_time = result_df.groupby("Product_ID")["Unit_Duration"]\
-        .apply(lambda x: x[x > 0][x[x > 0] <= x[x > 0].quantile(0.25)].min())
-
-    result_df["Ideal_Unit_Time"] = result_df["Product_ID"].map(ideal_unit_time)
-    result_df["Ideal_Cycle_Time"] = result_df["Ideal_Unit_Time"] * result_df["Number_of_Units"]
-
-    return result_df
-
-# ========== Function to Produce Status Table ==========
-
-def generate_daily_status_table(df):
-
-    # Normalize Timestamp
-    df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%H:%M:%S", errors="coerce")
-    df = df.dropna(subset=["Timestamp"])
-
-    # Normalize status to base form
-    df["Base_Status"] = df["Status"].str.replace(r"^(Start |End )", "", regex=True)
-
-    # Compute time spent by subtracting timestamp[i+1] - timestamp[i]
-    df["Next_Timestamp"] = df["Timestamp"].shift(-1)
-    df["Next_Date"] = df["Date"].shift(-1)
-    df["Time_Diff"] = (df["Next_Timestamp"] - df["Timestamp"]).dt.total_seconds()
-
-    # Default fallback for time at end of file
-    df["Time_Diff"] = df["Time_Diff"].fillna(0)
-    df["Time_Diff"] = df["Time_Diff"].clip(lower=0)
-
-    # Handle potential day rollovers
-    new_rows = []
-    for i, row in df.iterrows():
-        status = row["Base_Status"]
-        date = row["Date"]
-        time = row["Timestamp"]
-        next_time = row["Next_Timestamp"]
-        duration = row["Time_Diff"]
-
-        if pd.isna(next_time) or duration == 0:
-            new_rows.append([date, status, duration])
-            continue
-
-        # Check if date changes
-        if row["Date"] != row["Next_Date"] or next_time < time:
-            midnight = datetime.combine(time.date(), datetime.min.time()) + timedelta(days=1)
-            seconds_to_midnight = (midnight - time).total_seconds()
-            seconds_after_midnight = max(0, duration - seconds_to_midnight)
-
-            new_rows.append([date, status, seconds_to_midnight])
-            new_rows.append([row["Next_Date"], status, seconds_after_midnight])
-        else:
-            new_rows.append([date, status, duration])
-
-    # Build final dataframe
-    status_df = pd.DataFrame(new_rows, columns=["Date", "Status", "Seconds"])
-    pivot = status_df.pivot_table(index="Date", columns="Status", values="Seconds", aggfunc="sum").fillna(0)
-
-    # Convert seconds to hours
-    pivot = pivot / 3600
-    pivot = pivot.round(4)
-
-    # Ensure all expected statuses are present
-    for col in ["Productive", "Idle", "Standby", "Downtime", "Off"]:
-        if col not in pivot.columns:
-            pivot[col] = 0.0
-
-    # Reorder columns
-    pivot = pivot[["Productive", "Idle", "Standby", "Downtime", "Off"]]
-
-    # Reset index for final output
-    pivot = pivot.reset_index()
-
-    return pivot
-
-
-# ✅ Export a middle slice (1M rows max) to Excel, change accordingly
-excel_limit = 1_048_575
-start_index = int(len(df) * 0.75)
-df_slice = df.iloc[start_index:start_index + min(excel_limit, len(df) - start_index)]
-output_path = r"C:\Users\Jerald\Downloads\Dataframe_5_Columns_Base.xlsx"
-df_slice.to_excel(output_path, index=False)
-print(f"✅ Excel file with {len(df_slice)} rows saved to: {output_path}")
-
-
-# ========== Export Excel file for Product Name/ID Table ==========
-product_table = extract_unique_products_from_df(df)
-product_table.to_excel(r"C:\Users\Jerald\Downloads\Product_Name_ID_Table.xlsx", index=False)
-print("✅ Product table exported successfully.")
-
-# ========== Export Excel file for Number of Products Table ==========
-Number_of_Products_df = extract_number_of_products_table(df)
-Number_of_Products_df.to_excel(r"C:\Users\Jerald\Downloads\Number_of_Products_Table.xlsx", index=False)
-print("✅ Number of Products table exported successfully.")
-
-# ========== Export Excel file for Daily Status Table ==========
-daily_status_table = generate_daily_status_table(df)
-daily_status_table.to_excel(r"C:\Users\Jerald\Downloads\Daily_Status_Table.xlsx", index=False)
-print("✅ Daily status table exported successfully.")
+# Folder with one subfolder per machine (named by machine id). When set, every machine is
+# parsed in its own worker into a fleet store and the per-machine and fleet-wide tables
+# are exported instead; None = the single machine at folder_path.
+fleet_dir = None
+# Worker processes used to parse the .log files (None = one per CPU core, 1 = serial)
+parse_workers = None
+# Folder holding the incremental checkpoint of the store; only lines appended since the
+# last run are parsed and only the days they touch rewritten. None = rebuild the store every run.
+incremental_dir = None
+# Folder caching each .log file's parse, so unchanged (historical) days aren't parsed again.
+# None = parse every file on every run.
+parse_cache_dir = None
+# Log files read in the background while parsing, for a folder on a slow network share.
+# Each prefetched file is held in memory whole; 0 = off (every file is streamed line by line).
+read_ahead_files = 0
+# Parquet dataset (one partition per Date) holding the full parsed log
+store_path = Path(r"C:\Users\Jerald\Downloads\Parsed_Log_Store")
+# Folder the tables are exported to
+output_dir = Path(r"C:\Users\Jerald\Downloads")
+# Tables to export (names from oeevolution.tables.TABLES, None = all)
+report_tables = None
+# Date range used for the tables, "YYYY-MM-DD" inclusive (None = no limit)
+report_from = None
+report_to = None
+# Format of the exported tables: "xlsx", "csv" or "parquet"
+report_format = "xlsx"
+# Also export the parsed log to Excel; rows past Excel's 1,048,576-row limit continue on new sheets
+export_base_excel = False
+
+# The functions live in the oeevolution package; this script only runs them with the
+# settings above. Same as: python -m oeevolution store ... && python -m oeevolution tables ...
+if __name__ == "__main__" and fleet_dir is not None:
+    # ========== Fleet: One Worker per Machine ==========
+    rows_stored = build_fleet_store(fleet_dir, store_path, parse_workers)
+    print(f"✅ {sum(rows_stored.values())} log rows of {len(rows_stored)} machines stored in: {store_path}")
+    for output_path in export_fleet_tables(store_path, output_dir, date_from=report_from, date_to=report_to, output_format=report_format):
+        print(f"✅ {output_path.name} exported successfully.")
+
+elif __name__ == "__main__":
+    # ========== Columnar Store ==========
+    # Files are parsed in parallel and stitched in order, carrying the status and product over;
+    # the full parsed log is written to the store one day at a time, sorted by Event_Time.
+    # With incremental_dir, only what was appended since the last run is parsed and stored.
+    rows_stored = build_store(folder_path, store_path, parse_workers, incremental_dir, cache_dir=parse_cache_dir, read_ahead=read_ahead_files)
+    print(f"✅ {rows_stored} log rows stored in: {store_path}")
+
+
+    # ✅ Optionally export the full parsed log to Excel, streamed from the store one day at a time
+    if export_base_excel:
+        output_path = output_dir / "Dataframe_5_Columns_Base.xlsx"
+        rows_written = write_report(iter_log_store(store_path, date_from=report_from, date_to=report_to), output_path)
+        print(f"✅ Excel file with {rows_written} rows saved to: {output_path}")
+
+
+    # ========== Export Product Name/ID, Number of Products and Daily Status Tables ==========
+    # Each table only reads the columns it needs, for the Date partitions in the report range.
+    for output_path in export_tables(store_path, output_dir, report_tables, report_from, report_to, report_format):
+        print(f"✅ {output_path.name} exported successfully.")
@@ -0,0 +1,100 @@
+"""
+Benchmark of generate_daily_status_table against the iterrows() version it replaced.
+
+Usage: python benchmarks/bench_daily_status.py [rows]
+Note the old version clamps intervals that cross midnight, so the tables differ on those days.
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from oeevolution.log_schema import STATUS_DTYPE
+from oeevolution.tables import generate_daily_status_table
+
+STATUSES = ["Standby", "Start Productive", "Productive", "End Productive", "Start Idle", "Idle", "End Idle", "Downtime", "Off"]
+
+def sample_frame(rows, seed=0):
+    """A compact parsed-log shaped frame: Event_Time, Status, sorted by time."""
+    rnd = random.Random(seed)
+    moment = datetime(2024, 1, 1, 6, 0, 0)
+    event_times = []
+    for _ in range(rows):
+        # Mostly seconds apart, with the occasional overnight or weekend gap
+        moment += timedelta(seconds=rnd.choice([0, 1, 1, 2, 5, 30]) if rnd.random() > 0.0005 else rnd.randint(3600, 3 * 86400))
+        event_times.append(moment)
+    return pd.DataFrame({
+        "Event_Time": pd.Series(event_times, dtype="datetime64[s]"),
+        "Status": pd.Categorical(rnd.choices(STATUSES, k=rows), dtype=STATUS_DTYPE),
+    })
+
+def legacy_frame(df):
+    """The same rows in the old layout: Date (date), Timestamp (time), Status (str)."""
+    return pd.DataFrame({
+        "Date": df["Event_Time"].dt.date,
+        "Timestamp": df["Event_Time"].dt.time,
+        "Status": df["Status"].astype(str),
+    })
+
+# ========== Before: iterrows() Rollover Split ==========
+def legacy_daily_status_table(df):
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"], format="%H:%M:%S", errors="coerce")
+    df = df.dropna(subset=["Timestamp"])
+    df["Base_Status"] = df["Status"].str.replace(r"^(Start |End )", "", regex=True)
+    df["Next_Timestamp"] = df["Timestamp"].shift(-1)
+    df["Next_Date"] = df["Date"].shift(-1)
+    df["Time_Diff"] = (df["Next_Timestamp"] - df["Timestamp"]).dt.total_seconds()
+    df["Time_Diff"] = df["Time_Diff"].fillna(0)
+    df["Time_Diff"] = df["Time_Diff"].clip(lower=0)
+
+    new_rows = []
+    for i, row in df.iterrows():
+        status = row["Base_Status"]
+        day = row["Date"]
+        moment = row["Timestamp"]
+        next_time = row["Next_Timestamp"]
+        duration = row["Time_Diff"]
+
+        if pd.isna(next_time) or duration == 0:
+            new_rows.append([day, status, duration])
+            continue
+
+        if row["Date"] != row["Next_Date"] or next_time < moment:
+            midnight = datetime.combine(moment.date(), datetime.min.time()) + timedelta(days=1)
+            seconds_to_midnight = (midnight - moment).total_seconds()
+            seconds_after_midnight = max(0, duration - seconds_to_midnight)
+            new_rows.append([day, status, seconds_to_midnight])
+            new_rows.append([row["Next_Date"], status, seconds_after_midnight])
+        else:
+            new_rows.append([day, status, duration])
+
+    status_df = pd.DataFrame(new_rows, columns=["Date", "Status", "Seconds"])
+    pivot = status_df.pivot_table(index="Date", columns="Status", values="Seconds", aggfunc="sum").fillna(0)
+    pivot = (pivot / 3600).round(4)
+    for col in ["Productive", "Idle", "Standby", "Downtime", "Off"]:
+        if col not in pivot.columns:
+            pivot[col] = 0.0
+    return pivot[["Productive", "Idle", "Standby", "Downtime", "Off"]].reset_index()
+
+def timed(function, df):
+    start = time.perf_counter()
+    table = function(df.copy())
+    return time.perf_counter() - start, table
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    df = sample_frame(rows)
+    print(f"{rows:,} rows over {df['Event_Time'].dt.normalize().nunique()} days\n")
+
+    runs = [
+        ("before (iterrows)", legacy_daily_status_table, legacy_frame(df)),
+        ("after (columnar)", generate_daily_status_table, df),
+    ]
+    for name, function, frame in runs:
+        seconds, table = timed(function, frame)
+        print(f"{name:<20} {seconds:>8.3f} s {rows / seconds:>14,.0f} rows/sec  ({len(table)} days in table)")
@@ -0,0 +1,62 @@
+"""
+Benchmark of the report writer (oeevolution.report_writer) against pandas' to_excel
+on the parsed log of deterministic synthetic logs (see synthetic_logs.py).
+
+Usage: python benchmarks/bench_export.py [--days 10] [--lines-per-day 20000] [--logs FOLDER] [--no-openpyxl]
+Each writer reports its time, rows/sec and peak traced memory; the xlsx files are
+read back to check that they hold the same rows.
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+
+from oeevolution.pipeline import parse_logs
+from oeevolution.report_writer import write_report, write_reports
+
+from bench_pipeline import measure
+from synthetic_logs import generate_logs
+
+def split_days(df):
+    """The log as one frame per day, like iter_log_store() streams it."""
+    return [day_df for _, day_df in df.groupby(df["Event_Time"].dt.date, sort=True)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the report writer against pandas' to_excel.")
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--lines-per-day", type=int, default=20_000)
+    parser.add_argument("--logs", default=None, help="benchmark this log folder instead of generated logs")
+    parser.add_argument("--no-openpyxl", action="store_true", help="skip pandas' to_excel (slow on large logs)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as generated, tempfile.TemporaryDirectory() as output_dir:
+        log_folder = args.logs
+        if log_folder is None:
+            log_folder = generated
+            generate_logs(log_folder, args.days, args.lines_per_day)
+        df = parse_logs(log_folder, workers=1)
+        days = split_days(df)
+        output_dir = Path(output_dir)
+
+        runs = {
+            "xlsx (streamed days)": lambda: write_report(days, output_dir / "log.xlsx"),
+            "csv (streamed days)": lambda: write_report(days, output_dir / "log.csv"),
+            "parquet (streamed days)": lambda: write_report(days, output_dir / "log.parquet"),
+            "xlsx + csv + parquet at once": lambda: write_reports({output_dir / f"all.{output_format}": days for output_format in ("xlsx", "csv", "parquet")}),
+        }
+        if not args.no_openpyxl:
+            runs["pandas to_excel"] = lambda: df.to_excel(output_dir / "log_openpyxl.xlsx", index=False)
+
+        print(f"{len(df):,} log rows\n")
+        print(f"{'writer':<30} {'seconds':>9} {'rows/sec':>12} {'peak MB':>9}")
+        for name, run in runs.items():
+            _, seconds, peak = measure(run)
+            print(f"{name:<30} {seconds:>9.2f} {len(df) / seconds:>12,.0f} {peak:>9,.1f}")
+
+        written = pd.read_excel(output_dir / "log.xlsx")
+        same = len(written) == len(df) and (written["Event_Time"].to_numpy() == df["Event_Time"].to_numpy()).all()
+        print(f"\n✅ xlsx read back: {len(written):,} rows, same Event_Time: {same}")
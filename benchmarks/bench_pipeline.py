@@ -0,0 +1,156 @@
+"""
+Benchmark of every pipeline stage on deterministic synthetic logs (see synthetic_logs.py):
+reading + timestamp decoding, the status state machine, building the compact
+frame, the product / cycle / daily status tables and the export, plus the fused
+single pass that builds all three tables while parsing (oeevolution.fused).
+Each stage reports its time, lines/sec and peak traced memory.
+
+Usage: python benchmarks/bench_pipeline.py [--days 20] [--lines-per-day 20000] [--logs FOLDER]
+                                           [--json results.json] [--compare baseline.json] [--tolerance 0.2]
+With --compare, stages that got slower (lines/sec) or bigger (peak memory) than
+the baseline by more than the tolerance are flagged and the exit code is 1.
+"""
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from oeevolution.fused import fused_tables
+from oeevolution.log_parser import StatusMachine, find_log_files, iter_log_chunks, iter_log_lines
+from oeevolution.log_schema import build_log_frame
+from oeevolution.pipeline import write_table
+from oeevolution.tables import extract_number_of_products_table, extract_unique_products_from_df, generate_daily_status_table
+
+from synthetic_logs import generate_logs
+
+# ========== Stages ==========
+def read_lines(log_files):
+    """File reading and timestamp decoding: (file date, [(seconds, message)]) per file."""
+    return [(log_file.stem, list(iter_log_lines(log_file))) for log_file in log_files]
+
+def run_state_machine(decoded_files):
+    machine = StatusMachine()
+    rows = 0
+    for date, lines in decoded_files:
+        machine.start_file(date)
+        for seconds, message in lines:
+            rows += machine.feed(seconds, message) is not None
+    return rows + (machine.flush() is not None)
+
+def export(tables, output_dir):
+    for file_stem, table in tables.items():
+        write_table(table, output_dir, file_stem, "xlsx")
+        write_table(table, output_dir, file_stem, "csv")
+
+def measure(function, *args, memory=True):
+    """(result, seconds, peak MB or None) of one call; memory is traced in a second, untimed call."""
+    gc.collect()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    if not memory:
+        return result, seconds, None
+
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def run_benchmark(log_folder, memory=True):
+    """{stage: {"seconds", "lines_per_sec", "peak_mb"}} of every stage over the folder's logs."""
+    log_files = find_log_files(log_folder)
+    results = {}
+
+    def stage(name, function, *args):
+        result, seconds, peak = measure(function, *args, memory=memory)
+        results[name] = {"seconds": seconds, "peak_mb": peak}
+        return result
+
+    decoded = stage("read + decode", read_lines, log_files)
+    lines = sum(len(file_lines) for _, file_lines in decoded)
+    stage("state machine", run_state_machine, decoded)
+    del decoded
+    df = stage("ingest (frame)", lambda: build_log_frame(iter_log_chunks(log_files, workers=1)))
+    tables = {
+        "Product_Name_ID_Table": stage("product table", extract_unique_products_from_df, df),
+        "Number_of_Products_Table": stage("cycle table", extract_number_of_products_table, df),
+        "Daily_Status_Table": stage("daily status table", generate_daily_status_table, df),
+    }
+    with tempfile.TemporaryDirectory() as output_dir:
+        stage("export (xlsx + csv)", export, tables, output_dir)
+    del df, tables
+    stage("fused (parse + tables)", fused_tables, log_files)
+
+    for result in results.values():
+        result["lines_per_sec"] = lines / result["seconds"] if result["seconds"] else None
+    return {"lines": lines, "files": len(log_files), "stages": results}
+
+# ========== Report ==========
+def regressions(report, baseline, tolerance):
+    """Stages slower or bigger than in the baseline report by more than `tolerance` (a fraction)."""
+    flagged = []
+    for name, result in report["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        if before["lines_per_sec"] and result["lines_per_sec"] < before["lines_per_sec"] * (1 - tolerance):
+            flagged.append(f"{name}: {result['lines_per_sec']:,.0f} lines/sec (baseline {before['lines_per_sec']:,.0f})")
+        if before["peak_mb"] and result["peak_mb"] and result["peak_mb"] > before["peak_mb"] * (1 + tolerance):
+            flagged.append(f"{name}: peak {result['peak_mb']:,.1f} MB (baseline {before['peak_mb']:,.1f} MB)")
+    return flagged
+
+def print_report(report, baseline=None):
+    print(f"{report['lines']:,} log lines in {report['files']} files\n")
+    print(f"{'stage':<22} {'seconds':>9} {'lines/sec':>14} {'peak MB':>9} {'vs baseline':>12}")
+    for name, result in report["stages"].items():
+        peak = "-" if result["peak_mb"] is None else f"{result['peak_mb']:,.1f}"
+        change = ""
+        before = (baseline or {}).get("stages", {}).get(name)
+        if before and before["lines_per_sec"]:
+            change = f"{result['lines_per_sec'] / before['lines_per_sec'] - 1:+.0%}"
+        print(f"{name:<22} {result['seconds']:>9.3f} {result['lines_per_sec']:>14,.0f} {peak:>9} {change:>12}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on synthetic PcbVision logs.")
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--lines-per-day", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--logs", default=None, help="benchmark this log folder instead of generated logs")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced (peak memory) runs")
+    parser.add_argument("--json", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="baseline JSON from an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown / memory growth vs the baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as generated:
+        log_folder = args.logs
+        if log_folder is None:
+            log_folder = generated
+            generate_logs(log_folder, args.days, args.lines_per_day, seed=args.seed)
+        report = run_benchmark(log_folder, memory=not args.no_memory)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results saved to: {args.json}")
+
+    if baseline is not None:
+        flagged = regressions(report, baseline, args.tolerance)
+        for line in flagged:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if flagged else 0)
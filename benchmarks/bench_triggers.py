@@ -0,0 +1,154 @@
+"""
+Benchmark of the trigger matching, before and after log_triggers.
+
+Usage: python benchmarks/bench_triggers.py [path/to/file.log]
+Without a log file a synthetic mix of PcbVision messages is used, once with
+a few hundred distinct messages and once with unique numbers in every line
+(marking times, axis positions, scores), like real logs.
+Each variant is timed REPEATS times and the best run is reported.
+"""
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from oeevolution.log_parser import BASE_STATUSES, next_status
+from oeevolution.log_triggers import KEEP_PATTERNS, SET_FILE_NAME, SET_FILE_NAME_TEXT, is_kept, match_triggers
+
+REPEATS = 5
+
+# ========== Sample Messages ==========
+SAMPLE_MESSAGES = [
+    "****************Close Software***************",
+    "|*************Start PCB*************|",
+    "(0)--Start Mark!--",
+    "(0)Marking Completed({ms}ms)",
+    "Successfully Cutting",
+    "(0)Stop PLC!",
+    "Alarm reset",
+    "----Start Procession: Manufacture----",
+    "(0)Failed Waiting for PCB To Be in Place(Err:32)",
+    "SetFileName File: D:\\Production Program\\{pid}_board.prg",
+    "Vision locate mark {n} score {score}",
+    "Axis X move to {x} speed 200",
+    "Laser power set to {n}%",
+    "Camera grab ok",
+]
+SAMPLE_WEIGHTS = [1, 1, 6, 12, 6, 2, 1, 1, 1, 1, 25, 25, 8, 10]
+
+def sample_messages(count, seed=0, unique_numbers=False):
+    """Synthetic messages; with unique_numbers every number is drawn from a wide range, like real logs."""
+    rnd = random.Random(seed)
+    spread = 1_000_000 if unique_numbers else 1
+    messages = []
+    for template in rnd.choices(SAMPLE_MESSAGES, SAMPLE_WEIGHTS, k=count):
+        messages.append(template.format(
+            ms=rnd.randint(80, 400 * spread), pid=rnd.randint(10_000_000, 10_000_050), n=rnd.randint(0, 99 * spread),
+            score=f"{rnd.random():.6f}" if unique_numbers else rnd.choice(["0.91", "0.95", "0.98"]), x=rnd.randint(0, 500 * spread),
+        ))
+    return messages
+
+def read_messages(log_file):
+    messages = []
+    with open(log_file, "r", encoding="latin-1", errors="ignore") as f:
+        for raw_line in f:
+            match = re.match(r"(\d{2}:\d{2}:\d{2}):(.*)", raw_line.strip())
+            if match:
+                messages.append(match.group(2))
+    return messages
+
+# ========== Before: Dataframe.py / filter_one_log.py Checks ==========
+def legacy_next_status(line_lower, backup_status, last_label):
+    """The substring trigger chain Dataframe.py ran on every lowercased message."""
+    if "****************close software***************" in line_lower:
+        return "Off", "Off", False
+    if "|*************start pcb*************|" in line_lower:
+        if last_label is not None and last_label == "Off":
+            return "Standby", "Standby", False
+        return backup_status, backup_status, False
+    if "(0)--start mark!--" in line_lower:
+        return "Start Productive", "Productive", backup_status != "Downtime"
+    if "successfully cutting" in line_lower and backup_status == "Productive":
+        return "End Productive", "Standby", False
+    if "(0)stop plc!" in line_lower or "the software stop button is pressed" in line_lower:
+        return "Start Idle", "Idle", backup_status != "Downtime"
+    if "alarm" in line_lower and "reset" in line_lower and backup_status == "Idle":
+        return "End Idle", "Standby", False
+    if "start procession" in line_lower and "manufacture" in line_lower:
+        return "Start Standby", "Standby", backup_status != "Downtime"
+    if "err:" in line_lower:
+        return "Downtime", backup_status, False
+    return backup_status, backup_status, False
+
+def legacy_status(messages):
+    """Per line, Dataframe.py checked for a product line, then ran the chain."""
+    fired = 0
+    for message in messages:
+        if SET_FILE_NAME_TEXT in message:
+            fired += 1
+        if legacy_next_status(message.lower(), "Productive", None)[0] != "Productive":
+            fired += 1
+    return fired
+
+def legacy_keep(messages):
+    """The per-line keep filter filter_one_log.py used."""
+    return sum(1 for message in messages if any(re.search(pattern, message) for pattern in KEEP_PATTERNS))
+
+# ========== After: log_triggers ==========
+def matcher_status(messages):
+    """Per line, StatusMachine.feed() only runs next_status() on a message with triggers."""
+    fired = 0
+    for message in messages:
+        triggers = match_triggers(message)
+        if triggers & SET_FILE_NAME:
+            fired += 1
+        if triggers and next_status(triggers, "Productive", None)[0] != "Productive":
+            fired += 1
+    return fired
+
+def matcher_keep(messages):
+    return sum(1 for message in messages if is_kept(message))
+
+def check_same_results(messages):
+    """The new checks must give the old chain's status and keep decision on every message."""
+    for message in set(messages):
+        triggers = match_triggers(message)
+        for status in BASE_STATUSES:
+            for last_label in (None, "Off"):
+                if next_status(triggers, status, last_label) != legacy_next_status(message.lower(), status, last_label):
+                    raise AssertionError(f"status differs from the old chain on {message!r}")
+        if is_kept(message) != any(re.search(pattern, message) for pattern in KEEP_PATTERNS):
+            raise AssertionError(f"keep decision differs from the old filter on {message!r}")
+
+def lines_per_second(function, messages):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(messages)
+        times.append(time.perf_counter() - start)
+    return len(messages) / min(times)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        samples = {Path(sys.argv[1]).name: read_messages(sys.argv[1])}
+    else:
+        samples = {
+            "synthetic, repeating messages": sample_messages(300_000),
+            "synthetic, unique numbers per line": sample_messages(300_000, unique_numbers=True),
+        }
+
+    for name, messages in samples.items():
+        print(f"{name}: {len(messages):,} messages, {len(set(messages)):,} distinct")
+        check_same_results(messages)
+        results = [
+            ("status triggers", "before (lower + substring chain)", lines_per_second(legacy_status, messages)),
+            ("status triggers", "after (match_triggers)", lines_per_second(matcher_status, messages)),
+            ("keep patterns", "before (13 x re.search)", lines_per_second(legacy_keep, messages)),
+            ("keep patterns", "after (is_kept)", lines_per_second(matcher_keep, messages)),
+        ]
+        for stage, variant, rate in results:
+            print(f"  {stage:<16} {variant:<34} {rate:>14,.0f} lines/sec")
+        print()
@@ -0,0 +1,135 @@
+"""
+Deterministic synthetic PcbVision logs: one "YYYY.MM.DD.log" day file per day,
+shaped like the machine's own logs (HH:MM:SS:message lines, product changes,
+mark / cut cycles, stops, alarms, errors, software restarts and the noise
+lines in between). The same seed and scale always give the same files.
+
+Usage: python benchmarks/synthetic_logs.py OUTPUT_DIR [--days 30] [--lines-per-day 20000] [--products 12] [--seed 0]
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+# ========== Message Templates ==========
+NOISE_MESSAGES = [
+    "Vision locate mark {n} score 0.{score}",
+    "Axis X move to {x} speed 200",
+    "Axis Y move to {x} speed 200",
+    "Laser power set to {n}%",
+    "Camera grab ok",
+    "Table vacuum on",
+    "Motion axis X home",
+]
+ERROR_MESSAGES = [
+    "(0)Failed Waiting for PCB To Be in Place(Err:32)",
+    "(0)The Program is Pressed To Stop(Err:32)",
+    "Start processing failed: The Track System is Not Initialized(Err:61)",
+    "Waiting for material to arrive failed: This Feature is Not Supported(Err:48)",
+]
+PRODUCT_NAMES = ["CTRL", "PWR", "LED", "SENS", "MAIN", "IO"]
+
+def product_paths(products, rnd):
+    """SetFileName program paths of `products` products, each with an 8-digit id."""
+    ids = rnd.sample(range(10_000_000, 100_000_000), products)
+    return [f"D:\\Production Program\\{pid}{rnd.choice('_-')}{rnd.choice(PRODUCT_NAMES)}_Rev{rnd.randint(1, 9)}.prg" for pid in ids]
+
+# ========== Day File ==========
+# Lines per day a real machine writes at its normal pace; bigger days run the clock faster
+NATURAL_LINES_PER_DAY = 10_000
+
+class MachineDay:
+    """Writes one day of log lines; the clock only moves forward and stops at midnight."""
+
+    def __init__(self, rnd, lines_per_day, products):
+        self.rnd = rnd
+        self.lines_per_day = lines_per_day
+        self.products = products
+        self.pace = min(1.0, NATURAL_LINES_PER_DAY / max(lines_per_day, 1))
+        self.lines = []
+        self.second = rnd.randint(5 * 3600, 7 * 3600)
+
+    def log(self, message, wait=0):
+        # Waits shrink with the pace, rounded at random so short waits don't all vanish
+        self.second += int(wait * self.pace + self.rnd.random())
+        if self.second < 86_400:
+            self.lines.append(f"{self.second // 3600:02d}:{self.second % 3600 // 60:02d}:{self.second % 60:02d}:{message}")
+
+    def noise(self, count):
+        for _ in range(count):
+            template = self.rnd.choice(NOISE_MESSAGES)
+            self.log(template.format(n=self.rnd.randint(0, 99), score=self.rnd.randint(80, 99), x=self.rnd.randint(0, 500)), self.rnd.choice([0, 0, 1]))
+
+    def cycle(self):
+        """One panel: start mark, a few marked units, then a cut (or, now and then, a stop)."""
+        self.log("(0)--Start Mark!--", self.rnd.randint(1, 5))
+        for _ in range(self.rnd.randint(1, 8)):
+            ms = self.rnd.randint(900, 9_000)
+            self.noise(self.rnd.randint(0, 3))
+            self.log(f"(0)Marking Completed({ms}ms)", ms // 1000)
+        if self.rnd.random() < 0.05:
+            self.log("(0)Stop PLC!", 1)
+            self.log("Alarm reset", self.rnd.randint(30, 900))
+        else:
+            self.log("Successfully Cutting", self.rnd.randint(1, 3))
+
+    def write(self):
+        rnd = self.rnd
+        self.log("|*************Start PCB*************|")
+        while len(self.lines) < self.lines_per_day and self.second < 86_400:
+            self.log(f"SetFileName File: {rnd.choice(self.products)}", rnd.randint(5, 120))
+            self.log("----Start Procession: Manufacture----", rnd.randint(1, 30))
+            for _ in range(rnd.randint(5, 60)):
+                self.cycle()
+                self.noise(rnd.randint(0, 6))
+                if rnd.random() < 0.02:
+                    self.log(rnd.choice(ERROR_MESSAGES), rnd.randint(1, 10))
+                    self.log("The Software Stop Button is Pressed", rnd.randint(60, 1800))
+                    self.log("----Start Procession: Manufacture----", rnd.randint(1, 60))
+            if rnd.random() < 0.1:
+                # Software restart during the day
+                self.log("****************Close Software***************", rnd.randint(1, 60))
+                self.log("|*************Start PCB*************|", rnd.randint(300, 3600))
+        # Cut the day to size first, so it still ends with the closing line (unless that falls
+        # past midnight), and go back to the last line kept so the close follows right after it
+        del self.lines[max(self.lines_per_day - 1, 0):]
+        if self.lines:
+            hours, minutes, seconds = self.lines[-1][:8].split(":")
+            self.second = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        self.log("****************Close Software***************", rnd.randint(1, 60))
+        return self.lines
+
+# ========== Log Folder ==========
+def generate_logs(output_dir, days=30, lines_per_day=20_000, products=12, seed=0, first_day=date(2024, 1, 1)):
+    """
+    Write `days` day files (weekends skipped) of about `lines_per_day` lines
+    each to output_dir, with `products` different programs. Returns the
+    paths written, in date order.
+    """
+    rnd = random.Random(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = product_paths(products, rnd)
+
+    written = []
+    day = first_day
+    while len(written) < days:
+        if day.weekday() < 5:
+            log_file = output_dir / f"{day:%Y.%m.%d}.log"
+            with open(log_file, "w", encoding="latin-1", newline="\r\n") as f:
+                f.write("\n".join(MachineDay(rnd, lines_per_day, paths).write()) + "\n")
+            written.append(log_file)
+        day += timedelta(days=1)
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write deterministic synthetic PcbVision day logs.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--lines-per-day", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    log_files = generate_logs(args.output_dir, args.days, args.lines_per_day, args.products, args.seed)
+    print(f"✅ {len(log_files)} log files written to: {args.output_dir}")
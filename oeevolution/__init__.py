@@ -0,0 +1,49 @@
+"""
+OEE analysis of PcbVision laser cutting machine logs.
+
+    from oeevolution import parse_logs, generate_daily_status_table
+    df = parse_logs("path/to/PcbVision/PCB/Log/Machine")
+    daily_status_table = generate_daily_status_table(df)
+
+Names are imported from their submodule on first use, so importing the
+package does not load pandas.
+"""
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "parse_logs": "pipeline",
+    "build_store": "pipeline",
+    "export_tables": "pipeline",
+    "build_store_and_tables": "pipeline",
+    "fused_tables": "fused",
+    "parse_fleet": "fleet",
+    "build_fleet_store": "fleet",
+    "read_fleet_store": "fleet",
+    "export_fleet_tables": "fleet",
+    "recording": "instrument",
+    "LiveOEE": "live",
+    "Rollup": "rollup",
+    "EventIndex": "event_index",
+    "update_rollup": "rollup",
+    "find_log_files": "log_parser",
+    "iter_log_chunks": "log_parser",
+    "ingest_incremental": "log_incremental",
+    "read_log_store": "log_store",
+    "write_log_store": "log_store",
+    "iter_log_store": "log_store",
+    "write_report": "report_writer",
+    "filter_log_file": "log_filter",
+    "extract_unique_products_from_df": "tables",
+    "extract_number_of_products_table": "tables",
+    "generate_daily_status_table": "tables",
+    "TABLES": "tables",
+    "FLEET_TABLES": "fleet",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
@@ -0,0 +1,294 @@
+"""
+Command line interface: python -m oeevolution <command> ...
+
+  store         parse the logs and (re)write the Parquet store
+  ingest        add only the lines appended since the last run to the store
+  tables        build the requested tables from the store
+  export-log    write the parsed log from the store to xlsx / csv / parquet
+  lookup        find events, status periods or the cycle at a time via the store's event index
+  fleet         parse every machine folder of a fleet directory, one worker per machine
+  fleet-tables  build per-machine and fleet-wide tables from the fleet store
+  rollup        update the pre-aggregated OEE cube of a store and query it
+  live          tail the active log file and print rolling shift / day OEE (no pandas needed)
+  filter        write the filtered view of a single log file to CSV
+
+Each command only imports what it needs, so e.g. `live` starts without pandas.
+--report writes a JSON run report with the time, rows and bytes of every stage
+(see instrument.py), --track-memory adds each stage's peak memory and
+--profile runs the named stages under cProfile.
+"""
+import argparse
+import csv
+import json
+from contextlib import nullcontext
+
+TABLE_NAMES = ["products", "cycles", "daily_status"]  # keys of tables.TABLES
+FLEET_TABLE_NAMES = ["machine_daily_status", "machine_cycles", "fleet_daily_status", "fleet_cycles"]  # keys of fleet.FLEET_TABLES
+OUTPUT_FORMATS = ["xlsx", "csv", "parquet"]  # keys of report_writer.FORMAT_WRITERS
+EVENT_KINDS = [  # event_index.EVENT_KINDS
+    "close_software", "start_pcb", "start_mark", "successfully_cutting", "stop_plc", "alarm", "reset",
+    "start_procession", "manufacture", "err", "set_file_name", "cycle_start", "cycle_cut", "cycle_stop", "marking_completed",
+]
+
+def run_store(args):
+    from .pipeline import build_store
+
+    if args.tables_out is not None and args.state is not None:
+        raise SystemExit("--tables-out parses the whole log in one pass and can't be combined with --state")
+    if args.tables_out is not None:
+        from .pipeline import build_store_and_tables
+
+        rows_stored, written = build_store_and_tables(args.logs, args.store, args.tables_out, args.table, not args.drop_messages, args.format)
+        print(f"✅ {rows_stored} log rows stored in: {args.store}")
+        for output_path in written:
+            print(f"✅ {output_path} exported successfully.")
+        return
+    # The incremental state follows one log folder (checked in main())
+    logs = args.logs if args.state is None else args.logs[0]
+    try:
+        rows_stored = build_store(logs, args.store, args.workers, args.state, not args.drop_messages, args.cache, args.read_ahead)
+    except NotADirectoryError as error:
+        raise SystemExit(str(error))
+    print(f"✅ {rows_stored} log rows stored in: {args.store}")
+
+def run_ingest(args):
+    from .log_incremental import ingest_incremental
+
+    try:
+        new_rows = ingest_incremental(args.folder, args.state, args.store, not args.drop_messages)
+    except NotADirectoryError as error:
+        raise SystemExit(str(error))
+    print(f"✅ {new_rows} new log rows added to: {args.store}")
+
+def run_tables(args):
+    from .log_store import MissingColumnsError
+    from .pipeline import export_tables
+
+    try:
+        written = export_tables(args.store, args.out, args.table, args.date_from, args.date_to, args.format)
+    except MissingColumnsError as error:
+        raise SystemExit(f"{error} Or build only the tables that don't: --table daily_status")
+    for output_path in written:
+        print(f"✅ {output_path} exported successfully.")
+
+def run_export_log(args):
+    from .log_store import iter_log_store
+    from .report_writer import write_report
+
+    rows_written = write_report(iter_log_store(args.store, date_from=args.date_from, date_to=args.date_to), args.output)
+    print(f"✅ {rows_written} log rows exported to: {args.output}")
+
+def run_lookup(args):
+    from .event_index import EventIndex, index_store
+
+    if args.reindex:
+        print(f"✅ {len(index_store(args.store))} dates indexed in: {args.store}")
+    index = EventIndex(args.store)
+    if args.cycle_at is not None:
+        cycle = index.cycle_at(args.cycle_at)
+        print(json.dumps(cycle, default=str, indent=2) if cycle is not None else f"No finished cycle at {args.cycle_at}")
+        return
+    if args.status is not None:
+        result = index.status_periods(args.status, args.start, args.end, args.product)
+    elif args.event:
+        result = index.events(args.event, args.start, args.end, args.product)
+    else:
+        result = index.rows_between(args.start, args.end, args.product)
+
+    if args.out is not None:
+        from .report_writer import write_report
+
+        rows_written = write_report(result, args.out)
+        print(f"✅ {rows_written} rows exported to: {args.out}")
+    else:
+        print(result.to_string(index=False))
+
+def run_fleet(args):
+    from .fleet import build_fleet_store
+
+    rows_stored = build_fleet_store(args.fleet_dir, args.store, args.workers, not args.drop_messages)
+    for machine_id, rows in rows_stored.items():
+        print(f"✅ {machine_id}: {rows} log rows stored")
+    print(f"✅ {len(rows_stored)} machines stored in: {args.store}")
+
+def run_fleet_tables(args):
+    from .fleet import export_fleet_tables
+    from .log_store import MissingColumnsError
+
+    try:
+        written = export_fleet_tables(args.store, args.out, args.table, args.machine, args.date_from, args.date_to, args.format)
+    except MissingColumnsError as error:
+        raise SystemExit(f"{error} Or build only the tables that don't: --table machine_daily_status --table fleet_daily_status")
+    for output_path in written:
+        print(f"✅ {output_path} exported successfully.")
+
+def run_rollup(args):
+    from .log_store import MissingColumnsError
+    from .rollup import update_rollup
+
+    try:
+        rollup = update_rollup(args.store, args.rollup, args.rebuild)
+    except MissingColumnsError as error:
+        raise SystemExit(str(error))
+    table = rollup.oee(args.date_from, args.date_to, args.product, args.by or ["Date"])
+    print(table.to_string(index=False))
+
+def load_ideal_times(path):
+    """
+    IdealTimes from a saved sketch (.json, IdealTimes.to_dict()) or from the
+    Unit_Duration of every cycle of a Number_of_Products_Table exported as CSV.
+    """
+    from .ideal_times import IdealTimes
+
+    if str(path).endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return IdealTimes.from_dict(json.load(f))
+
+    ideal_times = IdealTimes()
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["Unit_Duration"]:
+                ideal_times.add(row["Product_ID"], float(row["Unit_Duration"]))
+    return ideal_times
+
+def format_oee(summary):
+    percent = lambda value: "-" if value is None else f"{value:.1%}"
+    return (f"OEE {percent(summary['OEE'])} (availability {percent(summary['Availability'])}, "
+            f"performance {percent(summary['Performance'])}), productive {summary['Productive']:.2f} h, "
+            f"{summary['Cycles']} cycles, {summary['Number_of_Units']} units")
+
+def run_live(args):
+    from .live import SHIFT_STARTS, LiveOEE
+
+    ideal_times = load_ideal_times(args.ideal_times) if args.ideal_times else None
+    oee = LiveOEE(ideal_times, args.shift or SHIFT_STARTS)
+    for lines in oee.follow(args.folder, args.interval):
+        if not lines:
+            continue
+        shift, day = oee.shift(), oee.day()
+        print(f"{oee.log_file.name} +{lines} lines | shift {shift['Date']} {shift['Shift']}: {format_oee(shift)} "
+              f"| day {day['Date']}: {format_oee(day)}", flush=True)
+
+def run_filter(args):
+    from .log_filter import filter_log_file
+
+    rows_written = filter_log_file(args.log_file, args.output)
+    print(f"Processed log data saved to {args.output} ({rows_written} rows)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="oeevolution", description="OEE analysis of PcbVision machine logs.")
+    parser.add_argument("--report", default=None, help="write a JSON run report (time, rows, bytes per stage) to this file")
+    parser.add_argument("--track-memory", action="store_true", help="add each stage's peak traced memory to the report (slower)")
+    parser.add_argument("--profile", action="append", metavar="STAGE",
+                        help="run this stage under cProfile, e.g. parse, sort, 'table cycles' or all (repeatable; needs --report)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    store = commands.add_parser("store", help="parse the logs and (re)write the Parquet store")
+    store.add_argument("logs", nargs="+", help="log folder(s) or .log files, in chronological order")
+    store.add_argument("--store", required=True, help="Parquet store folder (one partition per Date)")
+    store.add_argument("--workers", type=int, default=None, help="parser processes (default: one per CPU core, 1 = serial)")
+    store.add_argument("--state", default=None, help="incremental state folder; only appended lines are parsed and only the days they touch rewritten (one log folder)")
+    store.add_argument("--drop-messages", action="store_true", help="don't store the Log Message column (only the daily_status table can then be built)")
+    store.add_argument("--cache", default=None, help="parse cache folder; files unchanged since they were cached aren't parsed again")
+    store.add_argument("--read-ahead", type=int, default=0, help="log files read whole in the background while parsing, for slow network shares (default: 0 = off)")
+    store.add_argument("--tables-out", default=None, help="also build the tables in the same (serial) parse pass and write them here")
+    store.add_argument("--table", action="append", choices=TABLE_NAMES, help="table built with --tables-out (repeatable; default: all)")
+    store.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx", help="format of the --tables-out tables (default: xlsx)")
+    store.set_defaults(run=run_store)
+
+    ingest = commands.add_parser("ingest", help="add only the lines appended since the last run to the store")
+    ingest.add_argument("folder", help="log folder")
+    ingest.add_argument("--store", required=True, help="Parquet store folder, extended in place")
+    ingest.add_argument("--state", required=True, help="incremental state folder (checkpoint of the store)")
+    ingest.add_argument("--drop-messages", action="store_true", help="don't store the Log Message column (only the daily_status table can then be built)")
+    ingest.set_defaults(run=run_ingest)
+
+    tables = commands.add_parser("tables", help="build tables from the store")
+    tables.add_argument("--store", required=True, help="Parquet store folder")
+    tables.add_argument("--out", required=True, help="output folder")
+    tables.add_argument("--table", action="append", choices=TABLE_NAMES, help="table to build (repeatable; default: all)")
+    tables.add_argument("--from", dest="date_from", default=None, help="first Date, YYYY-MM-DD")
+    tables.add_argument("--to", dest="date_to", default=None, help="last Date, YYYY-MM-DD")
+    tables.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx", help="output format (default: xlsx)")
+    tables.set_defaults(run=run_tables)
+
+    export_log = commands.add_parser("export-log", help="write the parsed log from the store to one file, streamed a day at a time")
+    export_log.add_argument("--store", required=True, help="Parquet store folder")
+    export_log.add_argument("output", help="output file; .xlsx (split into sheets past Excel's row limit), .csv or .parquet")
+    export_log.add_argument("--from", dest="date_from", default=None, help="first Date, YYYY-MM-DD")
+    export_log.add_argument("--to", dest="date_to", default=None, help="last Date, YYYY-MM-DD")
+    export_log.set_defaults(run=run_export_log)
+
+    lookup = commands.add_parser("lookup", help="find events, status periods or the cycle at a time via the store's event index")
+    lookup.add_argument("--store", required=True, help="Parquet store folder")
+    lookup.add_argument("--event", action="append", choices=EVENT_KINDS, help="event kind to list (repeatable; default: all rows)")
+    lookup.add_argument("--status", choices=["Productive", "Idle", "Standby", "Downtime", "Off"], help="list the periods spent in this status")
+    lookup.add_argument("--cycle-at", default=None, metavar="TIME", help="show the cycle running at this time, 'YYYY-MM-DD HH:MM:SS'")
+    lookup.add_argument("--from", dest="start", default=None, help="first Event_Time, 'YYYY-MM-DD[ HH:MM:SS]'")
+    lookup.add_argument("--to", dest="end", default=None, help="last Event_Time, 'YYYY-MM-DD[ HH:MM:SS]' (a bare date includes that whole day)")
+    lookup.add_argument("--product", default=None, help="only rows / periods of this Product_ID")
+    lookup.add_argument("--out", default=None, help="write the result to this .xlsx / .csv / .parquet file instead of printing it")
+    lookup.add_argument("--reindex", action="store_true", help="(re)build the index of a store written before it existed")
+    lookup.set_defaults(run=run_lookup)
+
+    fleet = commands.add_parser("fleet", help="parse every machine folder of a fleet directory into the fleet store")
+    fleet.add_argument("fleet_dir", help="folder with one subfolder per machine (named by machine id)")
+    fleet.add_argument("--store", required=True, help="fleet store folder (Machine=<id>/Date=YYYY-MM-DD partitions)")
+    fleet.add_argument("--workers", type=int, default=None, help="machines parsed at once (default: one per CPU core)")
+    fleet.add_argument("--drop-messages", action="store_true", help="don't store the Log Message column (only the daily status tables can then be built)")
+    fleet.set_defaults(run=run_fleet)
+
+    fleet_tables = commands.add_parser("fleet-tables", help="build per-machine and fleet-wide tables from the fleet store")
+    fleet_tables.add_argument("--store", required=True, help="fleet store folder")
+    fleet_tables.add_argument("--out", required=True, help="output folder")
+    fleet_tables.add_argument("--table", action="append", choices=FLEET_TABLE_NAMES, help="table to build (repeatable; default: all)")
+    fleet_tables.add_argument("--machine", action="append", help="machine id to include (repeatable; default: all)")
+    fleet_tables.add_argument("--from", dest="date_from", default=None, help="first Date, YYYY-MM-DD")
+    fleet_tables.add_argument("--to", dest="date_to", default=None, help="last Date, YYYY-MM-DD")
+    fleet_tables.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx", help="output format (default: xlsx)")
+    fleet_tables.set_defaults(run=run_fleet_tables)
+
+    rollup = commands.add_parser("rollup", help="update the pre-aggregated OEE cube of a store and query it")
+    rollup.add_argument("--store", required=True, help="Parquet store folder")
+    rollup.add_argument("--rollup", required=True, help="rollup folder (cube + where the last update stopped)")
+    rollup.add_argument("--rebuild", action="store_true", help="rebuild the cube from the whole store")
+    rollup.add_argument("--from", dest="date_from", default=None, help="first Date, YYYY-MM-DD")
+    rollup.add_argument("--to", dest="date_to", default=None, help="last Date, YYYY-MM-DD")
+    rollup.add_argument("--product", action="append", help="Product_ID to include (repeatable; default: all)")
+    rollup.add_argument("--by", action="append", choices=["Date", "Product_ID"], help="group by (repeatable; default: Date)")
+    rollup.set_defaults(run=run_rollup)
+
+    live = commands.add_parser("live", help="tail the active log file and print rolling shift / day OEE")
+    live.add_argument("folder", help="log folder")
+    live.add_argument("--interval", type=float, default=5.0, help="seconds between polls (default: 5)")
+    live.add_argument("--shift", action="append", help="shift start, HH:MM (repeatable; default: 07:00 and 19:00)")
+    live.add_argument("--ideal-times", default=None, help="Number_of_Products_Table CSV, or a saved ideal-time sketch (.json)")
+    live.set_defaults(run=run_live)
+
+    filter_log = commands.add_parser("filter", help="write the filtered view of a single log file to CSV")
+    filter_log.add_argument("log_file", help=".log file")
+    filter_log.add_argument("output", help="output CSV")
+    filter_log.set_defaults(run=run_filter)
+
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile and args.report is None:
+        parser.error("--profile needs --report (the stats are saved next to it)")
+    if args.run is run_store and args.state is not None and len(args.logs) > 1:
+        parser.error("--state follows a single log folder; pass one log path")
+
+    if args.report is None and not args.track_memory:
+        recording = nullcontext()
+    else:
+        from .instrument import recording
+        recording = recording(args.report, args.track_memory, args.profile)
+    with recording as report:
+        args.run(args)
+    if args.report is not None:
+        print(f"✅ Run report saved to: {args.report}")
+    elif report is not None:
+        for name, totals in report.stages.items():
+            print(f"{name}: {totals['seconds']:.3f} s, {totals['rows']} rows, peak {totals['peak_mb'] or 0:.1f} MB")
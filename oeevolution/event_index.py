@@ -0,0 +1,434 @@
+"""
+Persistent event index of a Parquet log store, for drill-down queries.
+
+    from oeevolution import EventIndex
+    index = EventIndex("Parsed_Log_Store")
+    index.status_periods("Downtime", "2024-03-01 07:00", "2024-03-01 19:00", product="12345678")
+    index.events("err", "2024-03-01", "2024-03-01")  # the whole day
+    index.cycle_at("2024-03-01 10:15:00")
+
+write_log_store() indexes every Date partition as it writes it, into
+<store>/_index/Date=YYYY-MM-DD.npz (folders starting with "_" are skipped
+when the store is read):
+- the Event_Time of every row and the rows in time order,
+- the rows of every event kind (the status triggers of log_triggers plus
+  the lines the cycle table opens, closes and counts cycles by),
+- the runs of rows with the same Product_ID, and with the same base status.
+
+A query only loads the index files of the dates it covers, finds the rows
+by binary search and reads just the Parquet row groups holding them.
+"""
+import datetime
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .log_parser import base_status_of
+from .log_schema import STATUS_DTYPE, STATUS_LABELS, concat_frames
+from .log_triggers import (
+    CYCLE_CUT_TEXT, CYCLE_START_TEXT, CYCLE_STOP_TEXT, MARKING_COMPLETED_PATTERN, SET_FILE_NAME_TEXT, STATUS_KEYWORDS,
+)
+
+# ========== CONFIG ==========
+INDEX_DIR = "_index"
+INDEX_VERSION = 1
+STATUS_COLUMNS = ["Productive", "Idle", "Standby", "Downtime", "Off"]
+
+# Event kind -> pattern of the status trigger keywords (case-insensitive) and the product line
+TRIGGER_EVENTS = {
+    kind: "(?i)" + "|".join(re.escape(keyword) for keyword in keywords) for kind, keywords in STATUS_KEYWORDS.items()
+}
+TRIGGER_EVENTS["set_file_name"] = re.escape(SET_FILE_NAME_TEXT)
+# Event kind -> pattern of the lines the cycle table counts cycles by (case-sensitive)
+CYCLE_EVENTS = {
+    "cycle_start": re.escape(CYCLE_START_TEXT),
+    "cycle_cut": re.escape(CYCLE_CUT_TEXT),
+    "cycle_stop": re.escape(CYCLE_STOP_TEXT),
+    "marking_completed": MARKING_COMPLETED_PATTERN,
+}
+EVENT_KINDS = list(TRIGGER_EVENTS) + list(CYCLE_EVENTS)
+
+DATE_ONLY = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Base status code (index into STATUS_COLUMNS) of every STATUS_LABELS code
+BASE_STATUS_CODES = np.array([STATUS_COLUMNS.index(base_status_of(label)) for label in STATUS_LABELS], dtype=np.int8)
+
+def index_path(store_path, date):
+    return Path(store_path) / INDEX_DIR / f"Date={date}.npz"
+
+def to_seconds(value):
+    """A time ("YYYY-MM-DD HH:MM:SS" string, datetime, Timestamp or datetime64) as int64 seconds since 1970."""
+    return int(np.datetime64(pd.Timestamp(value).to_datetime64(), "s").astype(np.int64))
+
+def end_bound(end):
+    """
+    An inclusive end time; a bare date ("YYYY-MM-DD" or a datetime.date)
+    covers that whole day, like the Date range of `tables --to`.
+    """
+    is_date = isinstance(end, datetime.date) and not isinstance(end, datetime.datetime)
+    if is_date or (isinstance(end, str) and DATE_ONLY.fullmatch(end.strip())):
+        return pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    return end
+
+def run_starts(codes):
+    """Rows where a run of equal codes starts."""
+    if not len(codes):
+        return np.zeros(0, dtype=np.int32)
+    return np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1]))).astype(np.int32)
+
+# ========== Building ==========
+def message_events(messages):
+    """{event kind: rows} of a Log Message column; every distinct message is matched only once."""
+    messages = messages if isinstance(messages.dtype, pd.CategoricalDtype) else messages.astype("category")
+    categories = pd.Series(messages.cat.categories.astype(str))
+    codes = messages.cat.codes.to_numpy()
+
+    events = {}
+    for kind, pattern in {**TRIGGER_EVENTS, **CYCLE_EVENTS}.items():
+        # Code -1 (missing message) picks the trailing False
+        events[kind] = np.append(categories.str.contains(pattern).to_numpy(dtype=bool), False)[codes]
+    return {kind: np.flatnonzero(flags).astype(np.int32) for kind, flags in events.items()}
+
+def build_day_index(day_df, part_rows):
+    """
+    The index arrays of one Date partition: `day_df` holds its rows in
+    store order (its part files in path order, `part_rows` rows each).
+    """
+    times = day_df["Event_Time"].to_numpy().astype("datetime64[s]").astype(np.int64)
+    product_ids = day_df["Product_ID"].astype("category")
+    product_codes = product_ids.cat.codes.to_numpy()
+    status_codes = BASE_STATUS_CODES[day_df["Status"].astype(STATUS_DTYPE).cat.codes.to_numpy()]
+
+    arrays = {
+        "version": np.array(INDEX_VERSION),
+        "part_rows": np.asarray(part_rows, dtype=np.int64),
+        "times": times,
+        "order": np.argsort(times, kind="stable").astype(np.int32),
+        "product_ids": np.asarray(product_ids.cat.categories.astype(str), dtype=str),
+        "product_run_starts": run_starts(product_codes),
+        "status_run_starts": run_starts(status_codes),
+        "has_messages": np.array("Log Message" in day_df.columns),
+    }
+    arrays["product_run_codes"] = product_codes[arrays["product_run_starts"]].astype(np.int32)
+    arrays["status_run_codes"] = status_codes[arrays["status_run_starts"]]
+    if "Log Message" in day_df.columns:
+        for kind, rows in message_events(day_df["Log Message"]).items():
+            arrays[f"event_{kind}"] = rows
+    return arrays
+
+def write_day_index(store_path, date, day_df, part_rows):
+    """Index one Date partition ("YYYY-MM-DD"); see build_day_index()."""
+    path = index_path(store_path, date)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **build_day_index(day_df, part_rows))
+
+def index_store(store_path):
+    """(Re)index every Date partition of an existing store, e.g. one written before the index existed."""
+    import pyarrow.parquet as pq
+
+    from .log_store import read_log_store
+
+    dates = []
+    for partition in sorted(Path(store_path).glob("Date=*")):
+        date = partition.name[len("Date="):]
+        part_rows = [pq.read_metadata(part).num_rows for part in sorted(partition.glob("*.parquet"))]
+        write_day_index(store_path, date, read_log_store(store_path, date_from=date, date_to=date), part_rows)
+        dates.append(date)
+    return dates
+
+# ========== Queries ==========
+class EventIndex:
+    """
+    Drill-down queries on an indexed store. Times are anything pd.Timestamp
+    accepts; start / end bound the Event_Time inclusively (None = open-ended),
+    and an end given as a bare date includes that whole day.
+    Only the index files of the dates in range are loaded (and kept), and
+    only the row groups holding the requested rows are read from the store.
+    """
+
+    def __init__(self, store_path):
+        self.store_path = Path(store_path)
+        self.dates = sorted(path.stem[len("Date="):] for path in (self.store_path / INDEX_DIR).glob("Date=*.npz"))
+        if not self.dates:
+            raise FileNotFoundError(f"No event index in {self.store_path}; rebuild the store or run event_index.index_store()")
+        self.days = {}  # date -> index arrays
+
+    def day(self, date):
+        if date not in self.days:
+            with np.load(index_path(self.store_path, date), allow_pickle=False) as arrays:
+                day = {name: arrays[name] for name in arrays.files}
+            if int(day["version"]) != INDEX_VERSION:
+                raise ValueError(f"Event index of {date} is from another version; run event_index.index_store()")
+            day["sorted_times"] = day["times"][day["order"]]
+            day["rows"] = len(day["times"])
+            self.days[date] = day
+        return self.days[date]
+
+    def date_positions(self, start=None, end=None):
+        """Positions (in self.dates) of the dates within [start, end]."""
+        first = 0 if start is None else np.searchsorted(self.dates, str(pd.Timestamp(start).date()), "left")
+        last = len(self.dates) if end is None else np.searchsorted(self.dates, str(pd.Timestamp(end).date()), "right")
+        return range(first, last)
+
+    def event_rows(self, day, kinds):
+        """Sorted rows of the day holding any of the event kinds."""
+        if not bool(day["has_messages"]):
+            raise ValueError("The store was written without the Log Message column, so it has no events")
+        key = "events " + " ".join(sorted(kinds))
+        if key not in day:
+            day[key] = np.unique(np.concatenate([day[f"event_{kind}"] for kind in kinds]))
+        return day[key]
+
+    def product_at(self, day, rows):
+        """Product_ID of each row (None where it is missing)."""
+        codes = day["product_run_codes"][np.searchsorted(day["product_run_starts"], rows, "right") - 1]
+        return [str(day["product_ids"][code]) if code >= 0 else None for code in codes]
+
+    def product_ranges(self, day, product):
+        """(starts, ends) of the runs of rows with this Product_ID."""
+        starts = day["product_run_starts"]
+        ends = np.append(starts[1:], day["rows"])
+        matches = np.flatnonzero(day["product_ids"] == str(product))
+        keep = np.isin(day["product_run_codes"], matches)
+        return starts[keep], ends[keep]
+
+    def time_filter(self, day, rows, start=None, end=None, product=None):
+        """The rows (sorted) whose Event_Time is within [start, end] and whose Product_ID is `product` (None = any)."""
+        times = day["times"][rows]
+        keep = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            keep &= times >= to_seconds(start)
+        if end is not None:
+            keep &= times <= to_seconds(end)
+        rows = rows[keep]
+        if product is not None:
+            starts, ends = self.product_ranges(day, product)
+            run = np.searchsorted(starts, rows, "right") - 1
+            rows = rows[(run >= 0) & (rows < ends[np.maximum(run, 0)])]
+        return rows
+
+    def read_rows(self, date, rows, columns=None):
+        """The store rows at the given (sorted) row positions of a date, reading only the row groups that hold them."""
+        import pyarrow.parquet as pq
+
+        day = self.day(date)
+        parts = sorted((self.store_path / f"Date={date}").glob("*.parquet"))
+        part_starts = np.concatenate(([0], np.cumsum(day["part_rows"])))
+        frames = []
+        for part, part_start, part_end in zip(parts, part_starts[:-1], part_starts[1:]):
+            part_rows = rows[(rows >= part_start) & (rows < part_end)] - part_start
+            if not len(part_rows):
+                continue
+            parquet_file = pq.ParquetFile(part)
+            group_starts = np.cumsum([0] + [parquet_file.metadata.row_group(group).num_rows for group in range(parquet_file.num_row_groups)])
+            groups = np.unique(np.searchsorted(group_starts, part_rows, "right") - 1)
+            table = parquet_file.read_row_groups(groups.tolist(), columns=columns).to_pandas()
+            # Row positions within the row groups that were read
+            offsets = np.concatenate(([0], np.cumsum(np.diff(group_starts)[groups])))
+            group_of = np.searchsorted(group_starts, part_rows, "right") - 1
+            frames.append(table.iloc[offsets[np.searchsorted(groups, group_of)] + part_rows - group_starts[group_of]])
+
+        if not frames:
+            # No rows: an empty frame with the stored columns
+            frames = [pq.read_schema(parts[0]).empty_table().to_pandas()[columns or slice(None)]]
+        df = concat_frames(frames)
+        if "Event_Time" in df.columns:
+            df["Event_Time"] = df["Event_Time"].astype("datetime64[s]")
+        if "Status" in df.columns:
+            df["Status"] = df["Status"].astype(STATUS_DTYPE)
+        return df.reset_index(drop=True)
+
+    def concat(self, frames, columns=None):
+        if not frames:
+            frames = [self.read_rows(self.dates[0], np.zeros(0, dtype=np.int64), columns)]
+        return concat_frames(frames).reset_index(drop=True)
+
+    def rows_between(self, start=None, end=None, product=None, columns=None):
+        """The log rows with Event_Time in [start, end] (and this Product_ID), in store order."""
+        end = end_bound(end)
+        frames = []
+        for position in self.date_positions(start, end):
+            day = self.day(self.dates[position])
+            first = 0 if start is None else np.searchsorted(day["sorted_times"], to_seconds(start), "left")
+            last = day["rows"] if end is None else np.searchsorted(day["sorted_times"], to_seconds(end), "right")
+            rows = self.time_filter(day, np.sort(day["order"][first:last]), product=product)
+            if len(rows):
+                frames.append(self.read_rows(self.dates[position], rows, columns))
+        return self.concat(frames, columns)
+
+    def events(self, kind, start=None, end=None, product=None, columns=None):
+        """
+        The log rows of an event kind (EVENT_KINDS, e.g. "err", "alarm",
+        "cycle_start"; or a list of kinds) with Event_Time in [start, end],
+        optionally only those of one Product_ID.
+        """
+        kinds = [kind] if isinstance(kind, str) else list(kind)
+        unknown = set(kinds) - set(EVENT_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown event kinds {sorted(unknown)}, expected some of {EVENT_KINDS}")
+        end = end_bound(end)
+        frames = []
+        for position in self.date_positions(start, end):
+            day = self.day(self.dates[position])
+            rows = self.time_filter(day, self.event_rows(day, kinds), start, end, product)
+            if len(rows):
+                frames.append(self.read_rows(self.dates[position], rows, columns))
+        return self.concat(frames, columns)
+
+    def status_periods(self, status, start=None, end=None, product=None):
+        """
+        The periods spent in a base status (e.g. "Downtime"), optionally only
+        while a Product_ID was loaded, overlapping [start, end]: one row per
+        period with its Start / End (the next line's Event_Time, like the daily
+        status table), Seconds, Product_ID and number of log lines. A period is
+        split where the product changes.
+        """
+        status_code = STATUS_COLUMNS.index(status)
+        end = end_bound(end)
+        # One date earlier too, for a period running into the first date
+        positions = self.date_positions(start, end)
+        periods = []
+        for position in range(max(positions.start - 1, 0), positions.stop):
+            date = self.dates[position]
+            day = self.day(date)
+            # Segments of rows with the same base status and product
+            segment_starts = np.union1d(day["status_run_starts"], day["product_run_starts"])
+            segment_ends = np.append(segment_starts[1:], day["rows"])
+            statuses = day["status_run_codes"][np.searchsorted(day["status_run_starts"], segment_starts, "right") - 1]
+            products = self.product_at(day, segment_starts)
+            # End time of a segment: the next row's time, across the day boundary too
+            next_times = np.append(day["times"], self.next_day_time(position, day))
+            for first, after, segment_status, segment_product in zip(segment_starts, segment_ends, statuses, products):
+                if segment_status != status_code or (product is not None and segment_product != str(product)):
+                    continue
+                period = {"Start": day["times"][first], "End": next_times[after], "Product_ID": segment_product,
+                          "Lines": int(after - first), "date": date, "after": after}
+                last = periods[-1] if periods else None
+                # Merge with the previous period if it ran up to this one (same product)
+                continues = last is not None and last["Product_ID"] == segment_product and (
+                    (last["date"] == date and last["after"] == first)
+                    or (last["date"] == self.dates[position - 1] and last["after"] == self.day(last["date"])["rows"] and first == 0))
+                if continues:
+                    last.update(End=period["End"], Lines=last["Lines"] + period["Lines"], date=date, after=after)
+                else:
+                    periods.append(period)
+
+        table = pd.DataFrame(periods, columns=["Start", "End", "Product_ID", "Lines"])
+        table["Start"] = to_datetime64(table["Start"])
+        table["End"] = to_datetime64(table["End"])
+        if start is not None:
+            table = table[table["End"] >= np.datetime64(to_seconds(start), "s")]
+        if end is not None:
+            table = table[table["Start"] <= np.datetime64(to_seconds(end), "s")]
+        table.insert(2, "Seconds", (table["End"] - table["Start"]).dt.total_seconds())
+        table.insert(3, "Status", status)
+        return table.reset_index(drop=True)
+
+    def next_day_time(self, position, day):
+        """Event_Time of the first row after the day (its last row's time if it is the last day)."""
+        if position + 1 < len(self.dates):
+            return self.day(self.dates[position + 1])["times"][0]
+        return day["times"][-1]
+
+    # ----- Cycles -----
+    def find_event(self, kinds, position, row, forward):
+        """
+        (date position, row) of the nearest row holding one of the event kinds:
+        the first at or after `row` if forward, else the last before it,
+        moving on to the next / previous dates as needed. None if there is none.
+        """
+        while 0 <= position < len(self.dates):
+            rows = self.event_rows(self.day(self.dates[position]), kinds)
+            if forward:
+                rows = rows[rows >= row]
+                if len(rows):
+                    return position, int(rows[0])
+                position, row = position + 1, 0
+            else:
+                rows = rows[rows < row]
+                if len(rows):
+                    return position, int(rows[-1])
+                position -= 1
+                row = self.day(self.dates[position])["rows"] if position >= 0 else 0
+        return None
+
+    def count_events(self, kind, after, before):
+        """Rows of an event kind strictly between two (date position, row) places."""
+        count = 0
+        for position in range(after[0], before[0] + 1):
+            rows = self.event_rows(self.day(self.dates[position]), [kind])
+            low = after[1] if position == after[0] else -1
+            high = before[1] if position == before[0] else np.iinfo(np.int64).max
+            count += int(((rows > low) & (rows < high)).sum())
+        return count
+
+    def cycle_at(self, time):
+        """
+        The finished cycle (as in the Number_of_Products_Table) whose start
+        and end lines enclose `time`, as a dict with its Date, Product_ID,
+        Cycle_Start_Time, Cycle_End_Time, Cycle_Duration (seconds) and
+        Number_of_Units; None if no finished cycle was running at that time.
+        If one cycle ends on the second the next one starts, the first is returned.
+        """
+        seconds = to_seconds(time)
+        # Every row at the time, in store order (a cycle may end and the next
+        # start on the same second, and a day written out of time order may
+        # have rows of that second in several places), else the last row before it
+        position = int(np.searchsorted(self.dates, str(pd.Timestamp(time).date()), "right")) - 1
+        while position >= 0:
+            day = self.day(self.dates[position])
+            first = np.searchsorted(day["sorted_times"], seconds, "left")
+            last = np.searchsorted(day["sorted_times"], seconds, "right")
+            rows = day["order"][first:last] if last > first else day["order"][first - 1:first]
+            if len(rows):
+                break
+            position -= 1
+        else:
+            return None
+
+        for row in rows:
+            cycle = self.cycle_of_row(position, int(row), seconds)
+            if cycle is not None:
+                return cycle
+        return None
+
+    def cycle_of_row(self, position, row, seconds):
+        """The finished cycle holding a row, if it also encloses the time `seconds`."""
+        closing = ["cycle_cut", "cycle_stop"]
+        # The cycle opens at the first "Start Mark!" after the previous closing line
+        previous_end = self.find_event(closing, position, row, forward=False)
+        after = (0, 0) if previous_end is None else (previous_end[0], previous_end[1] + 1)
+        start = self.find_event(["cycle_start"], *after, forward=True)
+        if start is None or start > (position, row):
+            return None
+        end = self.find_event(closing, position, row, forward=True)
+        if end is None or end <= start:
+            return None
+
+        end_day = self.day(self.dates[end[0]])
+        is_cut = end[1] in end_day["event_cycle_cut"]
+        units = self.count_events("marking_completed", start, end)
+        if not is_cut and end[1] in end_day["event_marking_completed"]:
+            units += 1
+        # Cycles are timed by time of day, like the cycle table
+        start_time = self.day(self.dates[start[0]])["times"][start[1]]
+        end_time = end_day["times"][end[1]]
+        duration = (end_time % 86400) - (start_time % 86400)
+        # The row before the time may be the closing line itself, with the time after it
+        if not (is_cut or units > 0) or duration <= 0 or not start_time <= seconds <= end_time:
+            return None
+
+        start_time, end_time = np.datetime64(int(start_time), "s"), np.datetime64(int(end_time), "s")
+        return {
+            "Date": pd.Timestamp(start_time).date(),
+            "Product_ID": self.product_at(self.day(self.dates[start[0]]), [start[1]])[0],
+            "Cycle_Start_Time": pd.Timestamp(start_time),
+            "Cycle_End_Time": pd.Timestamp(end_time),
+            "Cycle_Duration": float(duration),
+            "Number_of_Units": units,
+        }
+
+def to_datetime64(seconds):
+    return np.asarray(seconds, dtype=np.int64).astype("datetime64[s]")
@@ -0,0 +1,175 @@
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+
+from . import instrument
+from .log_parser import iter_log_chunks
+from .log_schema import build_log_frame, concat_frames
+from .log_store import check_columns, date_filters, read_partitions, write_log_store
+from .pipeline import write_tables
+from .tables import extract_number_of_products_table, generate_daily_status_table
+
+# ========== CONFIG ==========
+# Where PcbVision keeps the logs inside a machine folder, if they aren't directly in it
+MACHINE_LOG_SUBDIR = Path("PcbVision") / "PCB" / "Log" / "Machine"
+STATUS_COLUMNS = ["Productive", "Idle", "Standby", "Downtime", "Off"]
+
+# ========== Machine Folders ==========
+def find_machine_folders(fleet_dir):
+    """
+    Map machine id -> log folder for every machine folder of `fleet_dir`.
+    The machine id is the folder name; its logs are either directly in it or
+    in its PcbVision\\PCB\\Log\\Machine subfolder. Folders without logs are skipped.
+    """
+    machines = {}
+    for machine_dir in sorted(Path(fleet_dir).iterdir()):
+        if not machine_dir.is_dir():
+            continue
+        for log_folder in (machine_dir, machine_dir / MACHINE_LOG_SUBDIR):
+            if any(log_folder.glob("*.log")):
+                machines[machine_dir.name] = log_folder
+                break
+    return machines
+
+# ========== Parsing (one worker per machine) ==========
+def parse_machine(log_folder, keep_messages=True):
+    """Parse one machine's folder serially; state only carries over between its own files."""
+    return build_log_frame(iter_log_chunks(log_folder, workers=1), keep_messages)
+
+def store_machine(log_folder, store_path, keep_messages=True):
+    """Parse one machine's folder serially into its own Date-partitioned store; returns rows stored."""
+    return write_log_store(iter_log_chunks(log_folder, workers=1), store_path, keep_messages)
+
+def machine_store_path(store_path, machine_id):
+    """Partition folder of one machine in the fleet store."""
+    return Path(store_path) / f"Machine={quote(machine_id)}"
+
+def parse_fleet(fleet_dir, workers=None, keep_messages=True):
+    """
+    Parse every machine folder of `fleet_dir` in its own worker process
+    (None = one per CPU core) and return the combined compact frame, with a
+    categorical Machine column first, sorted by Machine then Event_Time.
+    """
+    machines = find_machine_folders(fleet_dir)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(parse_machine, machines.values(), [keep_messages] * len(machines)))
+
+    for machine_id, frame in zip(machines, frames):
+        frame.insert(0, "Machine", machine_id)
+    df = concat_frames(frames)
+    df["Machine"] = pd.Categorical(df["Machine"], categories=list(machines))
+    return df
+
+def build_fleet_store(fleet_dir, store_path, workers=None, keep_messages=True):
+    """
+    (Re)write the fleet store: one Machine=<id>/Date=YYYY-MM-DD partition
+    tree per machine, each written by its own worker process (None = one
+    per CPU core). Returns {machine id: rows stored}.
+    """
+    store_path = Path(store_path)
+    if store_path.exists():
+        shutil.rmtree(store_path)
+    store_path.mkdir(parents=True)
+
+    machines = find_machine_folders(fleet_dir)
+    # Machines are parsed in worker processes, so the run report only sees the whole stage
+    with instrument.stage("fleet parse + store"), ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            machine_id: executor.submit(store_machine, log_folder, machine_store_path(store_path, machine_id), keep_messages)
+            for machine_id, log_folder in machines.items()
+        }
+        return {machine_id: future.result() for machine_id, future in futures.items()}
+
+# ========== Reading ==========
+def read_fleet_store(store_path, columns=None, machines=None, date_from=None, date_to=None):
+    """
+    Read compact rows back from the fleet store with a categorical Machine
+    column, sorted by Machine then Event_Time. Only the requested columns
+    (None = all stored columns), the given machine ids (None = all) and the
+    Date partitions within [date_from, date_to] are read.
+    """
+    filters = date_filters(date_from, date_to)
+    if machines is not None:
+        filters.append(("Machine", "in", list(machines)))
+
+    df = read_partitions(store_path, ["Machine", "Date"], None if columns is None else ["Machine", *columns], filters)
+    if columns is None:
+        df = df.drop(columns="Date")
+    df["Machine"] = df["Machine"].astype("category")
+    return df[["Machine", *df.columns.drop("Machine")]]
+
+# ========== Per-Machine and Fleet-Wide Tables ==========
+def per_machine_table(build_table, df):
+    """Build a table separately for each machine of a fleet frame and stack them with a Machine column first."""
+    tables = []
+    for machine_id, machine_df in df.groupby("Machine", observed=True, sort=True):
+        table = build_table(machine_df.drop(columns="Machine").reset_index(drop=True))
+        table.insert(0, "Machine", machine_id)
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=["Machine"])
+
+def machine_daily_status_table(df):
+    """Hours per machine and day in each base status (see generate_daily_status_table)."""
+    return per_machine_table(generate_daily_status_table, df)
+
+def machine_cycles_table(df):
+    """Cycles of every machine (see extract_number_of_products_table); ideal times are per machine and product."""
+    return per_machine_table(extract_number_of_products_table, df)
+
+def fleet_daily_status_table(df):
+    """Hours per day in each base status summed over the fleet, with the number of machines that logged that day."""
+    daily = machine_daily_status_table(df)
+    if daily.empty:
+        return pd.DataFrame(columns=["Date", *STATUS_COLUMNS, "Machines"])
+    fleet = daily.groupby("Date", sort=True).agg(
+        **{status: (status, "sum") for status in STATUS_COLUMNS},
+        Machines=("Machine", "nunique"),
+    )
+    return fleet.round(4).reset_index()
+
+def fleet_cycles_table(df):
+    """
+    Cycles per day and product over the whole fleet: number of cycles, units,
+    actual and ideal cycle time (seconds, summed) and how many machines ran it.
+    """
+    cycles = machine_cycles_table(df)
+    if cycles.empty:
+        return pd.DataFrame(columns=["Date", "Product_ID", "Cycles", "Number_of_Units", "Cycle_Duration", "Ideal_Cycle_Time", "Machines"])
+    return cycles.groupby(["Date", "Product_ID"], sort=True).agg(
+        Cycles=("Cycle_Duration", "size"),
+        Number_of_Units=("Number_of_Units", "sum"),
+        Cycle_Duration=("Cycle_Duration", "sum"),
+        Ideal_Cycle_Time=("Ideal_Cycle_Time", "sum"),
+        Machines=("Machine", "nunique"),
+    ).reset_index()
+
+# ========== Fleet Table Registry ==========
+# Table name -> (output file stem, builder, store columns the builder reads)
+FLEET_TABLES = {
+    "machine_daily_status": ("Machine_Daily_Status_Table", machine_daily_status_table, ["Event_Time", "Status"]),
+    "machine_cycles": ("Machine_Number_of_Products_Table", machine_cycles_table, ["Event_Time", "Log Message", "Product_ID"]),
+    "fleet_daily_status": ("Fleet_Daily_Status_Table", fleet_daily_status_table, ["Event_Time", "Status"]),
+    "fleet_cycles": ("Fleet_Number_of_Products_Table", fleet_cycles_table, ["Event_Time", "Log Message", "Product_ID"]),
+}
+
+def export_fleet_tables(store_path, output_dir, names=None, machines=None, date_from=None, date_to=None, output_format="xlsx"):
+    """
+    Build the requested fleet tables (names from FLEET_TABLES, None = all)
+    from the fleet store and write them to output_dir, all at once. Only the
+    columns, machines and Date partitions needed are read. Returns the
+    written paths. Raises log_store.MissingColumnsError if the store lacks a
+    column one of the tables reads (Log Message, after --drop-messages).
+    """
+    names = names or list(FLEET_TABLES)
+    check_columns(store_path, {name: FLEET_TABLES[name][2] for name in names})
+    tables = {}
+    for name in names:
+        file_stem, build_table, columns = FLEET_TABLES[name]
+        df = read_fleet_store(store_path, columns, machines, date_from, date_to)
+        with instrument.stage(f"table {name}", rows=len(df)):
+            tables[file_stem] = build_table(df)
+        del df
+    return write_tables(tables, output_dir, output_format)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from .ideal_times import IdealTimes
+from .live import DAY_SECONDS, STATUS_COLUMNS, CycleTracker, StatusClock, event_seconds, file_day_ordinal
+from .log_parser import PRODUCT_ID, STATUS, StatusMachine, base_status_of, find_log_files, iter_log_files, iter_log_lines, iter_row_chunks
+from .prefetch import READ_AHEAD_FILES
+from .tables import TABLES, cycle_table, product_of_line, product_table, with_ideal_times
+
+# Event seconds (see live.event_seconds) of 1970-01-01, to turn them into datetime64
+UNIX_EPOCH_SECONDS = 719_163 * DAY_SECONDS
+
+def to_datetime64(event_times):
+    return (np.asarray(event_times, dtype=np.int64) - UNIX_EPOCH_SECONDS).astype("datetime64[s]")
+
+# ========== Fused Extraction ==========
+class FusedTables:
+    """
+    The product, cycle and daily status tables built as side outputs of the
+    parse itself: every line goes through the StatusMachine once, and the
+    same pass records new SetFileName products, closes cycles (CycleTracker)
+    and adds each status interval to its days (StatusClock), so the tables
+    need no further scan of the parsed rows.
+
+    The batch tables work on the rows sorted by Event_Time, while this pass
+    sees them in log order; the tables are identical as long as the log
+    times never go backwards (`backward_lines` counts the lines that do).
+    """
+
+    def __init__(self, ideal_times=None):
+        self.machine = StatusMachine()
+        self.clock = StatusClock([])
+        self.ideal_times = IdealTimes() if ideal_times is None else ideal_times
+        self.cycles = CycleTracker(self.clock, self.ideal_times, keep_cycles=True)
+        self.product_lines = {}  # (Product Name, Product_ID) -> first original line
+        self.day_ordinal = None
+        self.backward_lines = 0
+
+    def start_file(self, date_str):
+        self.machine.start_file(date_str)
+        self.day_ordinal = file_day_ordinal(date_str)
+
+    def feed(self, seconds, message):
+        """Process one log line (seconds since midnight, message); returns the finished row like StatusMachine.feed()."""
+        finished = self.machine.feed(seconds, message)
+        # Rows of files whose name isn't a date are dropped from the tables, like the batch frame does
+        if self.day_ordinal is None:
+            return finished
+
+        row = self.machine.pending
+        message = row[2]
+        if "SetFileName" in message:
+            product_key = product_of_line(message)
+            if product_key not in self.product_lines:
+                self.product_lines[product_key] = message.strip()
+
+        event_time = event_seconds(self.day_ordinal, seconds)
+        if self.clock.last_time is not None and event_time < self.clock.last_time:
+            self.backward_lines += 1
+        self.clock.add(event_time, base_status_of(row[STATUS]))
+        self.cycles.add(event_time, message, row[PRODUCT_ID])
+        return finished
+
+    def flush(self):
+        return self.machine.flush()
+
+    # ----- Tables -----
+    def products_table(self):
+        return product_table(self.product_lines)
+
+    def cycles_table(self):
+        finished = self.cycles.finished
+        start_time, end_time, product_ids, duration, units = zip(*finished) if finished else ([], [], [], [], [])
+        result_df = cycle_table(to_datetime64(start_time), to_datetime64(end_time), np.asarray(product_ids, dtype=object),
+                                np.asarray(duration, dtype=float), np.asarray(units, dtype=np.int64))
+        # Every finished cycle was already added to ideal_times as it closed
+        return with_ideal_times(result_df, self.ideal_times)
+
+    def daily_status_table(self):
+        days = sorted(self.clock.days)
+        hours = pd.DataFrame([self.clock.days[day] for day in days], columns=STATUS_COLUMNS, dtype=float) / 3600
+        hours = hours.round(4).rename_axis(columns="Status")
+        hours.insert(0, "Date", pd.DatetimeIndex(to_datetime64([day * DAY_SECONDS for day in days])).date)
+        return hours
+
+    def tables(self, names=None):
+        """{table name: table} for the names of tables.TABLES (None = all)."""
+        builders = {"products": self.products_table, "cycles": self.cycles_table, "daily_status": self.daily_status_table}
+        return {name: builders[name]() for name in names or TABLES}
+
+def iter_fused_rows(log_files, fused, read_ahead=READ_AHEAD_FILES):
+    """Serially stream the rows of the given files (like log_parser.iter_log_rows), feeding `fused` on the way."""
+    for log_file, data in iter_log_files(log_files, read_ahead):
+        fused.start_file(log_file.stem)
+        for seconds, message in iter_log_lines(log_file, data):
+            row = fused.feed(seconds, message)
+            if row is not None:
+                yield row
+
+    row = fused.flush()
+    if row is not None:
+        yield row
+
+def iter_fused_chunks(paths, fused, chunk_rows=None):
+    """Columnar chunks of the parsed rows (like iter_log_chunks(workers=1)); `fused` fills its tables meanwhile."""
+    rows = iter_fused_rows(find_log_files(paths), fused)
+    return iter_row_chunks(rows) if chunk_rows is None else iter_row_chunks(rows, chunk_rows)
+
+def fused_tables(paths, names=None, ideal_times=None):
+    """
+    Build the tables (names from tables.TABLES, None = all) in a single pass
+    over the raw .log files of `paths`, without building the parsed frame.
+    Returns {table name: table}.
+    """
+    fused = FusedTables(ideal_times)
+    for _ in iter_fused_rows(find_log_files(paths), fused):
+        pass
+    return fused.tables(names)
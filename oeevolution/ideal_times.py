@@ -0,0 +1,146 @@
+import math
+
+# ========== CONFIG ==========
+RELATIVE_ACCURACY = 0.01  # quantiles are estimated within 1% of the true unit duration
+IDEAL_QUANTILE = 0.25     # the ideal unit time is the fastest unit at or below this quantile
+
+# ========== Per-Product Sketch ==========
+class UnitTimeSketch:
+    """
+    Mergeable summary of one product's positive unit durations: the exact
+    running minimum plus a log-bucketed quantile sketch (each bucket covers
+    values within RELATIVE_ACCURACY of each other, so memory grows with the
+    spread of durations, not with the number of cycles).
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.count = 0
+        self.minimum = math.inf
+        self.buckets = {}  # bucket index -> number of durations
+
+    def bucket_of(self, value):
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value, count=1):
+        """Add a unit duration (seconds); durations <= 0 are ignored, like the batch table did."""
+        if not value > 0:
+            return
+        self.add_bucket(self.bucket_of(value), count, value)
+
+    def add_bucket(self, bucket, count, minimum):
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += count
+        self.minimum = min(self.minimum, minimum)
+
+    def merge(self, other):
+        """Fold another sketch (e.g. another day or machine) into this one."""
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+
+    def quantile(self, q):
+        """Estimated q-quantile of the durations, None if there are none."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                # Middle of the bucket, clamped so the estimate never falls below the exact minimum
+                return max(2 * math.exp(bucket * self.log_gamma) / (1 + math.exp(self.log_gamma)), self.minimum)
+        return None
+
+    def ideal(self):
+        """
+        Fastest duration at or below the IDEAL_QUANTILE quantile. The quantile
+        is never below the minimum, so this is the exact running minimum.
+        """
+        return self.minimum if self.count else None
+
+    def to_dict(self):
+        return {"count": self.count, "minimum": self.minimum, "buckets": {str(bucket): count for bucket, count in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data, relative_accuracy=RELATIVE_ACCURACY):
+        sketch = cls(relative_accuracy)
+        sketch.count = data["count"]
+        sketch.minimum = data["minimum"]
+        sketch.buckets = {int(bucket): count for bucket, count in data["buckets"].items()}
+        return sketch
+
+# ========== Ideal Times of All Products ==========
+class IdealTimes:
+    """
+    Per-product UnitTimeSketch, updated as cycles arrive (one at a time from
+    live mode, or a whole cycle table at once) and mergeable across days or
+    machines, so ideal unit times stay current without the full cycle history.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.sketches = {}  # Product_ID -> UnitTimeSketch
+
+    def sketch(self, product_id):
+        if product_id not in self.sketches:
+            self.sketches[product_id] = UnitTimeSketch(self.relative_accuracy)
+        return self.sketches[product_id]
+
+    def add(self, product_id, unit_duration):
+        """Add one cycle's unit duration (seconds per unit)."""
+        if unit_duration > 0:
+            self.sketch(product_id).add(unit_duration)
+
+    def add_cycles(self, product_ids, unit_durations):
+        """Add the unit durations of many cycles at once (array-likes, e.g. cycle table columns)."""
+        import numpy as np
+
+        product_ids = np.asarray(product_ids)
+        unit_durations = np.asarray(unit_durations, dtype=float)
+        positive = unit_durations > 0  # also drops NaN (cycles without units)
+        if not positive.any():
+            return
+        products, product_index = np.unique(product_ids[positive], return_inverse=True)
+        products = products.tolist()
+        values = unit_durations[positive]
+        buckets = np.ceil(np.log(values) / UnitTimeSketch(self.relative_accuracy).log_gamma).astype(np.int64)
+
+        # One update per (product, bucket) pair instead of per cycle
+        lowest = buckets.min()
+        span = int(buckets.max() - lowest) + 1
+        pairs, pair_index, counts = np.unique(product_index * span + (buckets - lowest), return_inverse=True, return_counts=True)
+        minimums = np.full(len(pairs), np.inf)
+        np.minimum.at(minimums, pair_index, values)
+        for pair, count, minimum in zip(pairs.tolist(), counts.tolist(), minimums.tolist()):
+            product, bucket = divmod(pair, span)
+            self.sketch(products[product]).add_bucket(bucket + int(lowest), count, minimum)
+
+    def merge(self, other):
+        for product_id, sketch in other.sketches.items():
+            self.sketch(product_id).merge(sketch)
+
+    def ideal_unit_time(self, product_id):
+        """Ideal unit time of a product (seconds), None if it has no cycle with units yet."""
+        sketch = self.sketches.get(product_id)
+        return sketch.ideal() if sketch is not None else None
+
+    def ideal_unit_times(self):
+        """{Product_ID: ideal unit time} of every product with at least one unit."""
+        return {product_id: sketch.ideal() for product_id, sketch in self.sketches.items() if sketch.count}
+
+    def quantile(self, product_id, q):
+        sketch = self.sketches.get(product_id)
+        return sketch.quantile(q) if sketch is not None else None
+
+    def to_dict(self):
+        """JSON-serialisable form, to keep the sketches between runs."""
+        return {"relative_accuracy": self.relative_accuracy, "products": {pid: sketch.to_dict() for pid, sketch in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        ideal_times = cls(data["relative_accuracy"])
+        ideal_times.sketches = {pid: UnitTimeSketch.from_dict(sketch, ideal_times.relative_accuracy) for pid, sketch in data["products"].items()}
+        return ideal_times
@@ -0,0 +1,180 @@
+"""
+Per-stage instrumentation of a pipeline run.
+
+    from oeevolution import instrument
+    with instrument.recording("run_report.json", track_memory=True, profile=["parse"]):
+        export_tables(...)
+
+While a run is being recorded, every instrumented stage (parse, compact,
+sort, store write / read, each table and each export) adds its wall time,
+calls, rows and bytes to the RunReport, plus its peak traced memory if
+track_memory is set. Stages named in `profile` (or all stages, for "all")
+run under cProfile; the stats are saved next to the report. Outside
+recording() the hooks do nothing, so normal runs pay for one global lookup.
+"""
+import cProfile
+import io
+import json
+import platform
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# ========== CONFIG ==========
+PROFILE_TOP = 25  # functions listed per profile in the JSON report, by cumulative time
+
+_active = None  # RunReport being recorded, if any
+
+# ========== Run Report ==========
+class RunReport:
+    """Timings, counters and (optionally) peak memory and profiles of the stages of one run."""
+
+    def __init__(self, track_memory=False, profile=()):
+        self.track_memory = track_memory
+        self.profile = set(profile or ())
+        self.stages = {}   # stage name -> {"seconds", "calls", "rows", "bytes", "peak_mb"}
+        self.open = []     # stages currently running, innermost last, with the peak seen so far
+        self.profiler = cProfile.Profile() if self.profile else None
+        self.profiling = 0
+        self.started = datetime.now()
+        self.start = time.perf_counter()
+        self.seconds = None
+
+    def totals(self, name):
+        if name not in self.stages:
+            self.stages[name] = {"seconds": 0.0, "calls": 0, "rows": 0, "bytes": 0, "peak_mb": None}
+        return self.stages[name]
+
+    def count(self, name, rows=0, nbytes=0):
+        """Add rows / bytes to a stage without timing anything."""
+        totals = self.totals(name)
+        totals["rows"] += rows
+        totals["bytes"] += nbytes
+
+    @contextmanager
+    def stage(self, name, rows=0, nbytes=0):
+        """Time the block as (one more call of) stage `name`; counters can also be added with count()."""
+        totals = self.totals(name)
+        profiled = self.profiler is not None and ("all" in self.profile or name in self.profile)
+        if self.track_memory:
+            # Keep the enclosing stages' peak before the peak is reset for this one
+            current_peak = tracemalloc.get_traced_memory()[1]
+            for entry in self.open:
+                entry[1] = max(entry[1], current_peak)
+            tracemalloc.reset_peak()
+        entry = [name, 0]
+        self.open.append(entry)
+        if profiled:
+            self.profiling += 1
+            if self.profiling == 1:
+                self.profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield totals
+        finally:
+            totals["seconds"] += time.perf_counter() - start
+            totals["calls"] += 1
+            totals["rows"] += rows
+            totals["bytes"] += nbytes
+            if profiled:
+                self.profiling -= 1
+                if self.profiling == 0:
+                    self.profiler.disable()
+            self.open.pop()
+            if self.track_memory:
+                peak = max(entry[1], tracemalloc.get_traced_memory()[1])
+                for parent in self.open:
+                    parent[1] = max(parent[1], peak)
+                totals["peak_mb"] = max(totals["peak_mb"] or 0.0, peak / 2**20)
+
+    def profile_stats(self, top=PROFILE_TOP):
+        """The `top` functions of the recorded profile by cumulative time, as dicts."""
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (file_name, line, function), (calls, _, own, cumulative, _) in stats.stats.items():
+            rows.append({"function": f"{file_name}:{line}({function})", "calls": calls, "own_seconds": own, "cumulative_seconds": cumulative})
+        return sorted(rows, key=lambda row: row["cumulative_seconds"], reverse=True)[:top]
+
+    def to_dict(self):
+        stages = {}
+        for name, totals in self.stages.items():
+            stages[name] = dict(totals)
+            seconds = totals["seconds"]
+            stages[name]["rows_per_sec"] = totals["rows"] / seconds if seconds and totals["rows"] else None
+            stages[name]["mb_per_sec"] = totals["bytes"] / 2**20 / seconds if seconds and totals["bytes"] else None
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": self.seconds if self.seconds is not None else time.perf_counter() - self.start,
+            "python": platform.python_version(),
+            "track_memory": self.track_memory,
+            "stages": stages,
+            "profile": self.profile_stats(),
+        }
+
+    def save(self, report_path):
+        """Write the JSON report, plus the raw cProfile stats (<report>.prof, for pstats / snakeviz) when profiling."""
+        report_path = Path(report_path)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        if self.profiler is not None:
+            self.profiler.dump_stats(report_path.with_suffix(".prof"))
+
+# ========== Hooks ==========
+@contextmanager
+def recording(report_path=None, track_memory=False, profile=()):
+    """
+    Record every instrumented stage run inside the block into a RunReport,
+    which is yielded and, if report_path is given, saved as JSON at the end.
+    track_memory traces allocations (slower) to get each stage's peak;
+    profile names the stages to run under cProfile ("all" = every stage).
+    """
+    global _active
+    previous = _active
+    report = _active = RunReport(track_memory, profile)
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        yield report
+    finally:
+        report.seconds = time.perf_counter() - report.start
+        if started_tracing:
+            tracemalloc.stop()
+        _active = previous
+        if report_path is not None:
+            report.save(report_path)
+
+def stage(name, rows=0, nbytes=0):
+    """Context manager timing stage `name` of the recorded run; does nothing when no run is recorded."""
+    return _active.stage(name, rows, nbytes) if _active is not None else nullcontext()
+
+def count(name, rows=0, nbytes=0):
+    """Add rows / bytes to stage `name` of the recorded run, if any."""
+    if _active is not None:
+        _active.count(name, rows, nbytes)
+
+def timed_iter(name, iterable, rows_of=len):
+    """
+    Yield from `iterable`, timing the time spent producing each item as stage
+    `name` and counting rows_of(item) rows. Used for the streaming stages,
+    whose work happens inside a generator the caller pulls from.
+    """
+    if _active is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with stage(name) as totals:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                totals["calls"] -= 1  # the final, empty pull isn't a call
+                return
+            totals["rows"] += rows_of(item)
+        yield item
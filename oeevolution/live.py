@@ -0,0 +1,283 @@
+import re
+import time
+from bisect import bisect_right
+from datetime import date, datetime
+from pathlib import Path
+
+from .ideal_times import IdealTimes
+from .log_incremental import iter_appended_lines
+from .log_parser import PRODUCT_ID, STATUS, StatusMachine, base_status_of, iter_log_messages
+from .log_triggers import CYCLE_CUT_TEXT, CYCLE_START_TEXT, CYCLE_STOP_TEXT, MARKING_COMPLETED_PATTERN
+
+# ========== CONFIG ==========
+# Start time of every shift ("HH:MM"); a shift runs until the next one starts
+SHIFT_STARTS = ["07:00", "19:00"]
+# Files replayed when live mode starts: the active one plus the one before it, so the
+# overnight interval into today is counted. The replay starts from INITIAL_STATUS and
+# no product, so its status and product only match a batch run from the first line
+# that sets them (e.g. Start Mark, Stop PLC, Close Software, SetFileName); before
+# that, usually only early in the older file, they are approximate
+REPLAY_FILES = 2
+STATUS_COLUMNS = ["Productive", "Idle", "Standby", "Downtime", "Off"]
+DAY_SECONDS = 86_400
+
+# Event times are whole seconds counted from 0001-01-01 (date ordinal * 86400 + seconds since midnight)
+def event_seconds(day_ordinal, seconds):
+    return day_ordinal * DAY_SECONDS + seconds
+
+def file_day_ordinal(date_str):
+    """Date ordinal of a log file name ("YYYY.MM.DD"), or None if it isn't a date (batch runs drop those rows)."""
+    try:
+        return datetime.strptime(date_str, "%Y.%m.%d").toordinal()
+    except ValueError:
+        return None
+
+# ========== Running Status Seconds ==========
+class StatusClock:
+    """
+    Seconds spent in each base status, per day and per shift, updated as lines
+    arrive. Like generate_daily_status_table(), each line's status lasts until
+    the next line, and intervals are split at midnight (and shift changes).
+    With no shift_starts only the day totals are kept.
+    """
+
+    def __init__(self, shift_starts=SHIFT_STARTS):
+        self.shift_starts = sorted(int(start[:2]) * 3600 + int(start[3:5]) * 60 for start in shift_starts)
+        self.boundaries = sorted(set(self.shift_starts) | {0})
+        self.days = {}    # day ordinal -> {status: seconds}
+        self.shifts = {}  # (day ordinal the shift starts on, "HH:MM") -> {status: seconds}
+        self.last_time = None
+        self.last_status = None
+
+    def shift_of(self, event_time):
+        """(day ordinal, "HH:MM") of the shift running at event_time; a night shift belongs to the day it started."""
+        day, second = divmod(event_time, DAY_SECONDS)
+        index = bisect_right(self.shift_starts, second) - 1
+        if index < 0:
+            day, index = day - 1, len(self.shift_starts) - 1
+        start = self.shift_starts[index]
+        return day, f"{start // 3600:02d}:{start % 3600 // 60:02d}"
+
+    def bucket(self, buckets, key):
+        if key not in buckets:
+            buckets[key] = dict.fromkeys(STATUS_COLUMNS, 0.0)
+        return buckets[key]
+
+    def add(self, event_time, status):
+        """Close the previous line's interval at event_time and start one for this line's base status."""
+        if self.last_time is not None and event_time > self.last_time:
+            self.add_interval(self.last_time, event_time, self.last_status)
+        self.bucket(self.days, event_time // DAY_SECONDS)
+        if self.shift_starts:
+            self.bucket(self.shifts, self.shift_of(event_time))
+        self.last_time, self.last_status = event_time, status
+
+    def add_interval(self, start, end, status):
+        while start < end:
+            day, second = divmod(start, DAY_SECONDS)
+            index = bisect_right(self.boundaries, second)
+            cut = min(end, day * DAY_SECONDS + (self.boundaries[index] if index < len(self.boundaries) else DAY_SECONDS))
+            self.bucket(self.days, day)[status] += cut - start
+            if self.shift_starts:
+                self.bucket(self.shifts, self.shift_of(start))[status] += cut - start
+            start = cut
+
+# ========== Running Cycle Counts ==========
+class CycleTracker:
+    """
+    Cycles, units and cycle time per day and per shift, updated as lines arrive,
+    with the same rules as extract_number_of_products_table(): a cycle opens at
+    the first "Start Mark!" after a closing line and closes at the next
+    "Successfully Cutting" / "Stop PLC!" line. Every finished cycle's unit
+    duration is added to `ideal_times`; with keep_cycles, the finished cycles
+    are also kept in `finished` as (start, end, product id, duration, units).
+    """
+
+    def __init__(self, clock, ideal_times, keep_cycles=False):
+        self.clock = clock
+        self.ideal_times = ideal_times
+        self.finished = [] if keep_cycles else None
+        self.marked = re.compile(MARKING_COMPLETED_PATTERN)
+        self.days = {}    # day ordinal -> totals
+        self.shifts = {}  # shift key -> totals
+        self.open_cycle = None  # (start event time, product id) of the cycle in progress
+        self.open_units = 0
+
+    def bucket(self, buckets, key):
+        if key not in buckets:
+            buckets[key] = {"Cycles": 0, "Number_of_Units": 0, "Cycle_Duration": 0, "Units_By_Product": {}}
+        return buckets[key]
+
+    def add(self, event_time, message, product_id):
+        is_start = CYCLE_START_TEXT in message
+        is_cut = CYCLE_CUT_TEXT in message
+        is_end = is_cut or CYCLE_STOP_TEXT in message
+        is_marked = self.marked.search(message) is not None
+
+        opened_now = False
+        if is_start and self.open_cycle is None:
+            self.open_cycle, self.open_units, opened_now = (event_time, product_id), 0, True
+        elif self.open_cycle is not None and is_marked and not is_end:
+            self.open_units += 1
+
+        if is_end:
+            if self.open_cycle is not None and not opened_now:
+                self.close_cycle(event_time, self.open_units + (is_marked and not is_cut), is_cut)
+            self.open_cycle = None
+
+    def close_cycle(self, end_time, units, is_cut):
+        start_time, product_id = self.open_cycle
+        # "Stop PLC!" only ends a cycle that marked something; cycles are timed by time of day
+        duration = end_time % DAY_SECONDS - start_time % DAY_SECONDS
+        if not (is_cut or units > 0) or duration <= 0:
+            return
+        if self.finished is not None:
+            self.finished.append((start_time, end_time, product_id, duration, units))
+        buckets = [self.bucket(self.days, start_time // DAY_SECONDS)]
+        if self.clock.shift_starts:
+            buckets.append(self.bucket(self.shifts, self.clock.shift_of(start_time)))
+        for totals in buckets:
+            totals["Cycles"] += 1
+            totals["Number_of_Units"] += units
+            totals["Cycle_Duration"] += duration
+            totals["Units_By_Product"][product_id] = totals["Units_By_Product"].get(product_id, 0) + units
+        if units > 0:
+            self.ideal_times.add(product_id, duration / units)
+
+# ========== Live OEE ==========
+class LiveOEE:
+    """
+    Rolling OEE of one machine, fed one log line at a time through the same
+    StatusMachine as the batch parse. Day and shift figures are kept up to
+    date as lines arrive, so day() / shift() only look up running totals.
+
+    OEE = Availability x Performance x Quality, where
+    - Availability = Productive / (Productive + Idle + Standby + Downtime), Off is unplanned time
+    - Performance = ideal time of the units marked / Productive, with the ideal unit
+      times of `ideal_times` (an ideal_times.IdealTimes, e.g. built from earlier cycle
+      tables), which keeps learning from the cycles seen live; Performance is None
+      when none of the units has an ideal time
+    - Quality isn't in the logs and is taken as 1
+    """
+
+    def __init__(self, ideal_times=None, shift_starts=SHIFT_STARTS):
+        self.machine = StatusMachine()
+        self.clock = StatusClock(shift_starts)
+        self.ideal_times = IdealTimes() if ideal_times is None else ideal_times
+        self.cycles = CycleTracker(self.clock, self.ideal_times)
+        self.day_ordinal = None
+        self.log_file = None
+        self.offset = 0
+
+    # ----- Feeding -----
+    def start_file(self, date_str):
+        self.machine.start_file(date_str)
+        self.day_ordinal = file_day_ordinal(date_str)
+
+    def feed(self, seconds, message):
+        """Process one log line (seconds since midnight, message)."""
+        self.machine.feed(seconds, message)
+        if self.day_ordinal is None:
+            return
+        event_time = event_seconds(self.day_ordinal, seconds)
+        row = self.machine.pending
+        self.clock.add(event_time, base_status_of(row[STATUS]))
+        self.cycles.add(event_time, message, row[PRODUCT_ID])
+
+    def read_new_lines(self, include_partial=False):
+        """Feed the complete lines appended to the current file since the last read; returns how many were read."""
+        lines = 0
+        for raw_line, offset in iter_appended_lines(self.log_file, self.offset, include_partial):
+            for seconds, message in iter_log_messages([raw_line]):
+                self.feed(seconds, message)
+                lines += 1
+            self.offset = offset
+        return lines
+
+    def poll(self, folder_path):
+        """
+        Read whatever was appended to the folder's logs since the last poll.
+        When a newer .log file appears, the current one is finished (including
+        an unterminated last line) and the newer files are started in order.
+        Returns the number of lines read.
+        """
+        log_files = sorted(Path(folder_path).glob("*.log"))
+        if self.log_file is None:
+            new_files = log_files[-REPLAY_FILES:]
+        else:
+            new_files = [log_file for log_file in log_files if log_file.name > self.log_file.name]
+
+        lines = 0
+        if self.log_file is not None:
+            lines += self.read_new_lines(include_partial=bool(new_files))
+        for log_file in new_files:
+            self.log_file, self.offset = log_file, 0
+            self.start_file(log_file.stem)
+            lines += self.read_new_lines(include_partial=log_file != new_files[-1])
+        return lines
+
+    def follow(self, folder_path, poll_interval=1.0):
+        """Tail the folder forever: replay the newest files, then poll every `poll_interval` seconds. Yields after each poll."""
+        while True:
+            yield self.poll(folder_path)
+            time.sleep(poll_interval)
+
+    # ----- Queries -----
+    def summary(self, status_seconds, cycle_totals, now=None):
+        """OEE figures of one day or shift; `now` (event seconds) also counts the running status up to now."""
+        status_seconds = dict(status_seconds or dict.fromkeys(STATUS_COLUMNS, 0.0))
+        if now is not None and self.clock.last_time is not None and now > self.clock.last_time:
+            status_seconds[self.clock.last_status] += now - self.clock.last_time
+
+        cycle_totals = cycle_totals or self.cycles.bucket({}, None)
+        ideal_unit_times = {pid: self.ideal_times.ideal_unit_time(pid) for pid in cycle_totals["Units_By_Product"]}
+        units_with_ideal = {pid: units for pid, units in cycle_totals["Units_By_Product"].items() if ideal_unit_times[pid] is not None}
+        ideal_seconds = sum(ideal_unit_times[pid] * units for pid, units in units_with_ideal.items())
+
+        planned = sum(status_seconds[status] for status in STATUS_COLUMNS if status != "Off")
+        productive = status_seconds["Productive"]
+        availability = productive / planned if planned else None
+        performance = min(ideal_seconds / productive, 1.0) if productive and units_with_ideal else None
+        quality = 1.0
+        oee = availability * performance * quality if availability is not None and performance is not None else None
+
+        return {
+            **{status: round(status_seconds[status] / 3600, 4) for status in STATUS_COLUMNS},
+            "Cycles": cycle_totals["Cycles"],
+            "Number_of_Units": cycle_totals["Number_of_Units"],
+            "Open_Cycle_Units": self.cycles.open_units if self.cycles.open_cycle is not None else 0,
+            "Availability": availability,
+            "Performance": performance,
+            "Quality": quality,
+            "OEE": oee,
+        }
+
+    def day(self, day=None, now=None):
+        """OEE of a day (datetime.date; None = the day of the latest line). `now` (datetime) adds the running status."""
+        if day is None:
+            if self.clock.last_time is None:
+                return None
+            day = date.fromordinal(self.clock.last_time // DAY_SECONDS)
+        ordinal = day.toordinal()
+        now_seconds = self.now_in(now, lambda event_time: event_time // DAY_SECONDS == ordinal)
+        return {"Date": day, **self.summary(self.clock.days.get(ordinal), self.cycles.days.get(ordinal), now_seconds)}
+
+    def shift(self, now=None):
+        """OEE of the current shift (the shift of the latest line, or of `now` if given)."""
+        if self.clock.last_time is None:
+            return None
+        reference = self.clock.last_time if now is None else event_seconds(now.toordinal(), now.hour * 3600 + now.minute * 60 + now.second)
+        key = self.clock.shift_of(reference)
+        now_seconds = self.now_in(now, lambda event_time: self.clock.shift_of(event_time) == key)
+        summary = self.summary(self.clock.shifts.get(key), self.cycles.shifts.get(key), now_seconds)
+        return {"Date": date.fromordinal(key[0]), "Shift": key[1], **summary}
+
+    def now_in(self, now, in_period):
+        """Event seconds of `now` if the running status should be counted up to it within the period, else None."""
+        if now is None or self.clock.last_time is None:
+            return None
+        now_seconds = event_seconds(now.toordinal(), now.hour * 3600 + now.minute * 60 + now.second)
+        # Only count up to now if the latest line is in the period and now doesn't leave it
+        if not (in_period(self.clock.last_time) and in_period(now_seconds)):
+            return None
+        return now_seconds
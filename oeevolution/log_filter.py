@@ -0,0 +1,121 @@
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from .log_parser import CHUNK_ROWS
+from .log_triggers import is_kept
+
+def filter_log_file(file_path, output_file, chunk_rows=CHUNK_ROWS):
+    """
+    Keep only the lines of one log file that match log_triggers.KEEP_PATTERNS,
+    label them with a simple status and product, and write them to a CSV with
+    the columns Date, Timestamp, Log Message, Product, Status.
+    Rows are written in chunks of `chunk_rows`, so memory stays bounded.
+    Returns the number of rows written.
+    """
+    log_filename = str(file_path).split("/")[-1].replace(".log", "")
+    output_file = Path(output_file)
+
+    # Initialize variables
+    timestamps = []
+    log_messages = []
+    statuses = []
+    products = []
+    rows_written = 0
+    current_status = "standby"  # Default initial status
+    current_product = ""  # Default product name
+
+    # Flags to track active statuses
+    productive_active = False
+    idle_active = False
+    standby_active = False
+    downtime_active = False
+
+    # Append the buffered rows to the output CSV and clear the buffers
+    def flush_rows():
+        nonlocal rows_written
+        chunk = pd.DataFrame({
+            "Date": log_filename,
+            "Timestamp": timestamps,
+            "Log Message": log_messages,
+            "Product": products,
+            "Status": statuses
+        })
+        # The first chunk creates the file and writes the header
+        chunk.to_csv(output_file, mode="a" if rows_written else "w", header=not rows_written, index=False)
+        rows_written += len(chunk)
+        timestamps.clear()
+        log_messages.clear()
+        statuses.clear()
+        products.clear()
+
+    # Process each line in the log file, reading it lazily
+    with open(file_path, "r", encoding="latin1") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+
+            # Extract timestamp and message
+            match = re.match(r"(\d{2}:\d{2}:\d{2}):(.*)", line)
+            if match:
+                timestamp, message = match.groups()
+
+                # Check if the message matches any of the patterns to keep (log_triggers.KEEP_PATTERNS)
+                if is_kept(message):
+                    # Update product name if detected
+                    if "SetFileName File:" in message:
+                        current_product = message.split("SetFileName File:")[-1].strip()
+
+                    # Check for status transitions based on the filtered messages
+                    if "Start Mark" in message:
+                        current_status = "Productive"
+                        productive_active = True
+                        idle_active = standby_active = downtime_active = False
+                    elif "Successfully Cutting" in message:
+                        productive_active = False
+
+                    elif "(0)Stop PLC!" in message:
+                        current_status = "Idle"
+                        idle_active = True
+                        productive_active = standby_active = downtime_active = False
+                    elif "Alarm reset" in message:
+                        idle_active = False
+
+                    elif "----Start Procession: Manufacture----" in message:
+                        current_status = "Standby"
+                        standby_active = True
+                        productive_active = idle_active = downtime_active = False
+                    elif "Start Mark" in message and standby_active:
+                        standby_active = False
+
+                    elif "Err:" in message:
+                        current_status = "Downtime"
+                        downtime_active = True
+                        productive_active = idle_active = standby_active = False
+                    else:
+                        # Maintain the current active status
+                        if productive_active:
+                            current_status = "Productive"
+                        elif idle_active:
+                            current_status = "Idle"
+                        elif standby_active:
+                            current_status = "Standby"
+                        elif downtime_active:
+                            current_status = "Downtime"
+
+                    # Append the filtered data
+                    timestamps.append(timestamp)
+                    log_messages.append(message)
+                    statuses.append(current_status)
+                    products.append(current_product)
+
+                    if len(timestamps) >= chunk_rows:
+                        flush_rows()
+
+    # Save the remaining rows to CSV for reference
+    if timestamps or not rows_written:
+        flush_rows()
+
+    return rows_written
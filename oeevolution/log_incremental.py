@@ -0,0 +1,227 @@
+import itertools
+import json
+import os
+import shutil
+from pathlib import Path
+
+from . import instrument
+from .log_parser import CHUNK_ROWS, StatusMachine, iter_log_messages, iter_row_chunks
+
+# ========== CONFIG ==========
+CHECKPOINT_FILE = "checkpoint.json"
+CHECKPOINT_VERSION = 1
+
+# ========== Checkpoint ==========
+def load_checkpoint(state_dir):
+    """Return the saved checkpoint of an incremental store, or None if there is none."""
+    checkpoint_path = Path(state_dir) / CHECKPOINT_FILE
+    if not checkpoint_path.exists():
+        return None
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoint(state_dir, checkpoint):
+    """Write the checkpoint atomically, so an interrupted run leaves the previous one intact."""
+    checkpoint_path = Path(state_dir) / CHECKPOINT_FILE
+    temp_path = checkpoint_path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=1)
+    os.replace(temp_path, checkpoint_path)
+
+def is_append_only(checkpoint, log_files):
+    """
+    Check that the folder only grew since the checkpoint: every known file is
+    unchanged, except the last one which may have been appended to, and every
+    new file sorts after the known ones. Anything else changes the state
+    carried from file to file, so the store has to be rebuilt.
+    """
+    files = checkpoint["files"]
+    names = [log_file.name for log_file in log_files]
+    known = [name for name in names if name in files]
+    if len(known) != len(files) or names[:len(known)] != known:
+        return False
+
+    for log_file in log_files[:len(known)]:
+        stat = log_file.stat()
+        entry = files[log_file.name]
+        unchanged = stat.st_size == entry["offset"] and stat.st_mtime == entry["mtime"]
+        appended = stat.st_size > entry["offset"] and log_file.name == known[-1]
+        if not (unchanged or appended):
+            return False
+    return True
+
+# ========== Reading Appended Bytes ==========
+def iter_appended_lines(log_file, offset, include_partial):
+    """
+    Yield (raw_line, end_offset) for the complete lines after `offset`.
+    An unterminated last line is only included if `include_partial` is set,
+    since the machine may still be writing it.
+    """
+    with open(log_file, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n") and not include_partial:
+                break
+            offset += len(raw)
+            # Match text-mode universal newlines, where a lone "\r" also ends a line.
+            for raw_line in raw.decode("latin-1").replace("\r\n", "\n").split("\r"):
+                yield raw_line, offset
+
+# ========== Incremental Ingest ==========
+def new_checkpoint(store_path, keep_messages):
+    """The checkpoint of an empty store at `store_path`."""
+    return {
+        "version": CHECKPOINT_VERSION,
+        "store": str(Path(store_path).resolve()),
+        "keep_messages": keep_messages,
+        "files": {},
+        "machine": StatusMachine().checkpoint(),
+        "rows": 0,
+        "tail": None,
+        "writing": False,
+    }
+
+def can_resume(checkpoint, log_files, store_path, keep_messages):
+    """
+    Whether the store can be extended from the checkpoint: it was written by
+    a finished run into this very store, with the same columns, its last part
+    file is still there, and the folder only grew since (see is_append_only()).
+    """
+    if checkpoint is None or checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint["writing"]:
+        return False
+    if checkpoint["store"] != str(Path(store_path).resolve()) or checkpoint["keep_messages"] != keep_messages:
+        return False
+    tail = checkpoint["tail"]
+    if tail is not None and not (Path(store_path) / tail["part"]).exists():
+        return False
+    return is_append_only(checkpoint, log_files)
+
+def iter_new_rows(log_files, files, machine):
+    """
+    Feed the lines appended since the checkpoint through the machine and
+    yield the rows it finishes, moving the file offsets in `files` (the
+    checkpoint's) along as the lines are read.
+    """
+    for i, log_file in enumerate(log_files):
+        entry = files.get(log_file.name)
+        if entry is None:
+            machine.start_file(log_file.stem)
+            entry = files[log_file.name] = {"offset": 0, "mtime": None}
+        elif entry["offset"] == log_file.stat().st_size:
+            continue
+
+        # Only the newest file may still be growing.
+        is_active = i == len(log_files) - 1
+        for raw_line, offset in iter_appended_lines(log_file, entry["offset"], include_partial=not is_active):
+            for seconds, message in iter_log_messages([raw_line]):
+                row = machine.feed(seconds, message)
+                if row is not None:
+                    yield row
+            entry["offset"] = offset
+
+        entry["mtime"] = log_file.stat().st_mtime
+
+def extend_tail(store_path, tail, day_frames):
+    """
+    Rewrite the part file holding the last stored rows (`tail` of the
+    checkpoint) with the day's new rows added, without the trailing row they
+    replace. Returns the rows written and the part path, like
+    log_store.write_day_partition().
+    """
+    from .log_schema import concat_frames
+    from .log_store import read_part, write_day_part
+
+    part_path = Path(store_path) / tail["part"]
+    stored = read_part(part_path)
+    if tail["pending"] is not None:
+        stored = stored.drop(index=tail["pending"])
+    day_df = concat_frames([stored, *day_frames]).sort_values(by="Event_Time", kind="stable")
+    return day_df, write_day_part(store_path, day_df, int(part_path.stem[len("part-"):]))
+
+def ingest_incremental(folder_path, state_dir, store_path, keep_messages=True):
+    """
+    Parse only the log lines appended since the last run and add the new rows
+    to the Parquet store at `store_path` (see log_store), rewriting only the
+    Date partitions they touch: the last part of the last stored day, plus
+    any new days.
+
+    The checkpoint in `state_dir` stores, per file, the byte offset parsed so
+    far and its mtime, plus the carried StatusMachine state: base status,
+    product and product id, and the trailing row that a new status may still
+    rewrite into "End X". That row is stored too, and the checkpoint records
+    the part file it went into and its place there, so the next run replaces
+    it when it rewrites that part. If the folder changed in any way other
+    than appending (a file rewritten, a file added before the last one), or
+    the store no longer matches the checkpoint (e.g. a run was interrupted
+    while writing), the store is rebuilt from scratch.
+    Returns the number of rows added to the store. Raises NotADirectoryError,
+    leaving the store as it is, if folder_path or state_dir isn't a folder.
+    """
+    from .log_schema import parse_dates
+    from .log_store import iter_day_frames, write_day_partition
+
+    state_dir = Path(state_dir)
+    # Checked before anything is deleted: a .log file (or a typo) as the folder would
+    # find no files and rebuild the store empty
+    if not Path(folder_path).is_dir():
+        raise NotADirectoryError(f"The log folder {folder_path} is not a folder")
+    if state_dir.exists() and not state_dir.is_dir():
+        raise NotADirectoryError(f"The state folder {state_dir} is not a folder")
+    state_dir.mkdir(parents=True, exist_ok=True)
+    store_path = Path(store_path)
+    log_files = sorted(Path(folder_path).glob("*.log"))
+
+    checkpoint = load_checkpoint(state_dir)
+    if not can_resume(checkpoint, log_files, store_path, keep_messages):
+        checkpoint = new_checkpoint(store_path, keep_messages)
+        if store_path.exists():
+            shutil.rmtree(store_path)
+    store_path.mkdir(parents=True, exist_ok=True)
+
+    files = checkpoint["files"]
+    machine = StatusMachine.restore(checkpoint["machine"])
+    bytes_before = sum(entry["offset"] for entry in files.values())
+    stored_pending = machine.pending
+    rows_added = 0
+
+    def store_rows():
+        yield from iter_new_rows(log_files, files, machine)
+        # Every new line replaces the trailing row; it goes last, so it is the last row of the last day written
+        if machine.pending is not stored_pending:
+            yield machine.pending
+
+    rows = store_rows()
+    first_row = next(rows, None)
+    if first_row is not None:
+        # Until this run finishes, the store doesn't match the saved checkpoint
+        save_checkpoint(state_dir, dict(checkpoint, writing=True))
+
+        tail = checkpoint["tail"]
+        if tail is not None and tail["pending"] is not None:
+            rows_added -= 1  # rewritten, not added
+        with instrument.stage("ingest"):
+            log_chunks = iter_row_chunks(itertools.chain([first_row], rows), CHUNK_ROWS)
+            for day_frames in iter_day_frames(log_chunks, keep_messages):
+                day = f"Date={day_frames[0]['Event_Time'].iloc[0]:%Y-%m-%d}"
+                if tail is not None and tail["part"].startswith(f"{day}/"):
+                    day_df, part_path = extend_tail(store_path, tail, day_frames)
+                else:
+                    day_df, part_path = write_day_partition(store_path, day_frames)
+                rows_added += sum(len(frame) for frame in day_frames)
+                tail = {"part": part_path.relative_to(store_path).as_posix(), "pending": None}
+            # Where the trailing row ended up once its day was sorted (it is not stored if its date didn't parse)
+            pending = machine.pending
+            if pending is not None and not parse_dates([pending[0]]).isna()[0]:
+                tail["pending"] = int(day_df.index.get_loc(len(day_df) - 1))
+        checkpoint["tail"] = tail
+
+    instrument.count("ingest", rows=rows_added, nbytes=sum(entry["offset"] for entry in files.values()) - bytes_before)
+    checkpoint["rows"] += rows_added
+    checkpoint["machine"] = machine.checkpoint()
+    checkpoint["writing"] = False
+    save_checkpoint(state_dir, checkpoint)
+    return rows_added
+
+def stored_rows(state_dir):
+    """Rows in the store the incremental checkpoint in `state_dir` belongs to."""
+    return load_checkpoint(state_dir)["rows"]
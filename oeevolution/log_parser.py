@@ -0,0 +1,437 @@
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .parse_cache import ParseCache, iter_cached_file_parses
+from .prefetch import READ_AHEAD_FILES, iter_ordered_results, iter_prefetched
+from .log_triggers import (
+    ALARM_RESET, CLOSE_SOFTWARE, ERR, SET_FILE_NAME, START_MARK, START_PCB, START_PROCESSION,
+    STOP_PLC, SUCCESSFULLY_CUTTING, match_triggers,
+)
+
+# ========== CONFIG ==========
+FALLBACK_STATUS = "Standby"  # fallback if a status ends and no new trigger appears
+INITIAL_STATUS = "Standby"   # status assumed before the very first log file
+DEFAULT_PRODUCT_ID = "99999999"
+CHUNK_ROWS = 100_000         # maximum rows per columnar chunk handed to the caller
+
+# Column order of every parsed row / chunk ("Seconds" = the line's time as seconds since midnight).
+COLUMNS = ["Date", "Seconds", "Log Message", "Product", "Product_ID", "Status"]
+PRODUCT_ID = COLUMNS.index("Product_ID")
+STATUS = COLUMNS.index("Status")
+
+# Every base status a file can be entered with (Downtime is single-line and never carried).
+BASE_STATUSES = ["Productive", "Idle", "Standby", "Off"]
+
+# ========== Utility Functions ==========
+def base_status_of(label: str) -> str:
+    """
+    Convert "Start X" -> "X", "End X" -> "X".
+    "Downtime", "Standby", "Off" remain as is.
+    """
+    if label.startswith("Start "):
+        return label.replace("Start ", "")
+    if label.startswith("End "):
+        return label.replace("End ", "")
+    return label
+
+def end_label(label: str, including_downtime=False) -> str:
+    """
+    Retroactively turn the previous line's label into "End X" if its base was X
+    in [Productive, Idle, Standby, Off].
+    If including_downtime is True, also end Off.
+    (This function is used only when starting a new multi-line status.)
+    """
+    base = base_status_of(label)
+    valid_statuses = ["Productive", "Idle", "Standby", "Off"] if including_downtime else ["Productive", "Idle", "Standby"]
+    if base in valid_statuses:
+        return f"End {base}"
+    return label
+
+def next_status(triggers, backup_status, last_label):
+    """
+    Apply the status triggers (bits from match_triggers()) of one log message.
+    backup_status is the current base status and last_label the Status of the
+    previous entry (None if there is none).
+    Returns (new_label, new_base_status, ends_previous), where ends_previous tells
+    the caller to end_label() the previous entry before appending the new one.
+    """
+    # (A) "****************Close Software***************"
+    if triggers & CLOSE_SOFTWARE:
+        # For a one-line Off status, we do not end the previous status
+        return "Off", "Off", False
+
+    # (B) "|*************Start PCB*************|"
+    if triggers & START_PCB:
+        # Only update to Standby if the previous line's base status is Off.
+        if last_label is not None and base_status_of(last_label) == "Off":
+            return "Standby", "Standby", False
+        return backup_status, backup_status, False
+
+    # (C) (0)--start mark!-- => end previous status then start Productive
+    if triggers & START_MARK:
+        return "Start Productive", "Productive", backup_status != "Downtime"
+
+    # (D) "successfully cutting" => current line is "End Productive"
+    if triggers & SUCCESSFULLY_CUTTING and backup_status == "Productive":
+        return "End Productive", FALLBACK_STATUS, False
+
+    # (E) (0)stop plc! or "The Software Stop Button is Pressed" => end previous status then start Idle
+    if triggers & STOP_PLC:
+        return "Start Idle", "Idle", backup_status != "Downtime"
+
+    # (F) "alarm reset" => current line is "End Idle"
+    if triggers & ALARM_RESET and backup_status == "Idle":
+        return "End Idle", FALLBACK_STATUS, False
+
+    # (G) "----start procession: manufacture----" => end previous status then start Standby
+    if triggers & START_PROCESSION:
+        return "Start Standby", "Standby", backup_status != "Downtime"
+
+    # (H) "err:" => single-line downtime; do not end previous status
+    if triggers & ERR:
+        return "Downtime", backup_status, False
+
+    return backup_status, backup_status, False
+
+# ========== Streaming Line Reader ==========
+def time_of_day_seconds(line):
+    """
+    Decode the fixed-format "HH:MM:SS" at the start of a line into seconds since
+    midnight by slicing, instead of a strptime() per line.
+    Raises ValueError on impossible times like 25:61:00, like strptime() did.
+    """
+    hours, minutes, seconds = int(line[0:2]), int(line[3:5]), int(line[6:8])
+    if hours > 23 or minutes > 59 or seconds > 61:
+        raise ValueError(f"time data {line[:8]!r} does not match format '%H:%M:%S'")
+    return hours * 3600 + minutes * 60 + seconds
+
+def iter_log_messages(raw_lines):
+    """Yield (seconds since midnight, message) for every "HH:MM:SS:message" line of an iterable of raw lines."""
+    for raw_line in raw_lines:
+        line = raw_line.strip()
+        if len(line) < 9 or line[2] != ":" or line[5] != ":" or line[8] != ":":
+            continue
+        if not (line[0:2] + line[3:5] + line[6:8]).isdecimal():
+            continue
+
+        yield time_of_day_seconds(line), line[9:]
+
+def iter_log_lines(log_file, data=None):
+    """
+    Yield (seconds since midnight, message) for every timestamped line of a .log file.
+    The file is read lazily, one line at a time, unless its raw bytes were
+    already read (e.g. prefetched) and are passed as `data`.
+    """
+    if data is not None:
+        # Decoded line by line, with the same decoding and universal newlines as reading the file in text mode
+        with io.TextIOWrapper(io.BytesIO(data), encoding="latin-1", errors="ignore", newline=None) as f:
+            yield from iter_log_messages(f)
+        return
+    with open(log_file, "r", encoding="latin-1", errors="ignore") as f:
+        yield from iter_log_messages(f)
+
+# ========== Status State Machine ==========
+class StatusMachine:
+    """
+    The status trigger state machine, fed one log line at a time.
+
+    A row is only handed back once the next line has been seen, because a new
+    multi-line status may still rewrite the previous row into "End X". The
+    machine therefore never holds more than one pending row.
+    """
+
+    def __init__(self, base_status=INITIAL_STATUS, product="", product_id=DEFAULT_PRODUCT_ID):
+        self.base_status = base_status
+        self.product = product
+        self.product_id = product_id
+        self.last_product_id = product_id  # last 8-digit id seen, carried into the next file
+        self.date = None
+        self.pending = None
+
+    @property
+    def last_label(self):
+        return self.pending[STATUS] if self.pending is not None else None
+
+    def checkpoint(self):
+        """The carried state as a JSON-serialisable dict, including the pending row."""
+        return {
+            "base_status": self.base_status,
+            "product": self.product,
+            "product_id": self.product_id,
+            "last_product_id": self.last_product_id,
+            "date": self.date,
+            "pending": self.pending,
+        }
+
+    @classmethod
+    def restore(cls, checkpoint):
+        """Rebuild a machine from checkpoint() output."""
+        machine = cls(checkpoint["base_status"], checkpoint["product"], checkpoint["product_id"])
+        machine.last_product_id = checkpoint["last_product_id"]
+        machine.date = checkpoint["date"]
+        machine.pending = checkpoint["pending"]
+        return machine
+
+    def start_file(self, date):
+        """Start a new file; the product id falls back to the last one actually matched."""
+        self.date = date
+        self.product_id = self.last_product_id
+
+    def feed(self, seconds, message):
+        """Process one line; returns the previous row once it is final, else None."""
+        triggers = match_triggers(message)
+
+        # Update product info if present.
+        if triggers & SET_FILE_NAME:
+            self.product = message.split("SetFileName File:")[-1].strip()
+            pid_match = re.search(r"[/\\](\d{8})[_-]", self.product)
+            if pid_match:
+                self.product_id = pid_match.group(1)
+                self.last_product_id = self.product_id
+            else:
+                self.product_id = DEFAULT_PRODUCT_ID
+
+        # Most lines hit no trigger and keep the current status
+        if triggers:
+            new_label, self.base_status, ends_previous = next_status(triggers, self.base_status, self.last_label)
+        else:
+            new_label, ends_previous = self.base_status, False
+
+        finished = self.pending
+        if finished is not None and ends_previous:
+            finished[STATUS] = end_label(finished[STATUS])
+        self.pending = [self.date, seconds, message.strip(), self.product, self.product_id, new_label]
+        return finished
+
+    def flush(self):
+        """Hand back the pending row at the end of the input."""
+        finished, self.pending = self.pending, None
+        return finished
+
+def iter_log_files(log_files, read_ahead=0):
+    """(log_file, raw bytes or None) in order; with read_ahead > 0 the next files are prefetched (see prefetch.py)."""
+    if read_ahead > 0:
+        return iter_prefetched(log_files, read_ahead)
+    return ((log_file, None) for log_file in log_files)
+
+def iter_log_rows(log_files, read_ahead=0):
+    """
+    Serially stream the rows of the given files, carrying state from file to
+    file, while the next `read_ahead` files are read in the background.
+    """
+    machine = StatusMachine()
+    for log_file, data in iter_log_files(log_files, read_ahead):
+        machine.start_file(log_file.stem)
+        for seconds, message in iter_log_lines(log_file, data):
+            row = machine.feed(seconds, message)
+            if row is not None:
+                yield row
+
+    row = machine.flush()
+    if row is not None:
+        yield row
+
+# ========== Per-File Parsing ==========
+class FileParse:
+    """
+    Result of parsing one .log file on its own, as columns.
+
+    The rows are computed as if the file were the first one of the folder
+    (INITIAL_STATUS, no previous entry, product unknown). Only a short prefix
+    depends on the state carried in from the previous file:
+    - Status: rows up to `resync`, the first line whose outcome is the same
+      for every possible entry state (None if the file never resynchronises).
+    - Product/Product_ID: rows before `first_product_row`.
+    """
+
+    def __init__(self, columns, resync, first_product_row, exit_status, last_product, last_product_id):
+        self.columns = columns
+        self.resync = resync
+        self.first_product_row = first_product_row
+        self.exit_status = exit_status
+        self.last_product = last_product          # None if the file never sets a product
+        self.last_product_id = last_product_id    # None if no product path carries an 8-digit id
+
+def parse_log_file(log_file, data=None):
+    """
+    Parse a single .log file (or its prefetched raw bytes, `data`) into
+    columns plus its entry-state dependency.
+    Runs in a worker process when the folder is parsed in parallel.
+    """
+    machine = StatusMachine(product=None, product_id=None)
+    machine.start_file(log_file.stem)
+    columns = {column: [] for column in COLUMNS}
+    appends = [columns[column].append for column in COLUMNS]
+
+    # Every (base status, previous label) the file could be entered with;
+    # the file resynchronises once they all lead to the same state.
+    entry_states = {(status, label) for status in BASE_STATUSES for label in ("Off", None)}
+    resync = None
+    first_product_row = None
+
+    for line_number, (seconds, message) in enumerate(iter_log_lines(log_file, data)):
+        triggers = match_triggers(message)
+        if first_product_row is None and triggers & SET_FILE_NAME:
+            first_product_row = line_number
+
+        if resync is None:
+            entry_states = {next_status(triggers, status, label)[1::-1] for status, label in entry_states}
+            if len(entry_states) == 1:
+                resync = line_number
+
+        row = machine.feed(seconds, message)
+        if row is not None:
+            for append, value in zip(appends, row):
+                append(value)
+
+    row = machine.flush()
+    if row is not None:
+        for append, value in zip(appends, row):
+            append(value)
+
+    return FileParse(columns, resync, first_product_row, machine.base_status, machine.product, machine.last_product_id)
+
+# ========== Stitching Files Together ==========
+def stitch_file_parses(file_parses):
+    """
+    Sequentially join per-file results, carrying the base status and product
+    from file to file exactly like a serial run over the folder.
+    Only the entry-dependent prefix of each file is re-evaluated.
+    Yields the column blocks of each non-empty file, in order.
+    """
+    global_base_status = INITIAL_STATUS
+    last_product = ""
+    last_product_id = DEFAULT_PRODUCT_ID
+    previous = None  # held back until the next file can no longer end its last status
+
+    for parsed in file_parses:
+        columns = parsed.columns
+        labels = columns["Status"]
+        messages = columns["Log Message"]
+        if not labels:
+            continue
+
+        # Rows before the first SetFileName inherit the previous file's product.
+        first_product_row = len(labels) if parsed.first_product_row is None else parsed.first_product_row
+        columns["Product"][:first_product_row] = [last_product] * first_product_row
+        columns["Product_ID"][:first_product_row] = [last_product_id] * first_product_row
+
+        # Replay the status triggers until the file no longer depends on its entry state.
+        # The resync line keeps its label, but may still end the real previous status.
+        current_base_status = global_base_status
+        replay = len(labels) if parsed.resync is None else parsed.resync + 1
+        for i in range(replay):
+            previous_labels, j = (labels, i - 1) if i else (previous["Status"] if previous else None, -1)
+            last_label = previous_labels[j] if previous_labels else None
+            new_label, new_base_status, ends_previous = next_status(match_triggers(messages[i]), current_base_status, last_label)
+            if ends_previous and previous_labels:
+                previous_labels[j] = end_label(previous_labels[j])
+            if i != parsed.resync:
+                labels[i], current_base_status = new_label, new_base_status
+
+        if parsed.resync is not None:
+            current_base_status = parsed.exit_status
+
+        # Update global state to carry over the status and product to the next file.
+        global_base_status = current_base_status
+        if parsed.last_product is not None:
+            last_product = parsed.last_product
+        if parsed.last_product_id is not None:
+            last_product_id = parsed.last_product_id
+
+        if previous is not None:
+            yield previous
+        previous = columns
+
+    if previous is not None:
+        yield previous
+
+# ========== Columnar Chunks ==========
+def find_log_files(paths):
+    """
+    The .log files to parse, in order. `paths` is one path or a list of paths;
+    a folder expands to its .log files sorted by name (chronological), a file
+    is taken as is.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    log_files = []
+    for path in map(Path, paths):
+        log_files.extend(sorted(path.glob("*.log")) if path.is_dir() else [path])
+    return log_files
+
+def iter_row_chunks(rows, chunk_rows=CHUNK_ROWS):
+    """Collect a stream of parsed rows into columnar chunks ({column: list}) of at most `chunk_rows` rows."""
+    columns = {column: [] for column in COLUMNS}
+    appends = [columns[column].append for column in COLUMNS]
+    for row in rows:
+        for append, value in zip(appends, row):
+            append(value)
+        if len(columns["Status"]) >= chunk_rows:
+            yield columns
+            columns = {column: [] for column in COLUMNS}
+            appends = [columns[column].append for column in COLUMNS]
+    if columns["Status"]:
+        yield columns
+
+def iter_parsed_files(log_files, executor=None, read_ahead=0, processes=1):
+    """
+    FileParse of every file in order, parsed by `executor`'s `processes`
+    worker processes (None = in this process). At most `processes` files are
+    submitted and not yet handed back, so finished parses never pile up when
+    the consumer is slower than the parsers. With read_ahead > 0 the files
+    are read by prefetch threads here and handed to the parsers, so reading
+    overlaps with parsing.
+    """
+    if executor is None:
+        return (parse_log_file(log_file, data) for log_file, data in iter_log_files(log_files, read_ahead))
+    if read_ahead <= 0:
+        return iter_ordered_results(executor, parse_log_file, ((log_file,) for log_file in log_files), processes)
+    return iter_ordered_results(executor, parse_log_file, iter_prefetched(log_files, read_ahead), processes + read_ahead)
+
+def iter_log_chunks(paths, workers=None, chunk_rows=CHUNK_ROWS, cache_dir=None, read_ahead=READ_AHEAD_FILES):
+    """
+    Parse the .log files of `paths` (see find_log_files()) in order and yield
+    the rows as columnar chunks ({column: list}) of at most `chunk_rows` rows.
+
+    With workers=1 the files are streamed serially through one StatusMachine,
+    so memory stays bounded by a single chunk. Otherwise files are parsed in
+    `workers` processes (None = one per CPU core) and stitched in order, which
+    keeps up to `workers` + `read_ahead` files in memory (read ahead, being
+    parsed or waiting to be stitched) besides the one being stitched; the
+    rows are identical either way.
+
+    With a `cache_dir`, every file's parse is kept in a ParseCache there and
+    unchanged files are loaded from it instead of parsed again (files are
+    then parsed one by one and stitched, also when workers=1).
+
+    With read_ahead > 0 the next `read_ahead` files are read whole by
+    background threads while the current ones are parsed, which keeps the CPU
+    busy on slow network shares. The default 0 reads every file when its
+    parse starts (line by line with workers=1), so a multi-GB file never has
+    to fit in memory. Files still come out in order, so the carried status
+    and product are unaffected.
+    """
+    log_files = find_log_files(paths)
+
+    if workers == 1 and cache_dir is None:
+        yield from iter_row_chunks(iter_log_rows(log_files, read_ahead), chunk_rows)
+        return
+
+    executor = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    parse_files = lambda files: iter_parsed_files(files, executor, read_ahead, workers or os.cpu_count())
+    try:
+        if cache_dir is None:
+            file_parses = parse_files(log_files)
+        else:
+            file_parses = iter_cached_file_parses(log_files, parse_files, ParseCache(cache_dir))
+        for columns in stitch_file_parses(file_parses):
+            size = len(columns["Status"])
+            for start in range(0, size, chunk_rows):
+                yield {column: values[start:start + chunk_rows] for column, values in columns.items()}
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from . import instrument
+
+# ========== Compact Schema ==========
+# Every label the status state machine can emit; stored as a categorical so each
+# row only keeps a one-byte status code.
+STATUS_LABELS = [
+    "Productive", "Idle", "Standby", "Downtime", "Off",
+    "Start Productive", "End Productive",
+    "Start Idle", "End Idle",
+    "Start Standby", "End Standby",
+    "End Off",
+]
+STATUS_DTYPE = pd.CategoricalDtype(STATUS_LABELS)
+
+# Columns of the compact parsed-log frame, in order.
+FRAME_COLUMNS = ["Event_Time", "Log Message", "Product", "Product_ID", "Status"]
+CATEGORICAL_COLUMNS = ["Log Message", "Product", "Product_ID"]
+
+def parse_dates(dates):
+    """The file dates ("YYYY.MM.DD" strings) of log_parser rows as a datetime Series; NaT where one doesn't parse."""
+    return pd.to_datetime(pd.Series(dates), format="%Y.%m.%d", errors="coerce")
+
+def compact_frame(chunk, keep_messages=True):
+    """
+    Build the compact parsed-log frame from one columnar chunk of log_parser rows:
+    - Event_Time: datetime64[s], the file date plus the line's seconds since midnight
+    - Status: categorical over STATUS_LABELS (int8 codes)
+    - Product, Product_ID: categorical
+    - Log Message: categorical (each distinct message stored once), or dropped
+      if keep_messages is False
+    Rows whose Date can't be parsed are dropped. The time of day was already
+    decoded at ingest, so only the distinct file dates are parsed here.
+    """
+    dates = parse_dates(chunk["Date"])
+    event_time = dates.to_numpy().astype("datetime64[s]") + np.asarray(chunk["Seconds"], dtype="timedelta64[s]")
+
+    frame = pd.DataFrame({"Event_Time": event_time})
+    if keep_messages:
+        frame["Log Message"] = pd.Categorical(chunk["Log Message"])
+    frame["Product"] = pd.Categorical(chunk["Product"])
+    frame["Product_ID"] = pd.Categorical(chunk["Product_ID"])
+    frame["Status"] = pd.Categorical(chunk["Status"], dtype=STATUS_DTYPE)
+    return frame[~np.isnat(event_time)]
+
+def empty_frame(columns=None, keep_messages=True):
+    """
+    A compact frame without rows, built by compact_frame() so it has the same
+    dtypes as one with rows. Holds `columns` (None = all of FRAME_COLUMNS,
+    without Log Message if keep_messages is False).
+    """
+    chunk = {column: [] for column in ["Date", "Seconds", "Log Message", "Product", "Product_ID", "Status"]}
+    frame = compact_frame(chunk, keep_messages)
+    return frame if columns is None else frame[list(columns)]
+
+def concat_frames(frames):
+    """Concatenate compact frames, merging the categories so no column falls back to strings."""
+    frames = list(frames)
+    if not frames:
+        return empty_frame()
+
+    combined = {}
+    for column in frames[0].columns:
+        values = [frame[column] for frame in frames]
+        if column in CATEGORICAL_COLUMNS:
+            combined[column] = union_categoricals(values, ignore_order=True)
+        else:
+            combined[column] = pd.concat(values, ignore_index=True)
+    return pd.DataFrame(combined)
+
+def build_log_frame(log_chunks, keep_messages=True):
+    """
+    Build the whole compact parsed-log frame from columnar chunks, sorted by
+    Event_Time (stable, so lines with the same second keep their log order).
+    """
+    frames = []
+    for chunk in log_chunks:
+        with instrument.stage("compact", rows=len(chunk["Status"])):
+            frames.append(compact_frame(chunk, keep_messages))
+    if not frames:
+        return empty_frame(keep_messages=keep_messages)
+    with instrument.stage("concat"):
+        frame = concat_frames(frames)
+    del frames
+    with instrument.stage("sort", rows=len(frame)):
+        return frame.sort_values(by="Event_Time", kind="stable").reset_index(drop=True)
+
+# ========== Arrow ==========
+# Index width of every dictionary (categorical) column written to Parquet.
+# pyarrow otherwise picks the smallest width for each frame's categories
+# (int8 below 128), and files or row groups of one dataset must all agree.
+DICTIONARY_INDEX = "int32"
+
+def arrow_table(frame):
+    """A frame as a pyarrow Table whose dictionary columns all use DICTIONARY_INDEX indices."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    schema = pa.schema([
+        field.with_type(pa.dictionary(DICTIONARY_INDEX, field.type.value_type, field.type.ordered))
+        if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ], metadata=table.schema.metadata)
+    return table.cast(schema)
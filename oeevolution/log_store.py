@@ -0,0 +1,192 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import instrument
+from .event_index import write_day_index
+from .log_schema import STATUS_DTYPE, arrow_table, compact_frame, concat_frames, empty_frame
+
+# ========== CONFIG ==========
+# Rows per Parquet row group; event_index lookups read only the row groups they need
+ROW_GROUP_ROWS = 10_000
+
+# ========== Writing ==========
+def write_day_part(store_path, day_df, part_number):
+    """
+    Write one day of compact rows, already sorted by Event_Time, as
+    store_path/Date=YYYY-MM-DD/part-NNNNN.parquet (replacing that part if it
+    exists), and (re)index the day (see event_index). Returns the part path.
+    """
+    import pyarrow.parquet as pq
+
+    date = f"{day_df['Event_Time'].iloc[0]:%Y-%m-%d}"
+    partition = Path(store_path) / f"Date={date}"
+    partition.mkdir(parents=True, exist_ok=True)
+    # Zero-padded, so path order (which pyarrow reads parts in) is the order they were written
+    part_path = partition / f"part-{part_number:05d}.parquet"
+    with instrument.stage("store write", rows=len(day_df)):
+        # One dictionary index width for every part, so the dataset reads as one schema
+        pq.write_table(arrow_table(day_df), part_path, row_group_size=ROW_GROUP_ROWS)
+    instrument.count("store write", nbytes=part_path.stat().st_size)
+
+    with instrument.stage("event index", rows=len(day_df)):
+        parts = sorted(partition.glob("*.parquet"))
+        if len(parts) > 1:
+            # The day came back (log times went backwards): index all of its parts
+            part_rows = [pq.read_metadata(part).num_rows for part in parts]
+            write_day_index(store_path, date, read_log_store(store_path, date_from=date, date_to=date), part_rows)
+        else:
+            write_day_index(store_path, date, day_df, [len(day_df)])
+    return part_path
+
+def write_day_partition(store_path, day_frames):
+    """
+    Write one day of compact rows as a new part of its Date partition, sorted
+    by Event_Time (stable, so lines with the same second keep their log order).
+    Returns the rows written, in that order (their index is their position in
+    day_frames), and the part path.
+    """
+    day_df = concat_frames(day_frames).sort_values(by="Event_Time", kind="stable")
+    partition = Path(store_path) / f"Date={day_df['Event_Time'].iloc[0]:%Y-%m-%d}"
+    return day_df, write_day_part(store_path, day_df, len(list(partition.glob("*.parquet"))))
+
+def iter_day_frames(log_chunks, keep_messages=True):
+    """
+    Group a stream of columnar chunks into compact frames per day: yields the
+    frames of every run of rows with the same date, in order. Chunks arrive
+    in file order, so each day's rows are contiguous (a day only comes back
+    if the log times went backwards).
+    """
+    day_frames = []
+    current_day = None
+    for chunk in log_chunks:
+        with instrument.stage("compact", rows=len(chunk["Status"])):
+            frame = compact_frame(chunk, keep_messages)
+        days = frame["Event_Time"].to_numpy().astype("datetime64[D]")
+        boundaries = np.flatnonzero(days[1:] != days[:-1]) + 1
+        for start, end in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [len(days)]))):
+            if start == end:
+                continue
+            if day_frames and days[start] != current_day:
+                yield day_frames
+                day_frames = []
+            current_day = days[start]
+            day_frames.append(frame.iloc[start:end])
+
+    if day_frames:
+        yield day_frames
+
+def write_log_store(log_chunks, store_path, keep_messages=True):
+    """
+    Write the full parsed log (columnar chunks from log_parser)
+    to a Parquet dataset partitioned by Date, replacing any previous store.
+    Rows use the compact log_schema layout (Parquet dictionary-encodes the
+    categorical columns) and are grouped per day as they stream in, so only
+    one day is held in memory. Requires pyarrow. Returns the number of rows written.
+    """
+    store_path = Path(store_path)
+    if store_path.exists():
+        shutil.rmtree(store_path)
+    store_path.mkdir(parents=True)
+
+    rows_written = 0
+    for day_frames in iter_day_frames(log_chunks, keep_messages):
+        day_df, _ = write_day_partition(store_path, day_frames)
+        rows_written += len(day_df)
+    return rows_written
+
+# ========== Reading ==========
+class MissingColumnsError(ValueError):
+    """The store lacks columns a table needs, e.g. Log Message in a store written with --drop-messages."""
+
+def stored_columns(store_path):
+    """The columns of the store's part files, from the first one's schema (none for an empty store)."""
+    import pyarrow.parquet as pq
+
+    part = min(Path(store_path).rglob("*.parquet"), default=None)
+    return [] if part is None else pq.read_schema(part).names
+
+def check_columns(store_path, needs):
+    """
+    Raise MissingColumnsError naming every table of `needs` ({table name:
+    store columns it reads}) that reads a column the store lacks, so such a
+    table fails before anything is built rather than inside pyarrow.
+    """
+    stored = stored_columns(store_path)
+    if not stored:
+        return
+    missing = {name: sorted(set(columns) - set(stored)) for name, columns in needs.items()}
+    missing = {name: columns for name, columns in missing.items() if columns}
+    if missing:
+        columns = sorted({column for names in missing.values() for column in names})
+        raise MissingColumnsError(
+            f"The store {store_path} has no {', '.join(columns)} column (written with --drop-messages?), "
+            f"which these need: {', '.join(missing)}. Rebuild the store without --drop-messages."
+        )
+
+def date_filters(date_from=None, date_to=None):
+    """Partition filters for the Dates within [date_from, date_to] ("YYYY-MM-DD", inclusive; None = open-ended)."""
+    filters = []
+    if date_from is not None:
+        filters.append(("Date", ">=", str(date_from)))
+    if date_to is not None:
+        filters.append(("Date", "<=", str(date_to)))
+    return filters
+
+def read_part(part_path):
+    """The compact rows of one part file of the store, in stored order."""
+    df = pd.read_parquet(part_path)
+    df["Event_Time"] = df["Event_Time"].astype("datetime64[s]")
+    df["Status"] = df["Status"].astype(STATUS_DTYPE)
+    return df
+
+def read_partitions(store_path, partition_fields, columns=None, filters=None):
+    """
+    Read compact rows from a hive-partitioned store whose partition folders
+    are `partition_fields` (string values, in folder order). Only the
+    requested columns (None = all, including the partition fields) and the
+    partitions passing `filters` are read, in path order.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    partitioning = ds.partitioning(pa.schema([(field, pa.string()) for field in partition_fields]), flavor="hive")
+    with instrument.stage("store read"):
+        df = pd.read_parquet(store_path, columns=columns, partitioning=partitioning, filters=filters or None)
+    instrument.count("store read", rows=len(df))
+    if "Event_Time" in df.columns:
+        df["Event_Time"] = df["Event_Time"].astype("datetime64[s]")
+    if "Status" in df.columns:
+        df["Status"] = df["Status"].astype(STATUS_DTYPE)
+    return df
+
+def read_log_store(store_path, columns=None, date_from=None, date_to=None):
+    """
+    Read the compact parsed log back from the store, in stored order: Date
+    partitions in date order, and a day's parts in the order they were
+    written, each sorted by Event_Time. That is sorted by Event_Time unless
+    the log times went backwards and a day got a second part.
+    Only the requested columns are read (None = all stored columns), and only
+    the Date partitions within [date_from, date_to] ("YYYY-MM-DD" strings,
+    inclusive; None = open-ended). An empty store gives no rows, with the
+    compact dtypes.
+    """
+    if not any(Path(store_path).glob("Date=*")):
+        return empty_frame(columns)
+    # Partitions are read in path order, which is chronological for Date=YYYY-MM-DD
+    df = read_partitions(store_path, ["Date"], columns, date_filters(date_from, date_to))
+    if columns is None:
+        df = df.drop(columns="Date")
+    return df
+
+def iter_log_store(store_path, columns=None, date_from=None, date_to=None):
+    """
+    read_log_store() one Date partition at a time, in date order, so the
+    full log is never held in memory (e.g. to stream it to report_writer).
+    """
+    for partition in sorted(Path(store_path).glob("Date=*")):
+        date = partition.name[len("Date="):]
+        if (date_from is None or date >= str(date_from)) and (date_to is None or date <= str(date_to)):
+            yield read_log_store(store_path, columns, date, date)
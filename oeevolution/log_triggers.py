@@ -0,0 +1,128 @@
+import re
+
+# ========== Trigger Bits ==========
+# Status triggers of the Dataframe.py state machine (matched case-insensitively).
+# Alarm/reset and start procession/manufacture only ever count together, so
+# each pair is one bit.
+CLOSE_SOFTWARE = 1 << 0
+START_PCB = 1 << 1
+START_MARK = 1 << 2
+SUCCESSFULLY_CUTTING = 1 << 3
+STOP_PLC = 1 << 4
+ALARM_RESET = 1 << 5
+START_PROCESSION = 1 << 6
+ERR = 1 << 7
+# "SetFileName File:" product line (case-sensitive).
+SET_FILE_NAME = 1 << 8
+
+# Lowercase keywords of each status trigger; a message hits a trigger if it
+# contains any of them (event_index.py indexes every keyword on its own).
+STATUS_KEYWORDS = {
+    "close_software": ["****************close software***************"],
+    "start_pcb": ["|*************start pcb*************|"],
+    "start_mark": ["(0)--start mark!--"],
+    "successfully_cutting": ["successfully cutting"],
+    "stop_plc": ["(0)stop plc!", "the software stop button is pressed"],
+    "alarm": ["alarm"],
+    "reset": ["reset"],
+    "start_procession": ["start procession"],
+    "manufacture": ["manufacture"],
+    "err": ["err:"],
+}
+
+SET_FILE_NAME_TEXT = "SetFileName File:"
+
+# Case-sensitive checks the cycle table and the live cycle tracker count cycles by
+CYCLE_START_TEXT = "Start Mark!"
+CYCLE_CUT_TEXT = "Successfully Cutting"
+CYCLE_STOP_TEXT = "Stop PLC!"
+MARKING_COMPLETED_PATTERN = r"\(0\)Marking Completed\(\d+ms\)"
+
+# Define the list of patterns filter_one_log.py filters by
+KEEP_PATTERNS = [
+    r"----Start Procession: Manufacture----",
+    r"\(0\)--Start Mark!-",
+    r"\(0\)Stop PLC!",
+    r"The Software Stop Button is Pressed",
+    r"Software stopped unexpectedly",
+    r"\(0\)Failed Waiting for PCB To Be in Place.*\(Err:32\)",
+    r"\(0\)The Program is Pressed To Stop\(Err:32\)",
+    r"Start processing failed: The Track System is Not Initialized\(Err:61\)",
+    r"\(0\)Failed Waiting for PCB To Be in Place: Software stopped unexpectedly\(Err:32\)",
+    r"SetFileName File: D:\\Production Program\\",
+    r"\(0\)--Marking Completed\)",
+    r"No Match Pattern Fool Proof!",
+    r"Waiting for material to arrive failed: This Feature is Not Supported\(Err:48\)"
+]
+
+# ========== Status Triggers ==========
+def match_triggers(message):
+    """
+    Return the trigger bits of one log message.
+
+    Plain substring checks, like the Dataframe.py chain, are the fastest test
+    CPython has for a handful of keywords; a regex alternation over them is
+    several times slower. Keywords that share a cheap marker (":", "*****",
+    "!", "ss") are only looked for when the marker is there, so a message without
+    any trigger costs fewer checks than the chain did.
+    """
+    lowered = message.lower()
+    triggers = 0
+    if ":" in message:
+        if SET_FILE_NAME_TEXT in message:
+            triggers |= SET_FILE_NAME
+        if "err:" in lowered:
+            triggers |= ERR
+    if "*****" in message:
+        if "****************close software***************" in lowered:
+            triggers |= CLOSE_SOFTWARE
+        if "|*************start pcb*************|" in lowered:
+            triggers |= START_PCB
+    if "!" in message:
+        if "(0)--start mark!--" in lowered:
+            triggers |= START_MARK
+        if "(0)stop plc!" in lowered:
+            triggers |= STOP_PLC
+    if "ss" in lowered:
+        if "successfully cutting" in lowered:
+            triggers |= SUCCESSFULLY_CUTTING
+        if "the software stop button is pressed" in lowered:
+            triggers |= STOP_PLC
+        if "start procession" in lowered and "manufacture" in lowered:
+            triggers |= START_PROCESSION
+    if "alarm" in lowered and "reset" in lowered:
+        triggers |= ALARM_RESET
+    return triggers
+
+# ========== Keep Patterns ==========
+def literal_prefix(pattern):
+    """
+    The text every match of `pattern` starts with: its leading run of literal
+    or escaped characters. Assumes no top-level "|", as in KEEP_PATTERNS.
+    """
+    prefix = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            prefix.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in ".^$*+?{}[]|()":
+            # A quantifier applies to the character before it
+            if char in "*+?{" and prefix:
+                prefix.pop()
+            break
+        else:
+            prefix.append(char)
+    return "".join(prefix)
+
+# (literal prefix, compiled pattern); the regex only runs once its prefix is found
+KEEP_CHECKS = [(literal_prefix(pattern), re.compile(pattern)) for pattern in KEEP_PATTERNS]
+
+def is_kept(message):
+    """Whether a log message matches any of KEEP_PATTERNS."""
+    for prefix, pattern in KEEP_CHECKS:
+        if prefix in message and pattern.search(message):
+            return True
+    return False
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+# ========== CONFIG ==========
+INDEX_FILE = "index.json"
+# Bump when parse_log_file() / FileParse change, so entries of older parsers are dropped
+CACHE_VERSION = 1
+MAX_CACHE_BYTES = 2 * 2**30  # least recently used entries are evicted past this size
+HASH_BLOCK_BYTES = 2**20
+
+def content_hash(log_file):
+    """Hash of the file's date (its name) and content: the only inputs of its FileParse."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(log_file.stem.encode("utf-8") + b"\0")
+    with open(log_file, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# ========== Parse Cache ==========
+class ParseCache:
+    """
+    On-disk cache of log_parser.FileParse results, one pickle per file.
+
+    A FileParse is computed as if the file were the first one and records
+    which prefix depends on the state carried in from the previous file;
+    stitch_file_parses() re-evaluates that prefix on every run. Cached
+    results therefore stay correct when an earlier file (and so the
+    carried-in status or product) changes.
+
+    Entries are keyed by a hash of the file's name and content. The path,
+    size and mtime of every file seen are remembered too, so an unchanged
+    file is found without reading it; a file whose size or mtime changed is
+    re-hashed and only re-parsed if its content really differs. Least
+    recently used entries are evicted once the cache grows past max_bytes;
+    pickles left by another CACHE_VERSION are removed when the cache is opened.
+    """
+
+    def __init__(self, cache_dir, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.files = {}    # path -> {"size", "mtime_ns", "hash"}
+        self.entries = {}  # hash -> {"bytes", "last_used"}
+        self.hits = 0
+        self.misses = 0
+
+        index_path = self.cache_dir / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == CACHE_VERSION:
+                self.files, self.entries = index["files"], index["entries"]
+        # Drop entries whose pickle went missing
+        self.entries = {key: entry for key, entry in self.entries.items() if self.entry_path(key).exists()}
+        # Remove pickles the index doesn't know (from another CACHE_VERSION, or saved by
+        # a run that never wrote its index): eviction only sees indexed entries
+        for entry_path in self.cache_dir.glob("*.pkl"):
+            if entry_path.stem not in self.entries:
+                entry_path.unlink(missing_ok=True)
+
+    def entry_path(self, key):
+        return self.cache_dir / f"{key}.pkl"
+
+    def lookup(self, log_file):
+        """Return (key, hit) for a .log file; `key` identifies its content, `hit` whether it is cached."""
+        stat = log_file.stat()
+        path = str(Path(log_file).resolve())
+        known = self.files.get(path)
+        if known is not None and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            key = known["hash"]
+        else:
+            key = content_hash(log_file)
+            self.files[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": key}
+        return key, key in self.entries
+
+    def load(self, key):
+        """The cached FileParse (a fresh copy, since stitching edits it in place)."""
+        with open(self.entry_path(key), "rb") as f:
+            file_parse = pickle.load(f)
+        self.entries[key]["last_used"] = time.time()
+        self.hits += 1
+        return file_parse
+
+    def save(self, key, file_parse):
+        """Store a freshly parsed FileParse; call it before the result is stitched."""
+        entry_path = self.entry_path(key)
+        temp_path = entry_path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            pickle.dump(file_parse, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+        self.entries[key] = {"bytes": entry_path.stat().st_size, "last_used": time.time()}
+        self.misses += 1
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        total = sum(entry["bytes"] for entry in self.entries.values())
+        for key in sorted(self.entries, key=lambda key: self.entries[key]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.entries.pop(key)["bytes"]
+            self.entry_path(key).unlink(missing_ok=True)
+        # Forget files whose entry is gone and no longer exist on disk
+        self.files = {path: known for path, known in self.files.items() if known["hash"] in self.entries or Path(path).exists()}
+
+    def close(self):
+        """Evict down to max_bytes and write the index atomically."""
+        self.evict()
+        index_path = self.cache_dir / INDEX_FILE
+        temp_path = index_path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": self.files, "entries": self.entries}, f)
+        os.replace(temp_path, index_path)
+
+def iter_cached_file_parses(log_files, parse_files, cache):
+    """
+    FileParse of every file in order: loaded from `cache` when the file's
+    content is cached, else taken from parse_files(files not cached), an
+    iterator of their FileParse in order (e.g. a process pool's map), and
+    saved to the cache before it is returned.
+    """
+    lookups = [cache.lookup(log_file) for log_file in log_files]
+    parsed = iter(parse_files([log_file for log_file, (_, hit) in zip(log_files, lookups) if not hit]))
+    try:
+        for key, hit in lookups:
+            if hit:
+                yield cache.load(key)
+            else:
+                file_parse = next(parsed)
+                cache.save(key, file_parse)
+                yield file_parse
+    finally:
+        cache.close()
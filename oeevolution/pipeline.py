@@ -0,0 +1,99 @@
+from pathlib import Path
+
+from . import instrument
+from .log_incremental import ingest_incremental, stored_rows
+from .log_parser import find_log_files, iter_log_chunks
+from .prefetch import READ_AHEAD_FILES
+from .log_schema import build_log_frame
+from .log_store import check_columns, read_log_store, write_log_store
+from .report_writer import write_report, write_reports
+from .tables import TABLES
+
+def parsed_chunks(paths, workers=None, cache_dir=None, read_ahead=READ_AHEAD_FILES):
+    """iter_log_chunks(), recorded as the "parse" stage (rows parsed, bytes of the .log files)."""
+    instrument.count("parse", nbytes=sum(log_file.stat().st_size for log_file in find_log_files(paths)))
+    log_chunks = iter_log_chunks(paths, workers=workers, cache_dir=cache_dir, read_ahead=read_ahead)
+    return instrument.timed_iter("parse", log_chunks, lambda chunk: len(chunk["Status"]))
+
+def parse_logs(paths, workers=None, keep_messages=True, cache_dir=None, read_ahead=READ_AHEAD_FILES):
+    """
+    Parse PcbVision .log files into one compact frame (see log_schema),
+    sorted by Event_Time. `paths` is a log folder, a .log file, or a list of
+    them, in chronological order (see log_parser.find_log_files()).
+    With a `cache_dir`, unchanged files are loaded from the parse cache kept
+    there (see parse_cache.ParseCache); `read_ahead` files are prefetched
+    while parsing (see prefetch.py). Nothing is written or printed.
+    """
+    return build_log_frame(parsed_chunks(paths, workers, cache_dir, read_ahead), keep_messages)
+
+def build_store(paths, store_path, workers=None, state_dir=None, keep_messages=True, cache_dir=None, read_ahead=READ_AHEAD_FILES):
+    """
+    Parse the logs and (re)write the Parquet store at `store_path`.
+    If `state_dir` is given (`paths` is then one log folder), only the lines
+    appended since the checkpoint kept there are parsed and only the days
+    they touch are rewritten (see log_incremental.ingest_incremental());
+    otherwise a `cache_dir` skips re-parsing unchanged files.
+    Returns the number of rows stored.
+    """
+    if state_dir is not None:
+        ingest_incremental(paths, state_dir, store_path, keep_messages)
+        return stored_rows(state_dir)
+    return write_log_store(parsed_chunks(paths, workers, cache_dir, read_ahead), store_path, keep_messages)
+
+def build_store_and_tables(paths, store_path, output_dir, names=None, keep_messages=True, output_format="xlsx"):
+    """
+    Parse the logs serially into the Parquet store and, in the same pass,
+    build the requested tables (names from tables.TABLES, None = all; see
+    fused.FusedTables) and write them to output_dir. The tables cover the
+    whole log. Returns (rows stored, written paths).
+    """
+    from .fused import FusedTables, iter_fused_chunks
+
+    fused = FusedTables()
+    log_chunks = instrument.timed_iter("parse + tables", iter_fused_chunks(paths, fused), lambda chunk: len(chunk["Status"]))
+    rows_stored = write_log_store(log_chunks, store_path, keep_messages)
+
+    tables = {TABLES[name][0]: table for name, table in fused.tables(names).items()}
+    return rows_stored, write_tables(tables, output_dir, output_format)
+
+def write_table(table, output_dir, file_stem, output_format="xlsx"):
+    """Write one table to output_dir/<file_stem>.<output_format> ("xlsx", "csv" or "parquet"; see report_writer) and return the path."""
+    output_path = Path(output_dir) / f"{file_stem}.{output_format}"
+    with instrument.stage(f"export {output_format}", rows=len(table)):
+        write_report(table, output_path, output_format)
+    instrument.count(f"export {output_format}", nbytes=output_path.stat().st_size)
+    return output_path
+
+def write_tables(tables, output_dir, output_format="xlsx"):
+    """
+    Write every {file stem: table} to output_dir/<file stem>.<output_format>,
+    several tables at once (see report_writer.write_reports()), and return
+    the written paths in order.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    reports = {output_dir / f"{file_stem}.{output_format}": table for file_stem, table in tables.items()}
+    with instrument.stage(f"export {output_format}", rows=sum(len(table) for table in tables.values())):
+        write_reports(reports, output_format)
+    instrument.count(f"export {output_format}", nbytes=sum(output_path.stat().st_size for output_path in reports))
+    return list(reports)
+
+def export_tables(store_path, output_dir, names=None, date_from=None, date_to=None, output_format="xlsx"):
+    """
+    Build the requested tables (names from tables.TABLES, None = all) from the
+    store, for the Date partitions in [date_from, date_to], and write them
+    to output_dir/<file stem>.<output_format> ("xlsx", "csv" or "parquet"),
+    all at once. Only the columns each table needs are read. Returns the
+    written paths. Raises log_store.MissingColumnsError if the store lacks a
+    column one of the tables reads (Log Message, after --drop-messages).
+    """
+    names = names or list(TABLES)
+    check_columns(store_path, {name: TABLES[name][2] for name in names})
+    tables = {}
+    for name in names:
+        file_stem, build_table, columns = TABLES[name]
+        df = read_log_store(store_path, columns, date_from, date_to)
+        with instrument.stage(f"table {name}", rows=len(df)):
+            tables[file_stem] = build_table(df)
+        del df
+    return write_tables(tables, output_dir, output_format)
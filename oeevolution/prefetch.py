@@ -0,0 +1,57 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ========== CONFIG ==========
+# Files read in the background while the current one is parsed (0 = no prefetch).
+# Off by default: a prefetched file is held in memory whole, so only turn it on
+# (store --read-ahead) for folders of day-sized files on a slow network share.
+READ_AHEAD_FILES = 0
+
+# ========== Overlapped File Reading ==========
+def read_log_file(log_file):
+    """The raw bytes of a .log file."""
+    with open(log_file, "rb") as f:
+        return f.read()
+
+def iter_prefetched(log_files, read_ahead=READ_AHEAD_FILES, read_file=read_log_file):
+    """
+    Yield (log_file, raw bytes) for every file, in the given order, while the
+    next `read_ahead` files are already being read by background threads
+    with read_file(log_file) (e.g. one that adds latency in a benchmark).
+    On a slow network share the reads then overlap with parsing instead of
+    alternating with it; at most read_ahead + 1 whole files are held in
+    memory, so keep read_ahead at 0 for very large files.
+    """
+    if read_ahead <= 0:
+        for log_file in log_files:
+            yield log_file, read_file(log_file)
+        return
+
+    pool = ThreadPoolExecutor(max_workers=read_ahead, thread_name_prefix="log-prefetch")
+    queue = deque()
+    try:
+        for log_file in log_files:
+            queue.append((log_file, pool.submit(read_file, log_file)))
+            if len(queue) > read_ahead:
+                log_file, future = queue.popleft()
+                yield log_file, future.result()
+        while queue:
+            log_file, future = queue.popleft()
+            yield log_file, future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def iter_ordered_results(executor, function, items, max_pending):
+    """
+    executor.submit(function, *item) for every item, keeping at most
+    `max_pending` calls in flight, and yield the results in item order.
+    Unlike executor.map, the items (e.g. prefetched file contents) are only
+    pulled as results are handed back, so memory stays bounded.
+    """
+    queue = deque()
+    for item in items:
+        queue.append(executor.submit(function, *item))
+        if len(queue) >= max_pending:
+            yield queue.popleft().result()
+    while queue:
+        yield queue.popleft().result()
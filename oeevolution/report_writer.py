@@ -0,0 +1,299 @@
+"""
+Bulk writer for the report tables and the parsed log: xlsx, csv and parquet.
+
+    from oeevolution.report_writer import write_report
+    write_report(iter_log_store("Parsed_Log_Store"), "Parsed_Log.xlsx")
+
+A table is a DataFrame or an iterable of DataFrames with the same columns,
+which are streamed to the file one after the other. The xlsx writer formats
+each column of a chunk at once and writes the sheet XML straight into the
+zip file, instead of building one openpyxl cell object per value, so memory
+stays bounded by a chunk; rows past Excel's limit continue on a new sheet.
+"""
+import datetime
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from .log_schema import arrow_table
+
+# ========== CONFIG ==========
+EXCEL_MAX_ROWS = 1_048_576   # rows per sheet, header included
+EXCEL_MAX_TEXT = 32_767      # characters per cell
+XLSX_CHUNK_ROWS = 50_000     # rows formatted at once
+XLSX_COMPRESS_LEVEL = 6      # deflate level of the xlsx parts (1 writes ~25% faster, files ~40% larger)
+EXPORT_WORKERS = 4           # tables written at once by write_reports()
+
+# ========== Xlsx Cells ==========
+EXCEL_EPOCH = np.datetime64("1899-12-30", "s")  # day 0 of Excel's date serial numbers
+EMPTY_CELL = "<c/>"
+SECONDS_PER_DAY = 86_400
+# Cell styles, indices into cellXfs of STYLES_XML
+DATETIME_STYLE, DATE_STYLE, HEADER_STYLE, TIME_STYLE = 1, 2, 3, 4
+COLUMN_WIDTHS = {DATETIME_STYLE: 20, DATE_STYLE: 11, TIME_STYLE: 9}
+# Control characters XML 1.0 can't hold
+ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def text_cell(text, style=0):
+    text = escape(ILLEGAL_XML_CHARS.sub("", text[:EXCEL_MAX_TEXT]))
+    style = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+def number_cells(strings, missing, style=0):
+    """Cells of numbers already formatted as strings; `missing` marks the empty ones."""
+    style = f' s="{style}"' if style else ""
+    cells = f"<c{style}><v>" + strings.astype(object) + "</v></c>"
+    cells[missing] = EMPTY_CELL
+    return cells
+
+def object_column_style(column):
+    """Style of an object column of datetime.datetime, datetime.date or datetime.time values (0 = other values)."""
+    valid = column.dropna()
+    if not len(valid):
+        return 0
+    for value_type, style in ((datetime.datetime, DATETIME_STYLE), (datetime.date, DATE_STYLE), (datetime.time, TIME_STYLE)):
+        if all(isinstance(value, value_type) for value in valid.iloc[:100]):
+            return style
+    return 0
+
+def column_style(column):
+    """Number format style of a column's cells (0 = general)."""
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        return DATETIME_STYLE
+    if column.dtype == object:
+        return object_column_style(column)
+    return 0
+
+def column_cells(column, style):
+    """The cell XML of every value of a column (a Series), as an object array."""
+    if style in (DATETIME_STYLE, DATE_STYLE):
+        values = pd.to_datetime(column).dt.tz_localize(None).to_numpy().astype("datetime64[s]")
+        serials = (values - EXCEL_EPOCH) / np.timedelta64(1, "D")
+        return number_cells(serials.astype(str), np.isnat(values), style)
+    if style == TIME_STYLE:
+        # Excel times are fractions of a day
+        missing = column.isna().to_numpy()
+        seconds = [0 if is_missing else value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+                   for value, is_missing in zip(column, missing)]
+        return number_cells((np.array(seconds, dtype=float) / SECONDS_PER_DAY).astype(str), missing, style)
+    if pd.api.types.is_bool_dtype(column.dtype):
+        values = column.to_numpy(dtype=object)
+        cells = np.where(values == True, '<c t="b"><v>1</v></c>', '<c t="b"><v>0</v></c>').astype(object)
+        cells[pd.isna(values)] = EMPTY_CELL
+        return cells
+    if pd.api.types.is_integer_dtype(column.dtype) and not column.hasnans:
+        return number_cells(column.to_numpy().astype(str), np.zeros(len(column), dtype=bool))
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        values = column.to_numpy(dtype=float, na_value=np.nan)
+        return number_cells(values.astype(str), ~np.isfinite(values))
+
+    # Text: each distinct value is escaped once; code -1 (missing) picks the trailing empty cell
+    codes, uniques = pd.factorize(column)
+    cells = np.array([text_cell(str(value)) for value in uniques] + [EMPTY_CELL], dtype=object)
+    return cells[codes]
+
+def row_strings(frame, styles):
+    """The <row> XML of every row of `frame`, as an object array."""
+    rows = np.full(len(frame), "<row>", dtype=object)
+    for column, style in zip(frame.columns, styles):
+        rows = rows + column_cells(frame[column], style)
+    return rows + "</row>"
+
+# ========== Xlsx Writer ==========
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>'
+)
+SHEET_CONTENT_TYPE = ('<Override PartName="/xl/worksheets/sheet{index}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>{sheets}</sheets></workbook>'
+)
+WORKBOOK_SHEET = '<sheet name="{name}" sheetId="{index}" r:id="rId{index}"/>'
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{sheets}'
+    '<Relationship Id="rId{styles}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK_SHEET_REL = ('<Relationship Id="rId{index}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                      'Target="worksheets/sheet{index}.xml"/>')
+# Same date number formats as pandas' Excel writers, and Excel's built-in h:mm:ss (21) for times; the header is bold like theirs
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="YYYY-MM-DD HH:MM:SS"/><numFmt numFmtId="165" formatCode="YYYY-MM-DD"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="21" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+SHEET_START_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+SHEET_END_XML = "</sheetData></worksheet>"
+
+class XlsxWriter:
+    """
+    Constant-memory .xlsx writer. Frames passed to write() are appended as
+    rows below a header of the first frame's columns; once a sheet holds
+    max_rows rows (header included) the rows continue on a new sheet with
+    the same header, named "<sheet_name> (2)", "<sheet_name> (3)", ...
+    Cells are written as inline strings and numbers, so the workbook needs
+    no shared string table; datetime and date columns get pandas' formats,
+    and datetime.time columns are Excel times (h:mm:ss).
+    """
+
+    def __init__(self, output_path, sheet_name="Sheet1", max_rows=EXCEL_MAX_ROWS, compress_level=XLSX_COMPRESS_LEVEL):
+        self.archive = zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED, compresslevel=compress_level)
+        self.sheet_name = sheet_name
+        self.max_rows = max_rows
+        self.sheet_names = []
+        self.sheet = None      # stream of the sheet being written
+        self.sheet_rows = 0    # rows in it, header included
+        self.columns = None
+        self.styles = None
+        self.rows = 0          # data rows written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start_sheet(self):
+        if self.sheet is not None:
+            self.sheet.write(SHEET_END_XML.encode("utf-8"))
+            self.sheet.close()
+        index = len(self.sheet_names) + 1
+        # Sheet names are limited to 31 characters
+        suffix = f" ({index})" if index > 1 else ""
+        self.sheet_names.append(self.sheet_name[:31 - len(suffix)] + suffix)
+        self.sheet = self.archive.open(f"xl/worksheets/sheet{index}.xml", "w", force_zip64=True)
+
+        columns = self.columns or []
+        cols = "".join(f'<col min="{number}" max="{number}" width="{COLUMN_WIDTHS[style]}" customWidth="1"/>'
+                       for number, style in enumerate(self.styles or [], start=1) if style in COLUMN_WIDTHS)
+        header = "".join(text_cell(str(column), HEADER_STYLE) for column in columns)
+        self.sheet.write((SHEET_START_XML + (f"<cols>{cols}</cols>" if cols else "") + f"<sheetData><row>{header}</row>").encode("utf-8"))
+        self.sheet_rows = 1
+
+    def write(self, frame):
+        """Append the rows of a DataFrame (same columns as the first one written)."""
+        if self.columns is None:
+            self.columns = list(frame.columns)
+            self.styles = [column_style(frame[column]) for column in self.columns]
+        frame = frame[self.columns]
+        for start in range(0, len(frame), XLSX_CHUNK_ROWS):
+            rows = row_strings(frame.iloc[start:start + XLSX_CHUNK_ROWS], self.styles)
+            while len(rows):
+                if self.sheet is None or self.sheet_rows == self.max_rows:
+                    self.start_sheet()
+                taken, rows = rows[:self.max_rows - self.sheet_rows], rows[self.max_rows - self.sheet_rows:]
+                self.sheet.write("".join(taken).encode("utf-8"))
+                self.sheet_rows += len(taken)
+                self.rows += len(taken)
+
+    def close(self):
+        """Finish the last sheet (a header-only one if no rows were written) and the workbook parts."""
+        if self.archive is None:
+            return
+        if self.sheet is None:
+            self.start_sheet()
+        self.sheet.write(SHEET_END_XML.encode("utf-8"))
+        self.sheet.close()
+
+        indices = range(1, len(self.sheet_names) + 1)
+        sheets = "".join(WORKBOOK_SHEET.format(name=escape(name, {'"': "&quot;"}), index=index) for name, index in zip(self.sheet_names, indices))
+        self.archive.writestr("[Content_Types].xml", CONTENT_TYPES_XML.format(sheets="".join(SHEET_CONTENT_TYPE.format(index=index) for index in indices)))
+        self.archive.writestr("_rels/.rels", ROOT_RELS_XML)
+        self.archive.writestr("xl/workbook.xml", WORKBOOK_XML.format(sheets=sheets))
+        self.archive.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML.format(
+            sheets="".join(WORKBOOK_SHEET_REL.format(index=index) for index in indices), styles=len(self.sheet_names) + 1))
+        self.archive.writestr("xl/styles.xml", STYLES_XML)
+        self.archive.close()
+        self.archive = None
+
+# ========== Formats ==========
+def iter_frames(table):
+    """A table as an iterable of DataFrames."""
+    return [table] if isinstance(table, pd.DataFrame) else table
+
+def write_xlsx(table, output_path):
+    with XlsxWriter(output_path) as writer:
+        for frame in iter_frames(table):
+            writer.write(frame)
+    return writer.rows
+
+def write_csv(table, output_path):
+    rows = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        for frame in iter_frames(table):
+            frame.to_csv(f, index=False, header=rows == 0)
+            rows += len(frame)
+    return rows
+
+def write_parquet(table, output_path):
+    import pyarrow.parquet as pq
+
+    rows = 0
+    writer = None
+    try:
+        for frame in iter_frames(table):
+            # Every frame's dictionary columns get the same index width, however many categories it has
+            frame_table = arrow_table(frame)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, frame_table.schema)
+            writer.write_table(frame_table)
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+# Output format -> writer(table, output path) returning the rows written
+FORMAT_WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+def write_report(table, output_path, output_format=None):
+    """
+    Write a table (a DataFrame, or an iterable of DataFrames streamed one
+    after the other) to output_path as "xlsx", "csv" or "parquet" (None =
+    from the file suffix). Returns the number of rows written.
+    """
+    output_format = output_format or Path(output_path).suffix.lstrip(".").lower()
+    if output_format not in FORMAT_WRITERS:
+        raise ValueError(f"Unknown report format {output_format!r}, expected one of {list(FORMAT_WRITERS)}")
+    return FORMAT_WRITERS[output_format](table, output_path)
+
+def write_reports(reports, output_format=None, workers=EXPORT_WORKERS):
+    """
+    Write every {output path: table} of `reports` with write_report(), up to
+    `workers` at once in threads (compression, Parquet encoding and the file
+    writes release the GIL). Returns {output path: rows written}.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(reports)))) as pool:
+        futures = {output_path: pool.submit(write_report, table, output_path, output_format) for output_path, table in reports.items()}
+        return {output_path: future.result() for output_path, future in futures.items()}
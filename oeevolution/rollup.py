@@ -0,0 +1,294 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import instrument
+from .ideal_times import IdealTimes
+from .log_store import check_columns, read_log_store
+from .log_triggers import CYCLE_CUT_TEXT, CYCLE_START_TEXT, CYCLE_STOP_TEXT, MARKING_COMPLETED_PATTERN
+from .tables import base_statuses, extract_number_of_products_table, split_status_intervals
+
+# ========== CONFIG ==========
+STATUS_COLUMNS = ["Productive", "Idle", "Standby", "Downtime", "Off"]
+CYCLE_COLUMNS = ["Cycles", "Number_of_Units", "Cycle_Duration"]
+ROLLUP_COLUMNS = ["Event_Time", "Log Message", "Product_ID", "Status"]  # store columns the rollup reads
+
+# ========== Store Partitions ==========
+def partition_rows(store_path):
+    """{"YYYY-MM-DD": rows} of every Date partition of the store, from the Parquet footers only."""
+    import pyarrow.parquet as pq
+
+    rows = {}
+    for partition in sorted(Path(store_path).glob("Date=*")):
+        rows[partition.name[len("Date="):]] = sum(pq.read_metadata(part).num_rows for part in partition.glob("*.parquet"))
+    return rows
+
+def open_cycle_of(df):
+    """
+    Cycle still open after the last line of `df` (same rules as
+    extract_number_of_products_table): (start Event_Time, Product_ID, units
+    marked so far), or None if no "Start Mark!" followed the last closing line.
+    """
+    messages = df["Log Message"]
+    is_end = (messages.str.contains(CYCLE_CUT_TEXT, regex=False) | messages.str.contains(CYCLE_STOP_TEXT, regex=False)).to_numpy()
+    ends = np.flatnonzero(is_end)
+    after = ends[-1] + 1 if len(ends) else 0
+    tail = df.iloc[after:]
+    starts = np.flatnonzero(tail["Log Message"].str.contains(CYCLE_START_TEXT, regex=False).to_numpy())
+    if not len(starts):
+        return None
+    units = int(tail["Log Message"].iloc[starts[0] + 1:].str.contains(MARKING_COMPLETED_PATTERN).sum())
+    return tail["Event_Time"].iloc[starts[0]], tail["Product_ID"].iloc[starts[0]], units
+
+def open_cycle_rows(open_cycle):
+    """
+    Lines that reopen a carried cycle in front of the next batch of lines: its
+    "Start Mark!" line plus one marking line per unit already counted.
+    """
+    start_time, product_id, units = open_cycle
+    return pd.DataFrame({
+        "Event_Time": np.full(1 + units, start_time, dtype="datetime64[s]"),
+        "Log Message": [CYCLE_START_TEXT] + ["(0)Marking Completed(0ms)"] * units,
+        "Product_ID": [product_id] * (1 + units),
+    })
+
+# ========== Rollup Cube ==========
+class Rollup:
+    """
+    Pre-aggregated OEE cube of one machine's Parquet store:
+    - status: seconds per Date x Product_ID x base Status (each line's status lasts
+      until the next line and is split at midnight, like generate_daily_status_table)
+    - cycles: Cycles, Number_of_Units and Cycle_Duration per Date x Product_ID (the
+      cycles of extract_number_of_products_table, by the Date they started)
+    - ideal_times: the per-product IdealTimes of every cycle seen
+
+    It is built once from the store and then only folds in the rows added
+    since the last update, so date-range and product queries are answered from
+    a few thousand cube rows instead of re-aggregating the whole log.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.status = pd.DataFrame({"Date": pd.Series(dtype="datetime64[s]"), "Product_ID": pd.Series(dtype=object),
+                                    "Status": pd.Series(dtype=object), "Seconds": pd.Series(dtype=float)})
+        self.cycles = pd.DataFrame({"Date": pd.Series(dtype="datetime64[s]"), "Product_ID": pd.Series(dtype=object),
+                                    "Cycles": pd.Series(dtype=np.int64), "Number_of_Units": pd.Series(dtype=np.int64),
+                                    "Cycle_Duration": pd.Series(dtype=float)})
+        self.ideal_times = IdealTimes()
+        # Where the last update stopped: rows folded in per Date partition, the last line
+        # (whose status interval is still open) and the cycle in progress
+        self.rows = {}
+        self.last_line = None  # (Event_Time, base status, Product_ID)
+        self.last_ties = 0     # lines of the last Date with the same Event_Time as the last line
+        self.open_cycle = None
+
+    # ----- Updating -----
+    def add_rows(self, df):
+        """Fold the next lines of the log (sorted by Event_Time, following the rows already added) into the cube."""
+        if df.empty:
+            return
+
+        # Lines sharing the last Event_Time, needed to check the next update's rows still follow on
+        new_times = df["Event_Time"].to_numpy()
+        last_ties = int((new_times == new_times[-1]).sum())
+        if last_ties == len(df) and self.last_line is not None and self.last_line[0] == new_times[-1]:
+            last_ties += self.last_ties
+
+        # Status seconds, starting with the interval of the last line already added
+        times = new_times
+        statuses = base_statuses(df["Status"])
+        products = df["Product_ID"].to_numpy(dtype=object)
+        if self.last_line is not None:
+            last_time, last_status, last_product = self.last_line
+            times = np.concatenate(([np.datetime64(last_time, "s")], times))
+            statuses = np.concatenate(([last_status], statuses))
+            products = np.concatenate(([last_product], products))
+        piece, day, seconds = split_status_intervals(times)
+        status = pd.DataFrame({"Date": day.astype("datetime64[s]"), "Product_ID": products[piece], "Status": statuses[piece], "Seconds": seconds})
+        status = status.groupby(["Date", "Product_ID", "Status"], sort=False, as_index=False)["Seconds"].sum()
+        self.status = self.sum_into(self.status, status, ["Date", "Product_ID", "Status"])
+
+        # Cycles, reopening the cycle left open by the last update
+        lines = df[["Event_Time", "Log Message", "Product_ID"]]
+        if self.open_cycle is not None:
+            lines = pd.concat([open_cycle_rows(self.open_cycle), lines.astype({"Log Message": object, "Product_ID": object})], ignore_index=True)
+        cycle_table = extract_number_of_products_table(lines, self.ideal_times)
+        cycles = cycle_table.groupby([pd.to_datetime(cycle_table["Date"]).astype("datetime64[s]"), cycle_table["Product_ID"].astype(object)], sort=False).agg(
+            Cycles=("Cycle_Duration", "size"),
+            Number_of_Units=("Number_of_Units", "sum"),
+            Cycle_Duration=("Cycle_Duration", "sum"),
+        ).reset_index()
+        self.cycles = self.sum_into(self.cycles, cycles, ["Date", "Product_ID"])
+        self.open_cycle = open_cycle_of(lines)
+
+        self.last_line = (times[-1], statuses[-1], products[-1])
+        self.last_ties = last_ties
+
+    @staticmethod
+    def sum_into(cube, partial, keys):
+        if cube.empty:
+            return partial.sort_values(keys, ignore_index=True)
+        return pd.concat([cube, partial], ignore_index=True).groupby(keys, sort=True, as_index=False).sum()
+
+    def update(self, store_path):
+        """
+        Fold in the rows added to the store since the last update (everything
+        on the first call). If earlier rows changed (a Date partition before
+        the last one has a different row count, or new lines sorted in before
+        the last line), the cube is rebuilt from scratch. Returns the rows added.
+        """
+        stored = partition_rows(store_path)
+        last_date = max(self.rows, default=None)
+        if last_date is not None and (any(stored.get(date) != rows for date, rows in self.rows.items() if date != last_date)
+                                      or any(date < last_date for date in stored if date not in self.rows)):
+            self.clear()
+            last_date = None
+
+        added = 0
+        for date, rows in stored.items():
+            if last_date is not None and date < last_date:
+                continue
+            skip = self.rows.get(date, 0)
+            if rows == skip:
+                continue
+            df = read_log_store(store_path, ROLLUP_COLUMNS, date, date)
+            if skip:
+                # The rows already added must still come first, followed by the new ones
+                last_time = np.datetime64(self.last_line[0], "s")
+                times = df["Event_Time"].to_numpy()
+                if rows < skip or (times < last_time).sum() != skip - self.last_ties or times[skip - 1] != last_time:
+                    self.clear()
+                    return self.update(store_path)
+                df = df.iloc[skip:]
+            with instrument.stage("rollup", rows=len(df)):
+                self.add_rows(df)
+            self.rows[date] = rows
+            added += len(df)
+        return added
+
+    # ----- Queries -----
+    @staticmethod
+    def select(cube, date_from=None, date_to=None, products=None):
+        keep = np.ones(len(cube), dtype=bool)
+        if date_from is not None:
+            keep &= (cube["Date"] >= pd.Timestamp(date_from)).to_numpy()
+        if date_to is not None:
+            keep &= (cube["Date"] <= pd.Timestamp(date_to)).to_numpy()
+        if products is not None:
+            keep &= cube["Product_ID"].isin(list(products)).to_numpy()
+        return cube[keep]
+
+    def status_hours(self, date_from=None, date_to=None, products=None, by=("Date",)):
+        """
+        Hours in each base status within [date_from, date_to] ("YYYY-MM-DD",
+        inclusive; None = open-ended) for the given Product_IDs (None = all),
+        grouped by `by` (any of "Date", "Product_ID"; empty = one total row).
+        """
+        by = list(by)
+        status = self.select(self.status, date_from, date_to, products)
+        if by:
+            seconds = status.groupby([*by, "Status"], sort=True)["Seconds"].sum().unstack("Status")
+        else:
+            seconds = status.groupby("Status")["Seconds"].sum().to_frame().T
+        table = (seconds.reindex(columns=STATUS_COLUMNS).fillna(0.0) / 3600).round(4).rename_axis(columns=None)
+        return self.with_dates(table.reset_index(drop=not by))
+
+    def cycle_totals(self, date_from=None, date_to=None, products=None, by=("Date", "Product_ID")):
+        """
+        Cycles, units, cycle time and ideal cycle time (seconds, with the current
+        ideal unit time of each product) within the dates / products, grouped by `by`.
+        """
+        cycles = self.select(self.cycles, date_from, date_to, products).copy()
+        cycles["Ideal_Cycle_Time"] = cycles["Product_ID"].map(self.ideal_times.ideal_unit_times()).astype(float) * cycles["Number_of_Units"]
+        columns = [*CYCLE_COLUMNS, "Ideal_Cycle_Time"]
+        if not by:
+            return cycles[columns].sum(min_count=1).to_frame().T
+        return self.with_dates(cycles.groupby(list(by), sort=True)[columns].sum(min_count=1).reset_index())
+
+    def oee(self, date_from=None, date_to=None, products=None, by=("Date",)):
+        """
+        Status hours, cycle totals and OEE = Availability x Performance x Quality
+        (as in live.LiveOEE) within the dates / products, grouped by `by`.
+        """
+        status = self.status_hours(date_from, date_to, products, by)
+        cycles = self.cycle_totals(date_from, date_to, products, by)
+        if by:
+            table = status.merge(cycles, on=list(by), how="outer").sort_values(list(by), ignore_index=True)
+        else:
+            table = pd.concat([status, cycles], axis=1)
+        table[STATUS_COLUMNS] = table[STATUS_COLUMNS].fillna(0.0)
+        table[["Cycles", "Number_of_Units"]] = table[["Cycles", "Number_of_Units"]].fillna(0).astype(np.int64)
+        table["Cycle_Duration"] = table["Cycle_Duration"].fillna(0.0)
+
+        planned = table[["Productive", "Idle", "Standby", "Downtime"]].sum(axis=1)
+        productive_seconds = table["Productive"] * 3600
+        table["Availability"] = (table["Productive"] / planned).where(planned > 0)
+        table["Performance"] = (table["Ideal_Cycle_Time"] / productive_seconds).clip(upper=1.0).where(productive_seconds > 0)
+        table["Quality"] = 1.0
+        table["OEE"] = table["Availability"] * table["Performance"] * table["Quality"]
+        return table
+
+    @staticmethod
+    def with_dates(table):
+        if "Date" in table.columns:
+            table["Date"] = pd.DatetimeIndex(table["Date"]).date
+        return table
+
+    # ----- Saving -----
+    def save(self, rollup_dir):
+        """Write the cube (Parquet) and where the last update stopped (state.json) to rollup_dir."""
+        rollup_dir = Path(rollup_dir)
+        rollup_dir.mkdir(parents=True, exist_ok=True)
+        self.status.to_parquet(rollup_dir / "status.parquet", index=False)
+        self.cycles.to_parquet(rollup_dir / "cycles.parquet", index=False)
+        timestamp = lambda value: str(np.datetime64(value, "s"))
+        state = {
+            "rows": self.rows,
+            "last_line": None if self.last_line is None else [timestamp(self.last_line[0]), str(self.last_line[1]), str(self.last_line[2])],
+            "last_ties": self.last_ties,
+            "open_cycle": None if self.open_cycle is None else [timestamp(self.open_cycle[0]), str(self.open_cycle[1]), self.open_cycle[2]],
+            "ideal_times": self.ideal_times.to_dict(),
+        }
+        with open(rollup_dir / "state.json", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, rollup_dir):
+        """Rollup saved in rollup_dir, or an empty one if there is none yet."""
+        rollup_dir = Path(rollup_dir)
+        rollup = cls()
+        if not (rollup_dir / "state.json").exists():
+            return rollup
+        with open(rollup_dir / "state.json", "r", encoding="utf-8") as f:
+            state = json.load(f)
+        rollup.status = pd.read_parquet(rollup_dir / "status.parquet").astype({"Date": "datetime64[s]"})
+        rollup.cycles = pd.read_parquet(rollup_dir / "cycles.parquet").astype({"Date": "datetime64[s]"})
+        rollup.rows = state["rows"]
+        if state["last_line"] is not None:
+            last_time, last_status, last_product = state["last_line"]
+            rollup.last_line = (np.datetime64(last_time, "s"), last_status, last_product)
+        rollup.last_ties = state["last_ties"]
+        if state["open_cycle"] is not None:
+            start_time, product_id, units = state["open_cycle"]
+            rollup.open_cycle = (np.datetime64(start_time, "s"), product_id, units)
+        rollup.ideal_times = IdealTimes.from_dict(state["ideal_times"])
+        return rollup
+
+def update_rollup(store_path, rollup_dir, rebuild=False):
+    """
+    Load the rollup kept in rollup_dir (or start one), fold in the store's new
+    rows and save it. Returns the Rollup. Raises log_store.MissingColumnsError,
+    before anything is changed, for a store without the Log Message column.
+    """
+    check_columns(store_path, {"rollup": ROLLUP_COLUMNS})
+    if rebuild and Path(rollup_dir).exists():
+        shutil.rmtree(rollup_dir)
+    rollup = Rollup.load(rollup_dir)
+    rollup.update(store_path)
+    rollup.save(rollup_dir)
+    return rollup
@@ -0,0 +1,214 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from .ideal_times import IdealTimes
+from .log_triggers import CYCLE_CUT_TEXT, CYCLE_START_TEXT, CYCLE_STOP_TEXT, MARKING_COMPLETED_PATTERN
+
+# ========== Function to Produce Product_ID_Name Table ==========
+def product_of_line(line):
+    """
+    (Product Name, Product_ID) of a line containing 'SetFileName', else None.
+    A Product ID is defined as any continuous 8-digit number within the line.
+    """
+    line = line.strip()
+    if not line or "SetFileName" not in line:
+        return None
+
+    current_product = line.split("SetFileName File:")[-1].strip()
+    current_product_name = current_product.split("\\")[-1]
+
+    # ✅ Match any sequence of 8 digits anywhere in the line
+    product_id_match = re.search(r"\d{8}", line)
+    if product_id_match:
+        current_product_id = product_id_match.group(0)
+    else:
+        current_product_id = "99999999"
+    return current_product_name, current_product_id
+
+def product_table(product_lines):
+    """Product_Name_ID_Table from {(Product Name, Product_ID): first original line}, in order of first appearance."""
+    result_df = pd.DataFrame({
+        "Original Line": list(product_lines.values()),
+        "Product Name": [name for name, _ in product_lines],
+        "Product_ID": [product_id for _, product_id in product_lines]
+    }).drop_duplicates().sort_values(by="Product_ID").reset_index(drop=True)
+
+    return result_df
+
+def extract_unique_products_from_df(df):
+    """
+    Extracts unique product entries from 'Log Message' column.
+    A Product ID is defined as any continuous 8-digit number within a line containing 'SetFileName'.
+    Returns a DataFrame with 'Original Line', 'Product Name', and 'Product_ID'.
+    """
+    product_lines = {}
+
+    # Each distinct message only needs checking once (in order of first appearance)
+    for line in df["Log Message"].unique():
+        product_key = product_of_line(line)
+        if product_key is not None and product_key not in product_lines:
+            product_lines[product_key] = line.strip()
+
+    return product_table(product_lines)
+
+
+
+# ========== Function to Produce Product_Output Table ==========
+def extract_number_of_products_table(df: pd.DataFrame, ideal_times=None) -> pd.DataFrame:
+    """
+    Extracts a table that summarizes product marking cycles from a detailed log DataFrame.
+    This includes timing information for each 'Start Mark!' cycle, number of units, and ideal cycle times.
+    If an ideal_times.IdealTimes is given (e.g. kept from earlier days or other machines),
+    the new cycles are added to it and the ideal times come from the merged history.
+
+    A cycle opens at the first 'Start Mark!' after the previous 'Successfully Cutting' /
+    'Stop PLC!' line and closes at the next one; all lines are flagged with vectorized
+    string checks instead of walking the rows one by one.
+    """
+    timestamps = df["Event_Time"].to_numpy()
+    # Cycles are timed by time of day, like the original row loop: a cycle left open
+    # at the end of a file still pairs with the next closing line, even on a later
+    # day, but is only kept if that line's time of day is after the start's (and its
+    # duration then ignores the dates)
+    times_of_day = timestamps - timestamps.astype("datetime64[D]")
+    messages = df["Log Message"]
+
+    # Flag the lines that open, close and count a cycle
+    is_start = messages.str.contains(CYCLE_START_TEXT, regex=False).to_numpy()
+    is_cut = messages.str.contains(CYCLE_CUT_TEXT, regex=False).to_numpy()
+    is_stop = messages.str.contains(CYCLE_STOP_TEXT, regex=False).to_numpy()
+    is_marked = messages.str.contains(MARKING_COMPLETED_PATTERN).to_numpy()
+    is_end = is_cut | is_stop
+
+    # Cycle id of each line = number of closing lines before it
+    cycle_ids = np.concatenate(([0], np.cumsum(is_end[:-1])))
+
+    # The first "Start Mark!" of a cycle id opens it, later ones are part of the same cycle;
+    # the closing line of cycle id k is the k-th closing line
+    start_rows = np.flatnonzero(is_start)
+    opened_ids, first = np.unique(cycle_ids[start_rows], return_index=True)
+    start_rows = start_rows[first]
+    end_rows = np.flatnonzero(is_end)
+    closed = opened_ids < len(end_rows)
+    start_rows = start_rows[closed]
+    end_rows = end_rows[opened_ids[closed]]
+    closed = end_rows > start_rows
+    start_rows, end_rows = start_rows[closed], end_rows[closed]
+
+    # Units marked after the start line, up to a "Stop PLC!" closing line (inclusive)
+    marked_before = np.cumsum(is_marked)
+    marking_count = marked_before[end_rows - 1] - marked_before[start_rows]
+    marking_count += is_marked[end_rows] & ~is_cut[end_rows]
+
+    # "Stop PLC!" only ends a cycle that marked something
+    complete = (is_cut[end_rows] | (marking_count > 0)) & (times_of_day[end_rows] > times_of_day[start_rows])
+    start_rows, end_rows, marking_count = start_rows[complete], end_rows[complete], marking_count[complete]
+    cycle_duration = (times_of_day[end_rows] - times_of_day[start_rows]) / np.timedelta64(1, "s")
+
+    result_df = cycle_table(timestamps[start_rows], timestamps[end_rows], df["Product_ID"].to_numpy()[start_rows],
+                            cycle_duration, marking_count)
+
+    # ---- Add Ideal Unit Time and Ideal Cycle Time ----
+    # Per-product sketches of the positive unit durations; the ideal unit time is the
+    # fastest unit at or below the 25% quantile (see ideal_times.UnitTimeSketch)
+    if ideal_times is None:
+        ideal_times = IdealTimes()
+    ideal_times.add_cycles(result_df["Product_ID"].to_numpy(), result_df["Unit_Duration"].to_numpy())
+    return with_ideal_times(result_df, ideal_times)
+
+def cycle_table(start_time, end_time, product_ids, cycle_duration, marking_count):
+    """
+    Number_of_Products_Table rows (without the ideal times) from the finished
+    cycles' start / end Event_Time, Product_ID, duration (seconds) and units.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit_duration = np.where(marking_count > 0, cycle_duration / marking_count, np.nan)
+
+    result_df = pd.DataFrame({
+        "Date": pd.DatetimeIndex(start_time).date,
+        "Product_ID": product_ids,
+        "Cycle_Start_Time": pd.DatetimeIndex(start_time).time,
+        "Cycle_End_Time": pd.DatetimeIndex(end_time).time,
+        "Cycle_Duration": cycle_duration,
+        "Number_of_Units": marking_count.astype(np.int64),
+        "Unit_Duration": unit_duration,
+    })
+    return result_df
+
+def with_ideal_times(result_df, ideal_times):
+    """Add each cycle's Ideal_Unit_Time and Ideal_Cycle_Time from an IdealTimes that already holds its cycles."""
+    result_df["Ideal_Unit_Time"] = result_df["Product_ID"].map(ideal_times.ideal_unit_times()).astype(float)
+    result_df["Ideal_Cycle_Time"] = result_df["Ideal_Unit_Time"] * result_df["Number_of_Units"]
+
+    return result_df
+
+# ========== Function to Produce Status Table ==========
+
+def split_status_intervals(start):
+    """
+    Split the status interval of every line (from its Event_Time `start` to the next
+    line's) into one piece per calendar day it touches, including days without any
+    log lines. Returns (line index, day, seconds) arrays with one entry per piece.
+    """
+    # Each status lasts until the next line's time; the last line has no duration
+    end = np.concatenate((start[1:], start[-1:]))
+    end = np.maximum(end, start)
+
+    # Split every interval into one piece per calendar day it touches
+    first_day = start.astype("datetime64[D]")
+    last_day = end.astype("datetime64[D]")
+    days_touched = (last_day - first_day).astype(np.int64) + 1
+    piece = np.repeat(np.arange(len(start)), days_touched)
+    day_offset = np.arange(len(piece)) - np.repeat(np.cumsum(days_touched) - days_touched, days_touched)
+    day = first_day[piece] + day_offset
+    piece_start = np.maximum(start[piece], day)
+    piece_end = np.minimum(end[piece], day + np.timedelta64(1, "D"))
+    seconds = (piece_end - piece_start) / np.timedelta64(1, "s")
+    return piece, day, seconds
+
+def base_statuses(status):
+    """Status labels in base form ("Start X" / "End X" -> "X") as an array."""
+    return status.str.replace(r"^(Start |End )", "", regex=True).to_numpy()
+
+def generate_daily_status_table(df):
+    """
+    Hours spent per day in each base status (Productive, Idle, Standby, Downtime, Off).
+    Each line's status lasts until the next line. Intervals that cross midnight are split
+    over every day they touch (including days without any log lines) with array
+    operations, instead of expanding rows one by one.
+    """
+    # Normalize status to base form
+    statuses = base_statuses(df["Status"])
+    piece, day, seconds = split_status_intervals(df["Event_Time"].to_numpy())
+
+    # Build final table
+    status_df = pd.DataFrame({"Date": day, "Status": statuses[piece], "Seconds": seconds})
+    pivot = status_df.pivot_table(index="Date", columns="Status", values="Seconds", aggfunc="sum").fillna(0)
+
+    # Convert seconds to hours
+    pivot = pivot / 3600
+    pivot = pivot.round(4)
+
+    # Ensure all expected statuses are present
+    for col in ["Productive", "Idle", "Standby", "Downtime", "Off"]:
+        if col not in pivot.columns:
+            pivot[col] = 0.0
+
+    # Reorder columns
+    pivot = pivot[["Productive", "Idle", "Standby", "Downtime", "Off"]]
+    pivot.index = pivot.index.date
+
+    # Reset index for final output
+    pivot = pivot.rename_axis("Date").reset_index()
+
+    return pivot
+
+# ========== Table Registry ==========
+# Table name -> (output file stem, builder, store columns the builder reads)
+TABLES = {
+    "products": ("Product_Name_ID_Table", extract_unique_products_from_df, ["Log Message"]),
+    "cycles": ("Number_of_Products_Table", extract_number_of_products_table, ["Event_Time", "Log Message", "Product_ID"]),
+    "daily_status": ("Daily_Status_Table", generate_daily_status_table, ["Event_Time", "Status"]),
+}
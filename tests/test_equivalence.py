@@ -0,0 +1,394 @@
+"""
+Equivalence checks on deterministic synthetic logs (see benchmarks/synthetic_logs.py):
+every way of parsing and storing a log folder must give the rows of the
+original Dataframe.py loop (baseline_entries below), row for row. A small
+hand-written folder pins those rows down explicitly.
+
+Usage: python -m pytest tests
+"""
+import re
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from oeevolution.log_incremental import ingest_incremental, stored_rows
+from oeevolution.log_parser import COLUMNS, find_log_files, iter_log_chunks, iter_log_rows, iter_parsed_files
+from oeevolution.log_schema import STATUS_DTYPE
+from oeevolution.log_store import read_log_store, write_log_store
+from oeevolution.pipeline import build_store, export_tables, parse_logs
+from oeevolution.prefetch import iter_prefetched, read_log_file
+from oeevolution.report_writer import write_report
+from oeevolution.rollup import update_rollup
+
+from synthetic_logs import generate_logs
+
+# ========== CONFIG ==========
+DAYS = 6
+LINES_PER_DAY = 800
+CHUNK_ROWS = 97  # small, so chunk boundaries fall inside files
+
+# ========== Baseline: the original Dataframe.py loop ==========
+def baseline_entries(folder):
+    """
+    The rows the original Dataframe.py loop built (before its final sort), as
+    (Date, Seconds, Log Message, Product, Product_ID, Status) tuples.
+    """
+    def base_status_of(label):
+        if label.startswith("Start "):
+            return label.replace("Start ", "")
+        if label.startswith("End "):
+            return label.replace("End ", "")
+        return label
+
+    def end_previous_status(entries):
+        if entries:
+            last_base = base_status_of(entries[-1][5])
+            if last_base in ["Productive", "Idle", "Standby"]:
+                entries[-1][5] = f"End {last_base}"
+
+    entries = []
+    last_product = ""
+    last_product_id = "99999999"
+    global_base_status = "Standby"
+    for log_file in sorted(Path(folder).glob("*.log")):
+        with open(log_file, "r", encoding="latin-1", errors="ignore") as f:
+            lines = f.readlines()
+        current_base_status = global_base_status
+        current_product = last_product
+        current_product_id = last_product_id
+
+        for raw_line in lines:
+            match = re.match(r"(\d{2}:\d{2}:\d{2}):(.*)", raw_line.strip())
+            if not match:
+                continue
+            timestamp_str, message = match.groups()
+
+            if "SetFileName File:" in message:
+                current_product = message.split("SetFileName File:")[-1].strip()
+                last_product = current_product
+                pid_match = re.search(r"[/\\](\d{8})[_-]", current_product)
+                if pid_match:
+                    current_product_id = pid_match.group(1)
+                    last_product_id = current_product_id
+                else:
+                    current_product_id = "99999999"
+
+            line_lower = message.lower()
+            backup_status = current_base_status
+            if "****************close software***************" in line_lower:
+                new_label = current_base_status = "Off"
+            elif "|*************start pcb*************|" in line_lower:
+                if entries and base_status_of(entries[-1][5]) == "Off":
+                    new_label = current_base_status = "Standby"
+                else:
+                    new_label = backup_status
+            elif "(0)--start mark!--" in line_lower:
+                if backup_status != "Downtime":
+                    end_previous_status(entries)
+                new_label, current_base_status = "Start Productive", "Productive"
+            elif "successfully cutting" in line_lower and backup_status == "Productive":
+                new_label, current_base_status = "End Productive", "Standby"
+            elif "(0)stop plc!" in line_lower or "the software stop button is pressed" in line_lower:
+                if backup_status != "Downtime":
+                    end_previous_status(entries)
+                new_label, current_base_status = "Start Idle", "Idle"
+            elif "alarm" in line_lower and "reset" in line_lower and backup_status == "Idle":
+                new_label, current_base_status = "End Idle", "Standby"
+            elif "start procession" in line_lower and "manufacture" in line_lower:
+                if backup_status != "Downtime":
+                    end_previous_status(entries)
+                new_label, current_base_status = "Start Standby", "Standby"
+            elif "err:" in line_lower:
+                new_label, current_base_status = "Downtime", backup_status
+            else:
+                new_label = backup_status
+
+            hours, minutes, seconds = map(int, timestamp_str.split(":"))
+            entries.append([log_file.stem, hours * 3600 + minutes * 60 + seconds, message.strip(),
+                            current_product, current_product_id, new_label])
+
+        global_base_status = current_base_status
+    return [tuple(entry) for entry in entries]
+
+# Three days that carry a Productive status and the product across midnight,
+# end on Close Software, and fall back to the last 8-digit product id
+CARRY_OVER_LOGS = {
+    "2024.03.04.log": [
+        "08:00:00:|*************Start PCB*************|",
+        "08:00:05:SetFileName File: D:\\Production Program\\12345678_CTRL_Rev1.prg",
+        "08:00:10:----Start Procession: Manufacture----",
+        "08:01:00:(0)--Start Mark!--",
+        "08:01:05:(0)Marking Completed(1200ms)",
+        "08:01:09:Successfully Cutting",
+        "23:59:50:(0)--Start Mark!--",
+        "23:59:58:(0)Marking Completed(900ms)",
+    ],
+    "2024.03.05.log": [
+        "00:00:03:(0)Marking Completed(1100ms)",
+        "00:00:07:Successfully Cutting",
+        "00:05:00:(0)Stop PLC!",
+        "00:06:00:Alarm reset",
+        "00:07:00:(0)Failed Waiting for PCB To Be in Place(Err:32)",
+        "00:08:00:SetFileName File: D:\\Production Program\\NoIdBoard.prg",
+        "00:08:30:****************Close Software***************",
+    ],
+    "2024.03.06.log": [
+        "",
+        "not a log line",
+        "06:00:00:|*************Start PCB*************|",
+        "06:00:10:Camera grab ok",
+        "06:01:00:The Software Stop Button is Pressed",
+        "06:02:00:alarm RESET",
+    ],
+}
+CTRL = "D:\\Production Program\\12345678_CTRL_Rev1.prg"
+NO_ID = "D:\\Production Program\\NoIdBoard.prg"
+CARRY_OVER_ROWS = [
+    ("2024.03.04", 28800, "|*************Start PCB*************|", "", "99999999", "Standby"),
+    ("2024.03.04", 28805, f"SetFileName File: {CTRL}", CTRL, "12345678", "End Standby"),
+    ("2024.03.04", 28810, "----Start Procession: Manufacture----", CTRL, "12345678", "End Standby"),
+    ("2024.03.04", 28860, "(0)--Start Mark!--", CTRL, "12345678", "Start Productive"),
+    ("2024.03.04", 28865, "(0)Marking Completed(1200ms)", CTRL, "12345678", "Productive"),
+    ("2024.03.04", 28869, "Successfully Cutting", CTRL, "12345678", "End Productive"),
+    ("2024.03.04", 86390, "(0)--Start Mark!--", CTRL, "12345678", "Start Productive"),
+    ("2024.03.04", 86398, "(0)Marking Completed(900ms)", CTRL, "12345678", "Productive"),
+    ("2024.03.05", 3, "(0)Marking Completed(1100ms)", CTRL, "12345678", "Productive"),
+    ("2024.03.05", 7, "Successfully Cutting", CTRL, "12345678", "End Productive"),
+    ("2024.03.05", 300, "(0)Stop PLC!", CTRL, "12345678", "Start Idle"),
+    ("2024.03.05", 360, "Alarm reset", CTRL, "12345678", "End Idle"),
+    ("2024.03.05", 420, "(0)Failed Waiting for PCB To Be in Place(Err:32)", CTRL, "12345678", "Downtime"),
+    ("2024.03.05", 480, f"SetFileName File: {NO_ID}", NO_ID, "99999999", "Standby"),
+    ("2024.03.05", 510, "****************Close Software***************", NO_ID, "99999999", "Off"),
+    ("2024.03.06", 21600, "|*************Start PCB*************|", NO_ID, "12345678", "Standby"),
+    ("2024.03.06", 21610, "Camera grab ok", NO_ID, "12345678", "End Standby"),
+    ("2024.03.06", 21660, "The Software Stop Button is Pressed", NO_ID, "12345678", "Start Idle"),
+    ("2024.03.06", 21720, "alarm RESET", NO_ID, "12345678", "End Idle"),
+]
+
+# ========== Helpers ==========
+def parsed_rows(folder, **kwargs):
+    rows = []
+    for chunk in iter_log_chunks(folder, chunk_rows=CHUNK_ROWS, **kwargs):
+        rows.extend(zip(*(chunk[column] for column in COLUMNS)))
+    return rows
+
+def store_frame(store_path):
+    """The stored rows, with the categoricals as plain values (their category order may differ)."""
+    return read_log_store(store_path).astype(object)
+
+def store_layout(store_path):
+    return sorted(part.relative_to(store_path).as_posix() for part in Path(store_path).rglob("*.*"))
+
+def complete_lines(folder, copy_dir):
+    """A copy of `folder` without the unterminated line a machine may still be writing to its last file."""
+    shutil.rmtree(copy_dir, ignore_errors=True)
+    shutil.copytree(folder, copy_dir)
+    last = sorted(Path(copy_dir).glob("*.log"))[-1]
+    data = last.read_bytes()
+    last.write_bytes(data[:data.rfind(b"\n") + 1])
+    return copy_dir
+
+@pytest.fixture(scope="module")
+def log_dir(tmp_path_factory):
+    """
+    Synthetic day files plus the edge cases the stitching has to carry state
+    across: an empty file, a noise-only file and a last line without newline.
+    """
+    log_dir = tmp_path_factory.mktemp("logs")
+    log_files = generate_logs(log_dir, days=DAYS, lines_per_day=LINES_PER_DAY, products=3)
+    (log_dir / "2024.01.06.log").write_bytes(b"")  # Saturday, skipped by the generator
+    (log_dir / "2024.01.07.log").write_bytes(b"10:00:00:Camera grab ok\r\n10:00:05:Table vacuum on\r\n")
+    last = log_files[-1]
+    last.write_bytes(last.read_bytes().rstrip(b"\r\n"))
+    return log_dir
+
+@pytest.fixture(scope="module")
+def carry_over_dir(tmp_path_factory):
+    carry_over_dir = tmp_path_factory.mktemp("carry_over")
+    for name, lines in CARRY_OVER_LOGS.items():
+        (carry_over_dir / name).write_bytes(("\r\n".join(lines) + "\r\n").encode("latin-1"))
+    return carry_over_dir
+
+# ========== Parsing ==========
+def test_baseline_loop_gives_carry_over_rows(carry_over_dir):
+    assert baseline_entries(carry_over_dir) == CARRY_OVER_ROWS
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_carries_state_across_files(carry_over_dir, tmp_path, workers):
+    assert parsed_rows(carry_over_dir, workers=workers) == CARRY_OVER_ROWS
+    assert parsed_rows(carry_over_dir, workers=workers, cache_dir=tmp_path) == CARRY_OVER_ROWS  # cold
+    assert parsed_rows(carry_over_dir, workers=workers, cache_dir=tmp_path) == CARRY_OVER_ROWS  # warm
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_parse_matches_serial(log_dir, workers):
+    assert parsed_rows(log_dir, workers=workers) == baseline_entries(log_dir)
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cached_parse_matches_serial(log_dir, tmp_path, workers):
+    expected = baseline_entries(log_dir)
+    assert parsed_rows(log_dir, workers=workers, cache_dir=tmp_path) == expected  # cold
+    assert parsed_rows(log_dir, workers=workers, cache_dir=tmp_path) == expected  # warm
+
+def test_cache_after_earlier_file_changes(log_dir, tmp_path):
+    work = tmp_path / "logs"
+    shutil.copytree(log_dir, work)
+    cache_dir = tmp_path / "cache"
+    parsed_rows(work, workers=1, cache_dir=cache_dir)
+
+    # Changes the status and product carried into every later file
+    first = sorted(work.glob("*.log"))[0]
+    with open(first, "ab") as f:
+        f.write(b"23:59:58:****************Close Software***************\r\n")
+        f.write(b"23:59:59:SetFileName File: D:\\Production Program\\55555555_x.prg\r\n")
+    assert parsed_rows(work, workers=2, cache_dir=cache_dir) == baseline_entries(work)
+
+def test_parallel_parse_keeps_one_file_per_worker_in_flight(log_dir):
+    class CountingExecutor(ThreadPoolExecutor):
+        submitted = 0
+
+        def submit(self, *args):
+            self.submitted += 1
+            return super().submit(*args)
+
+    log_files = find_log_files(log_dir)
+    with CountingExecutor(max_workers=2) as executor:
+        file_parses = iter_parsed_files(log_files, executor, processes=2)
+        next(file_parses)
+        # While a slow consumer holds the first parse, only the second one is under way
+        assert executor.submitted == 2 < len(log_files)
+        assert len(list(file_parses)) == len(log_files) - 1
+
+def test_cache_drops_entries_of_other_versions(log_dir, tmp_path, monkeypatch):
+    from oeevolution import parse_cache
+
+    parsed_rows(log_dir, workers=1, cache_dir=tmp_path)
+    old_entries = set(tmp_path.glob("*.pkl"))
+    assert old_entries
+
+    # A newer parser: the old pickles are removed and the size limit covers everything on disk
+    monkeypatch.setattr(parse_cache, "CACHE_VERSION", parse_cache.CACHE_VERSION + 1)
+    assert parse_cache.ParseCache(tmp_path).entries == {}
+    assert not any(tmp_path.glob("*.pkl"))
+    assert parsed_rows(log_dir, workers=1, cache_dir=tmp_path) == baseline_entries(log_dir)
+    assert {path.name for path in tmp_path.glob("*.pkl")} == {path.name for path in old_entries}
+
+def test_prefetch_reads_while_the_previous_file_is_parsed(carry_over_dir):
+    log_files = find_log_files(carry_over_dir)
+    started = [threading.Event() for _ in log_files]
+
+    def read_file(log_file):
+        started[log_files.index(log_file)].set()
+        return read_log_file(log_file)
+
+    for i, (log_file, data) in enumerate(iter_prefetched(log_files, read_ahead=1, read_file=read_file)):
+        # While file i is being "parsed", the read of file i + 1 is already under way
+        if i + 1 < len(log_files):
+            assert started[i + 1].wait(timeout=10)
+        assert data == log_file.read_bytes()
+
+    assert [tuple(row) for row in iter_log_rows(log_files, read_ahead=2)] == CARRY_OVER_ROWS
+
+# ========== Stores ==========
+def test_incremental_store_matches_full_rebuild(log_dir, tmp_path):
+    work, state, store = tmp_path / "logs", tmp_path / "state", tmp_path / "store"
+    work.mkdir()
+    for log_file in sorted(log_dir.glob("*.log")):
+        data = log_file.read_bytes()
+        # Append each file in three pieces, cut mid-line
+        offset = 0
+        for cut in (len(data) // 3, 2 * len(data) // 3, len(data)):
+            with open(work / log_file.name, "ab") as f:
+                f.write(data[offset:cut])
+            offset = cut
+            ingest_incremental(work, state, store)
+
+            rebuilt = tmp_path / "rebuilt"
+            rows = build_store(complete_lines(work, tmp_path / "complete"), rebuilt, workers=1)
+            assert stored_rows(state) == rows
+            assert store_layout(store) == store_layout(rebuilt)
+            pd.testing.assert_frame_equal(store_frame(store), store_frame(rebuilt))
+
+    assert ingest_incremental(work, state, store) == 0
+
+def test_incremental_store_rejects_a_log_file_as_folder(log_dir, tmp_path):
+    state, store = tmp_path / "state", tmp_path / "store"
+    ingest_incremental(log_dir, state, store)
+    before = store_frame(store)
+    log_file = sorted(log_dir.glob("*.log"))[0]
+    with pytest.raises(NotADirectoryError):
+        ingest_incremental(log_file, state, store)
+    with pytest.raises(NotADirectoryError):
+        ingest_incremental(log_dir, log_file, store)
+    pd.testing.assert_frame_equal(store_frame(store), before)
+
+def test_store_reads_parts_in_written_order(tmp_path):
+    # Rows that keep going back to the first day give it one part per return, here 12
+    chunks = [
+        {"Date": [date], "Seconds": [i], "Log Message": [f"line {i}"], "Product": [""], "Product_ID": ["99999999"], "Status": ["Standby"]}
+        for i in range(12) for date in ("2024.01.01", "2024.01.02")
+    ]
+    write_log_store(iter(chunks), tmp_path / "store")
+    first_day = read_log_store(tmp_path / "store", date_from="2024-01-01", date_to="2024-01-01")
+    assert list(first_day["Log Message"]) == [f"line {i}" for i in range(12)]
+
+def test_store_with_a_short_first_day(log_dir, tmp_path):
+    # A first day with few distinct messages must not narrow the dictionary indices of the later days
+    work = tmp_path / "logs"
+    shutil.copytree(log_dir, work)
+    (work / "2023.12.31.log").write_bytes(b"10:00:00:Camera grab ok\r\n10:00:05:Table vacuum on\r\n")
+    rows = build_store(work, tmp_path / "store", workers=2)
+
+    df = read_log_store(tmp_path / "store")
+    assert len(df) == rows and df["Log Message"].cat.categories.size > 128
+    assert len(read_log_store(tmp_path / "store", date_from="2024-01-02")) > 0
+    assert len(export_tables(tmp_path / "store", tmp_path / "out", output_format="csv")) == 3
+
+def test_empty_folder_gives_empty_store_and_tables(tmp_path):
+    (tmp_path / "logs").mkdir()
+    assert build_store(tmp_path / "logs", tmp_path / "store", workers=1) == 0
+    df = read_log_store(tmp_path / "store")
+    assert len(df) == 0 and df["Event_Time"].dtype == "datetime64[s]" and df["Status"].dtype == STATUS_DTYPE
+    assert len(export_tables(tmp_path / "store", tmp_path / "out", output_format="csv")) == 3
+
+    parsed = parse_logs(tmp_path / "logs", workers=1)
+    pd.testing.assert_frame_equal(parsed, df)
+
+def test_rollup_grown_file_by_file(log_dir, tmp_path):
+    work, store = tmp_path / "logs", tmp_path / "store"
+    work.mkdir()
+    for log_file in sorted(log_dir.glob("*.log")):
+        shutil.copy(log_file, work)
+        build_store(work, store, workers=1)
+        grown = update_rollup(store, tmp_path / "grown")
+
+    rebuilt = update_rollup(store, tmp_path / "rebuilt")
+    pd.testing.assert_frame_equal(grown.status, rebuilt.status)
+    pd.testing.assert_frame_equal(grown.cycles, rebuilt.cycles)
+
+# ========== Reports ==========
+def test_xlsx_cycle_times_are_excel_times(carry_over_dir, tmp_path):
+    pytest.importorskip("openpyxl")
+    build_store(carry_over_dir, tmp_path / "store", workers=1)
+    xlsx_path, = export_tables(tmp_path / "store", tmp_path / "xlsx", ["cycles"])
+    csv_path, = export_tables(tmp_path / "store", tmp_path / "csv", ["cycles"], output_format="csv")
+
+    written = pd.read_excel(xlsx_path)
+    expected = pd.read_csv(csv_path)
+    assert len(written) == len(expected) > 0
+    for column in ["Cycle_Start_Time", "Cycle_End_Time"]:
+        assert all(type(value).__name__ == "time" for value in written[column])
+        assert list(written[column].astype(str)) == list(expected[column])
+
+def test_parquet_report_streams_frames_with_more_categories(tmp_path):
+    # Later frames need wider dictionary indices than the first: int8, int16, then int32
+    frames = [pd.DataFrame({"Log Message": pd.Categorical([f"line {i}" for i in range(n)])}) for n in (5, 300, 40_000)]
+    assert write_report(iter(frames), tmp_path / "log.parquet") == 40_305
+    written = pd.read_parquet(tmp_path / "log.parquet")
+    assert list(written["Log Message"].astype(str)) == [value for frame in frames for value in frame["Log Message"]]
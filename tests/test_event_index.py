@@ -0,0 +1,197 @@
+"""
+Event index checks: every EventIndex query against a brute-force scan of
+the whole stored frame, on a store of deterministic synthetic logs and on
+one whose first day was written as two parts out of time order.
+
+Usage: python -m pytest tests
+"""
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from oeevolution.event_index import CYCLE_EVENTS, TRIGGER_EVENTS, EventIndex
+from oeevolution.log_parser import iter_log_chunks
+from oeevolution.log_store import read_log_store, write_log_store
+from oeevolution.pipeline import build_store
+
+from synthetic_logs import generate_logs
+
+# ========== CONFIG ==========
+DAYS = 4
+LINES_PER_DAY = 1_500
+MOVED_ROWS = 60  # rows of the first day written again after the second day
+
+# ========== Brute Force ==========
+def base_statuses(df):
+    return df["Status"].astype(str).str.replace(r"^(Start |End )", "", regex=True)
+
+def brute_status_periods(df, status, start=None, end=None, product=None):
+    """Runs of rows (in store order) with the same base status and Product_ID, each lasting until the next row."""
+    times = df["Event_Time"].to_numpy()
+    next_times = np.append(times[1:], times[-1:])
+    statuses = base_statuses(df).to_numpy()
+    products = [None if pd.isna(value) else str(value) for value in df["Product_ID"]]
+
+    periods = []
+    first = 0
+    for row in range(1, len(df) + 1):
+        if row < len(df) and (statuses[row], products[row]) == (statuses[first], products[first]):
+            continue
+        if statuses[first] == status and (product is None or products[first] == str(product)):
+            periods.append([times[first], next_times[row - 1], products[first], row - first])
+        first = row
+
+    table = pd.DataFrame(periods, columns=["Start", "End", "Product_ID", "Lines"])
+    table["Start"] = table["Start"].astype("datetime64[s]")
+    table["End"] = table["End"].astype("datetime64[s]")
+    if start is not None:
+        table = table[table["End"] >= pd.Timestamp(start)]
+    if end is not None:
+        table = table[table["Start"] <= pd.Timestamp(end)]
+    table.insert(2, "Seconds", (table["End"] - table["Start"]).dt.total_seconds())
+    table.insert(3, "Status", status)
+    return table.reset_index(drop=True)
+
+def brute_cycles(df):
+    """(start, end, Product_ID, duration, units) of every finished cycle, by the cycle table's row-loop rules."""
+    times = list(df["Event_Time"])
+    messages = list(df["Log Message"])
+    cycles = []
+    i = 0
+    while i < len(df):
+        if "Start Mark!" in messages[i]:
+            start, product_id = i, df["Product_ID"].iloc[i]
+            i += 1
+            units, end = 0, None
+            while i < len(df):
+                if "Successfully Cutting" in messages[i]:
+                    end = i
+                    break
+                if re.search(r"\(0\)Marking Completed\(\d+ms\)", messages[i]):
+                    units += 1
+                if "Stop PLC!" in messages[i]:
+                    end = i if units > 0 else None
+                    break
+                i += 1
+            if end is not None:
+                duration = ((times[end] - times[end].normalize()) - (times[start] - times[start].normalize())).total_seconds()
+                if duration > 0:
+                    cycles.append((times[start], times[end], product_id, duration, units))
+        i += 1
+    return cycles
+
+def brute_cycle_at(cycles, time):
+    time = pd.Timestamp(time)
+    for start, end, product_id, duration, units in cycles:
+        if start <= time <= end:
+            return {"Date": start.date(), "Product_ID": product_id, "Cycle_Start_Time": start, "Cycle_End_Time": end,
+                    "Cycle_Duration": duration, "Number_of_Units": units}
+    return None
+
+# ========== Fixtures ==========
+@pytest.fixture(scope="module")
+def log_dir(tmp_path_factory):
+    log_dir = tmp_path_factory.mktemp("logs")
+    generate_logs(log_dir, days=DAYS, lines_per_day=LINES_PER_DAY, products=3)
+    return log_dir
+
+@pytest.fixture(scope="module", params=["monotonic", "split_day"])
+def store(request, log_dir, tmp_path_factory):
+    """(store path, its full frame in store order)."""
+    store_path = tmp_path_factory.mktemp("store")
+    if request.param == "monotonic":
+        build_store(log_dir, store_path, workers=1)
+    else:
+        # The first day's opening rows come back after the second day, as a second part
+        # that sorts after rows with later times
+        rows = []
+        for chunk in iter_log_chunks(log_dir, workers=1):
+            rows.extend(zip(*chunk.values()))
+        columns = list(chunk)
+        first_day = [row for row in rows if row[0] == rows[0][0]]
+        second_day = [row for row in rows if row[0] != rows[0][0]]
+        boundary = next(i for i, row in enumerate(second_day) if row[0] != second_day[0][0])
+        ordered = first_day[MOVED_ROWS:] + second_day[:boundary] + first_day[:MOVED_ROWS] + second_day[boundary:]
+        write_log_store([{column: list(values) for column, values in zip(columns, zip(*ordered))}], store_path)
+        assert len(list(store_path.glob("Date=*/*.parquet"))) == DAYS + 1
+    return store_path, read_log_store(store_path)
+
+def plain(df):
+    """The rows with the categoricals as plain values (their category order may differ)."""
+    return df.astype(object).reset_index(drop=True)
+
+def in_range(df, start=None, end=None):
+    """Rows with Event_Time in [start, end]; an end given as a bare date covers the whole day."""
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= df["Event_Time"] >= pd.Timestamp(start)
+    if end is not None:
+        end = pd.Timestamp(end) + (pd.Timedelta(days=1, seconds=-1) if isinstance(end, str) and len(end) == 10 else pd.Timedelta(0))
+        keep &= df["Event_Time"] <= end
+    return df[keep]
+
+def query_times(df):
+    """Range bounds: store boundaries, times inside the days and a bare date."""
+    times = df["Event_Time"].sort_values()
+    middle = times.iloc[len(times) // 2]
+    return [
+        (None, None),
+        (times.iloc[len(times) // 5], middle),
+        (middle - pd.Timedelta(hours=30), middle + pd.Timedelta(minutes=7)),
+        (f"{times.iloc[0]:%Y-%m-%d}", f"{times.iloc[0]:%Y-%m-%d}"),
+    ]
+
+# ========== Rows and Events ==========
+def test_rows_between_matches_a_scan(store):
+    store_path, df = store
+    index = EventIndex(store_path)
+    product = df["Product_ID"].iloc[len(df) // 2]
+    for start, end in query_times(df):
+        expected = in_range(df, start, end)
+        assert len(expected) > 0
+        pd.testing.assert_frame_equal(plain(index.rows_between(start, end)), plain(expected))
+        expected = expected[expected["Product_ID"] == product]
+        pd.testing.assert_frame_equal(plain(index.rows_between(start, end, product=product)), plain(expected))
+
+@pytest.mark.parametrize("kind", ["err", "stop_plc", "set_file_name", "cycle_start", "marking_completed"])
+def test_events_match_a_scan(store, kind):
+    store_path, df = store
+    index = EventIndex(store_path)
+    pattern = {**TRIGGER_EVENTS, **CYCLE_EVENTS}[kind]
+    matches = df[df["Log Message"].astype(str).str.contains(pattern)]
+    assert len(matches) > 0
+    start, end = query_times(df)[2]
+    pd.testing.assert_frame_equal(plain(index.events(kind, start, end)), plain(in_range(matches, start, end)))
+    pd.testing.assert_frame_equal(plain(index.events(kind)), plain(matches))
+
+# ========== Status Periods ==========
+@pytest.mark.parametrize("status", ["Productive", "Idle", "Downtime", "Off"])
+def test_status_periods_match_a_scan(store, status):
+    store_path, df = store
+    index = EventIndex(store_path)
+    product = df["Product_ID"].iloc[len(df) // 2]
+    for start, end in query_times(df)[:3]:
+        expected = brute_status_periods(df, status, start, end)
+        assert len(expected) > 0
+        pd.testing.assert_frame_equal(index.status_periods(status, start, end), expected)
+        pd.testing.assert_frame_equal(index.status_periods(status, start, end, product=product),
+                                      brute_status_periods(df, status, start, end, product=product))
+
+# ========== Cycles ==========
+def test_cycle_at_matches_a_scan(store):
+    store_path, df = store
+    index = EventIndex(store_path)
+    cycles = brute_cycles(df)
+    assert len(cycles) > 100
+
+    # Every cycle's start, end and middle, plus the seconds between two cycles
+    times = [time for start, end, *_ in cycles for time in (start, end, start + (end - start) / 2)]
+    times += [end + pd.Timedelta(seconds=1) for _, end, *_ in cycles]
+    for time in times:
+        assert index.cycle_at(time) == brute_cycle_at(cycles, time), time
@@ -0,0 +1,53 @@
+"""
+Live mode checks: LiveOEE's running day totals against the batch daily
+status and cycle tables, for a folder tailed while its files grow in
+pieces cut mid-line, on deterministic synthetic logs.
+
+Usage: python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from oeevolution.live import STATUS_COLUMNS, LiveOEE
+from oeevolution.pipeline import parse_logs
+from oeevolution.tables import extract_number_of_products_table, generate_daily_status_table
+
+from synthetic_logs import generate_logs
+
+# ========== CONFIG ==========
+DAYS = 4
+LINES_PER_DAY = 1_500
+PIECES = [0.1, 0.35, 0.36, 0.8, 1.0]  # fractions of each file appended before a poll
+
+@pytest.fixture(scope="module")
+def log_dir(tmp_path_factory):
+    log_dir = tmp_path_factory.mktemp("logs")
+    generate_logs(log_dir, days=DAYS, lines_per_day=LINES_PER_DAY, products=3)
+    return log_dir
+
+def test_live_day_totals_match_the_batch_tables(log_dir, tmp_path):
+    live = LiveOEE()
+    assert live.poll(tmp_path) == 0
+    for log_file in sorted(log_dir.glob("*.log")):
+        data = log_file.read_bytes()
+        offset = 0
+        for fraction in PIECES:
+            cut = int(len(data) * fraction)
+            with open(tmp_path / log_file.name, "ab") as f:
+                f.write(data[offset:cut])
+            offset = cut
+            live.poll(tmp_path)
+
+    df = parse_logs(log_dir, workers=1)
+    daily_status = generate_daily_status_table(df)
+    cycles = extract_number_of_products_table(df).groupby("Date").agg(Cycles=("Cycle_Duration", "size"), Number_of_Units=("Number_of_Units", "sum"))
+    assert len(daily_status) == DAYS and len(cycles) == DAYS
+
+    for row in daily_status.itertuples(index=False):
+        day = live.day(row.Date)
+        assert {status: day[status] for status in STATUS_COLUMNS} == {status: getattr(row, status) for status in STATUS_COLUMNS}
+        assert (day["Cycles"], day["Number_of_Units"]) == tuple(cycles.loc[row.Date])
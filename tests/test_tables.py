@@ -0,0 +1,223 @@
+"""
+Table checks: the vectorized cycle and daily status tables against
+row-by-row references (the original Dataframe.py cycle loop, and a datetime
+walk over each status interval), on a hand-written frame that pins the
+edge cases down and on deterministic synthetic logs.
+
+Usage: python -m pytest tests
+"""
+import datetime
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from oeevolution.fused import fused_tables
+from oeevolution.ideal_times import RELATIVE_ACCURACY, IdealTimes
+from oeevolution.log_schema import compact_frame
+from oeevolution.pipeline import parse_logs
+from oeevolution.tables import TABLES, extract_number_of_products_table, generate_daily_status_table
+
+from synthetic_logs import generate_logs
+
+# ========== CONFIG ==========
+STATUSES = ["Productive", "Idle", "Standby", "Downtime", "Off"]
+CYCLE_COLUMNS = ["Date", "Product_ID", "Cycle_Start_Time", "Cycle_End_Time", "Cycle_Duration", "Number_of_Units", "Unit_Duration"]
+
+# ========== References ==========
+def reference_cycles(df):
+    """The cycle columns of Number_of_Products_Table as the original Dataframe.py loop built them."""
+    timestamps = [datetime.datetime.combine(datetime.date(1900, 1, 1), time) for time in df["Event_Time"].dt.time]
+    dates = list(df["Event_Time"].dt.date)
+    messages = list(df["Log Message"])
+    product_ids = list(df["Product_ID"])
+
+    cycles = []
+    i = 0
+    while i < len(df):
+        if "Start Mark!" in messages[i]:
+            start_time, date, product_id = timestamps[i], dates[i], product_ids[i]
+            i += 1
+            marking_count = 0
+            end_time = None
+            while i < len(df):
+                log_message = messages[i]
+                if "Successfully Cutting" in log_message:
+                    end_time = timestamps[i]
+                    break
+                if re.search(r"\(0\)Marking Completed\(\d+ms\)", log_message):
+                    marking_count += 1
+                if "Stop PLC!" in log_message and end_time is None:
+                    if marking_count > 0:
+                        end_time = timestamps[i]
+                    break
+                i += 1
+
+            if end_time and end_time > start_time:
+                cycle_duration = (end_time - start_time).total_seconds()
+                unit_duration = cycle_duration / marking_count if marking_count > 0 else None
+                cycles.append([date, product_id, start_time.time(), end_time.time(),
+                               cycle_duration, marking_count, unit_duration])
+        i += 1
+
+    return pd.DataFrame(cycles, columns=CYCLE_COLUMNS).astype({"Number_of_Units": "int64", "Unit_Duration": float})
+
+def reference_daily_status(df):
+    """
+    Daily_Status_Table from walking every status interval (a line's time to
+    the next line's) one calendar day at a time with datetime arithmetic.
+    """
+    times = list(df["Event_Time"])
+    statuses = [re.sub(r"^(Start |End )", "", status) for status in df["Status"]]
+
+    seconds = {}
+    for i, (start, status) in enumerate(zip(times, statuses)):
+        end = max(times[i + 1], start) if i + 1 < len(times) else start
+        while True:
+            piece_end = min(end, start.normalize() + pd.Timedelta(days=1))
+            day = seconds.setdefault(start.date(), dict.fromkeys(STATUSES, 0.0))
+            day[status] += (piece_end - start).total_seconds()
+            if piece_end >= end:
+                break
+            start = piece_end
+
+    rows = [[date] + [round(day[status] / 3600, 4) for status in STATUSES] for date, day in sorted(seconds.items())]
+    return pd.DataFrame(rows, columns=["Date", *STATUSES]).rename_axis(columns="Status")
+
+# ========== Fixtures ==========
+def frame_of(lines):
+    """A compact frame of (date "YYYY.MM.DD", "HH:MM:SS", message, Product_ID, Status) lines."""
+    chunk = {column: [] for column in ["Date", "Seconds", "Log Message", "Product", "Product_ID", "Status"]}
+    for date, time, message, product_id, status in lines:
+        hours, minutes, seconds = map(int, time.split(":"))
+        for column, value in zip(chunk, [date, hours * 3600 + minutes * 60 + seconds, message, "", product_id, status]):
+            chunk[column].append(value)
+    return compact_frame(chunk)
+
+# Cycles a row loop and the vectorized extraction could disagree on: absorbed
+# restarts, Stop PLC with and without markings, a cycle without End, cycles
+# carried over midnight, and closing lines without a cycle
+CYCLE_LINES = [
+    ("2024.03.04", "06:00:00", "Successfully Cutting", "11111111", "Standby"),
+    ("2024.03.04", "06:00:05", "(0)Stop PLC!", "11111111", "Start Idle"),
+    ("2024.03.04", "08:00:00", "(0)--Start Mark!--", "11111111", "Start Productive"),
+    ("2024.03.04", "08:00:04", "(0)Marking Completed(1200ms)", "11111111", "Productive"),
+    ("2024.03.04", "08:00:08", "(0)Marking Completed(1100ms)", "11111111", "Productive"),
+    ("2024.03.04", "08:00:10", "Successfully Cutting", "11111111", "End Productive"),
+    ("2024.03.04", "09:00:00", "(0)--Start Mark!--", "22222222", "Start Productive"),
+    ("2024.03.04", "09:00:30", "(0)--Start Mark!--", "33333333", "Start Productive"),
+    ("2024.03.04", "09:00:40", "(0)Marking Completed(900ms)", "33333333", "Productive"),
+    ("2024.03.04", "09:01:00", "(0)Stop PLC! (0)Marking Completed(50ms)", "33333333", "Start Idle"),
+    ("2024.03.04", "10:00:00", "(0)--Start Mark!--", "11111111", "Start Productive"),
+    ("2024.03.04", "10:00:20", "(0)Stop PLC!", "11111111", "Start Idle"),
+    ("2024.03.04", "10:00:30", "(0)Marking Completed(900ms)", "11111111", "Idle"),
+    ("2024.03.04", "11:00:00", "(0)--Start Mark!--", "11111111", "Start Productive"),
+    ("2024.03.04", "11:00:00", "Successfully Cutting", "11111111", "End Productive"),
+    ("2024.03.04", "22:00:00", "(0)--Start Mark!--", "22222222", "Start Productive"),
+    ("2024.03.04", "22:10:00", "(0)Marking Completed(1000ms)", "22222222", "Productive"),
+    ("2024.03.05", "23:00:00", "Successfully Cutting", "22222222", "End Productive"),
+    ("2024.03.05", "23:50:00", "(0)--Start Mark!--", "11111111", "Start Productive"),
+    ("2024.03.06", "00:01:00", "(0)Marking Completed(1000ms)", "11111111", "Productive"),
+    ("2024.03.06", "00:02:00", "Successfully Cutting", "11111111", "End Productive"),
+    ("2024.03.06", "07:00:00", "Camera grab ok", "11111111", "Standby"),
+    ("2024.03.08", "09:30:00", "****************Close Software***************", "11111111", "Off"),
+    ("2024.03.08", "09:31:00", "(0)Failed Waiting for PCB To Be in Place(Err:32)", "11111111", "Downtime"),
+    ("2024.03.08", "12:00:00", "(0)--Start Mark!--", "22222222", "Start Productive"),
+    ("2024.03.08", "12:00:05", "(0)Marking Completed(1000ms)", "22222222", "Productive"),
+]
+
+@pytest.fixture(scope="module")
+def synthetic_dir(tmp_path_factory):
+    log_dir = tmp_path_factory.mktemp("logs")
+    generate_logs(log_dir, days=6, lines_per_day=2_000, products=3)
+    return log_dir
+
+@pytest.fixture(scope="module")
+def synthetic_df(synthetic_dir):
+    return parse_logs(synthetic_dir, workers=1)
+
+# ========== Cycles ==========
+def test_cycles_match_the_original_loop_on_edge_cases():
+    df = frame_of(CYCLE_LINES)
+    expected = reference_cycles(df)
+    # Kept: the plain cycle, the restarted one closed by Stop PLC (its own marking counts)
+    # and the one closed at a later time of day on the next day
+    assert list(expected["Cycle_Duration"]) == [10.0, 60.0, 3600.0]
+    assert list(expected["Number_of_Units"]) == [2, 2, 1]
+    pd.testing.assert_frame_equal(extract_number_of_products_table(df)[CYCLE_COLUMNS], expected)
+
+def test_cycles_match_the_original_loop_on_synthetic_logs(synthetic_df):
+    expected = reference_cycles(synthetic_df)
+    assert len(expected) > 100
+    pd.testing.assert_frame_equal(extract_number_of_products_table(synthetic_df)[CYCLE_COLUMNS], expected)
+
+# ========== Ideal Times ==========
+def test_ideal_times_match_the_original_quantile_rule(synthetic_df):
+    cycles = extract_number_of_products_table(synthetic_df)
+    # The original rule: the fastest positive unit duration at or below the product's 25% quantile
+    expected = cycles.groupby("Product_ID")["Unit_Duration"]\
+        .apply(lambda x: x[x > 0][x[x > 0] <= x[x > 0].quantile(0.25)].min())
+    assert cycles["Product_ID"].nunique() > 1
+    pd.testing.assert_series_equal(cycles["Ideal_Unit_Time"], cycles["Product_ID"].map(expected).astype(float), check_names=False)
+
+def test_ideal_times_merge_and_reload(synthetic_df):
+    cycles = extract_number_of_products_table(synthetic_df)
+    product_ids, unit_durations = cycles["Product_ID"].to_numpy(), cycles["Unit_Duration"].to_numpy()
+    whole = IdealTimes()
+    whole.add_cycles(product_ids, unit_durations)
+
+    one_by_one = IdealTimes()
+    for product_id, unit_duration in zip(product_ids, unit_durations):
+        one_by_one.add(product_id, unit_duration)
+    halves = IdealTimes()
+    for part in (slice(None, len(cycles) // 2), slice(len(cycles) // 2, None)):
+        half = IdealTimes()
+        half.add_cycles(product_ids[part], unit_durations[part])
+        halves.merge(half)
+    reloaded = IdealTimes.from_dict(whole.to_dict())
+    for ideal_times in (one_by_one, halves, reloaded):
+        assert ideal_times.ideal_unit_times() == whole.ideal_unit_times()
+        assert ideal_times.to_dict() == whole.to_dict()
+
+    # Quantiles within RELATIVE_ACCURACY of the durations at their rank
+    for product_id, durations in cycles[cycles["Unit_Duration"] > 0].groupby("Product_ID")["Unit_Duration"]:
+        durations = np.sort(durations.to_numpy())
+        for q in (0.0, 0.25, 0.5, 0.9, 1.0):
+            exact = durations[int(q * (len(durations) - 1))]
+            assert abs(whole.quantile(product_id, q) - exact) <= RELATIVE_ACCURACY * exact
+
+# ========== Daily Status ==========
+def test_daily_status_matches_the_interval_walk_on_edge_cases():
+    df = frame_of(CYCLE_LINES)
+    expected = reference_daily_status(df)
+    # 2024.03.07 has no lines but is covered by the Standby interval from the day before
+    assert datetime.date(2024, 3, 7) in set(expected["Date"])
+    pd.testing.assert_frame_equal(generate_daily_status_table(df), expected)
+
+def test_daily_status_matches_the_interval_walk_on_synthetic_logs(synthetic_df):
+    pd.testing.assert_frame_equal(generate_daily_status_table(synthetic_df), reference_daily_status(synthetic_df))
+
+# ========== Fused Tables ==========
+@pytest.fixture(scope="module")
+def cycle_dir(tmp_path_factory):
+    """CYCLE_LINES as .log files (their statuses come from the parse instead), plus a SetFileName line."""
+    cycle_dir = tmp_path_factory.mktemp("cycle_logs")
+    lines = [("2024.03.04", "05:00:00", "SetFileName File: D:\\Production Program\\11111111_A.prg")] + [line[:3] for line in CYCLE_LINES]
+    for date, time, message in lines:
+        with open(cycle_dir / f"{date}.log", "a", encoding="latin-1", newline="") as f:
+            f.write(f"{time}:{message}\r\n")
+    return cycle_dir
+
+@pytest.mark.parametrize("folder", ["cycle_dir", "synthetic_dir"])
+def test_fused_tables_equal_the_batch_tables(folder, request):
+    log_dir = request.getfixturevalue(folder)
+    df = parse_logs(log_dir, workers=1)
+    fused = fused_tables(log_dir)
+    assert list(fused) == list(TABLES)
+    for name, (_, build_table, _) in TABLES.items():
+        pd.testing.assert_frame_equal(fused[name], build_table(df))